@@ -0,0 +1,506 @@
+"""Local HTTP API over the data, for the household's other devices.
+
+    python project.py --serve          # http://127.0.0.1:8765/api
+
+Endpoints, all JSON:
+
+    GET   /api                        every collection and its size
+    GET   /api/<collection>           records, a page at a time
+    GET   /api/<collection>/<index>   one record
+    POST  /api/todos, /api/bills      add a record
+    PATCH /api/todos/<index>, ...     change fields of a record
+
+Lists take ?offset= and ?limit= (at most MAX_LIMIT), ?q= for text in a
+record's name and field=value filters such as ?completed=false or
+?due_before=2026-11-01. Records are addressed by their index in the
+collection, as listed.
+
+Every response carries an ETag that changes whenever the data does (see
+storage.revision). A GET sending it back in If-None-Match is answered
+304 Not Modified without looking at the records, so clients can poll
+often. A write sending If-Match fails with 412 if the data changed since
+it was read.
+
+The server runs an asyncio event loop on a thread of its own. Records
+are only read and changed through `call`, which the app points at its
+GUI thread (see jobs.MainThread), so requests never interleave with
+edits made in the window; listeners are then told which rows changed.
+It listens on localhost unless FINANCE_API_HOST says otherwise; set
+FINANCE_API_TOKEN to require "Authorization: Bearer <token>".
+"""
+import asyncio
+import datetime
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+import archive
+import perf
+import registry
+import schema
+import storage
+from budget import category_names, rollup
+from search import SOURCES
+from storage import data, save_data
+from taskgraph import REPEATS, complete_occurrence, task_graph
+
+HOST = os.environ.get("FINANCE_API_HOST", "127.0.0.1")
+PORT = int(os.environ.get("FINANCE_API_PORT", "8765"))
+TOKEN = os.environ.get("FINANCE_API_TOKEN", "")
+PAGE_SIZE = 50
+MAX_LIMIT = 500
+MAX_BODY = 64 * 1024
+MAX_HEADERS = 100
+# Bytes in the request line or one header line
+MAX_LINE = 8 * 1024
+# Seconds a client may take to send its request
+REQUEST_TIMEOUT = 10
+# Seconds stop() waits for requests in progress
+STOP_TIMEOUT = 5
+
+# Fields the API may set, and the defaults of those left out of a new record
+WRITABLE = {
+    "todos": {
+        "task": None,
+        "category": "",
+        "status": "Not Started",
+        "due_date": "",
+        "completed": False,
+        "repeat": None,
+    },
+    "bills": {
+        "name": None,
+        "amount": None,
+        "due_date": "",
+        "paid": False,
+        "category": None,
+    },
+}
+
+# Called on the `call` thread after a write as
+# listener(collection, changed indexes, number of records appended)
+listeners = []
+
+log = logging.getLogger(__name__)
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _label(collection, record):
+    source = SOURCES.get(collection)
+    if source is not None:
+        return source[1](record)
+    return " ".join(value for value in record.values() if isinstance(value, str))
+
+
+def _parse_filter(collection, field, text):
+    """(field, value) of a ?field=text filter, value typed as the field."""
+    if field in ("due_before", "due_after"):
+        try:
+            return field, datetime.date.fromisoformat(text).isoformat()
+        except ValueError:
+            raise ApiError(400, f"{field} must be a YYYY-MM-DD date")
+    kind = {
+        **schema.FIELDS[collection],
+        **schema.OPTIONAL_FIELDS.get(collection, {}),
+    }.get(field)
+    if kind is None or kind is list:
+        raise ApiError(400, f"Cannot filter {collection} by {field!r}")
+    if kind is bool:
+        if text not in ("true", "false"):
+            raise ApiError(400, f"{field} must be true or false")
+        return field, text == "true"
+    if kind is schema.NUMBER:
+        try:
+            return field, float(text)
+        except ValueError:
+            raise ApiError(400, f"{field} must be a number")
+    return field, text
+
+
+def _accepts(record, field, value):
+    if field == "due_before":
+        return "" < record.get("due_date", "") < value
+    if field == "due_after":
+        return record.get("due_date", "") > value
+    return record.get(field) == value
+
+
+@lru_cache(maxsize=32)
+def _matches(revision, collection, text, filters):
+    """Indexes of the records passing the filters, while revision lasts."""
+    words = text.lower().split()
+    return [
+        i
+        for i, record in enumerate(data[collection])
+        if all(_accepts(record, field, value) for field, value in filters)
+        and all(word in _label(collection, record).lower() for word in words)
+    ]
+
+
+def _item(collection, index):
+    return {"index": index, "record": data[collection][index]}
+
+
+def _index(collection, text):
+    try:
+        index = int(text)
+    except ValueError:
+        index = -1
+    if not 0 <= index < len(data[collection]):
+        raise ApiError(404, f"No {collection} record {text}")
+    return index
+
+
+def list_records(collection, query):
+    """A page of the records of collection matching the query."""
+    query = dict(query)
+    try:
+        offset = int(query.pop("offset", 0))
+        limit = int(query.pop("limit", PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, "offset and limit must be whole numbers")
+    if offset < 0 or not 0 < limit <= MAX_LIMIT:
+        raise ApiError(400, f"limit must be between 1 and {MAX_LIMIT}")
+    words = query.pop("q", "")
+    filters = tuple(
+        sorted(_parse_filter(collection, field, text) for field, text in query.items())
+    )
+    found = _matches(storage.revision, collection, words, filters)
+    page = {
+        "items": [_item(collection, i) for i in found[offset : offset + limit]],
+        "total": len(found),
+        "offset": offset,
+        "limit": limit,
+    }
+    if offset + limit < len(found):
+        page["next_offset"] = offset + limit
+    return page
+
+
+def _checked(collection, record):
+    """record, after making sure the app can show and save it."""
+    found = schema.problems(collection, record)
+    if collection == "todos" and record.get("repeat") not in (None, *REPEATS):
+        found.append(f"'repeat' must be one of {', '.join(REPEATS)}")
+    category = record.get("category")
+    if category and category not in category_names():
+        found.append(f"unknown category {category!r}")
+    for field in getattr(registry.COLLECTIONS.get(collection), "fields", ()):
+        if field.kind == registry.DATE and isinstance(record.get(field.name), str):
+            try:
+                registry.parse(field, record[field.name])
+            except ValueError as e:
+                found.append(str(e))
+    if found:
+        raise ApiError(400, "; ".join(found))
+    return record
+
+
+def writable(collection):
+    """Fields the API may set in collection with their defaults, or None.
+
+    Every field of a plugin's collection (see registry.py) is writable.
+    """
+    if collection in registry.COLLECTIONS:
+        return {
+            field.name: False if field.kind is bool else field.default
+            for field in registry.COLLECTIONS[collection].fields
+        }
+    return WRITABLE.get(collection)
+
+
+def _fields(collection, body):
+    unknown = set(body) - set(writable(collection))
+    if unknown:
+        raise ApiError(400, f"Cannot set {', '.join(sorted(unknown))}")
+    return body
+
+
+def _notify(collection, changed, added):
+    for listener in listeners:
+        listener(collection, changed, added)
+
+
+def add_record(collection, body):
+    fields = {**writable(collection), **_fields(collection, body)}
+    record = {field: value for field, value in fields.items() if value is not None}
+    _checked(collection, record)
+    if collection in registry.COLLECTIONS:
+        # Through its store, which keeps the summary totals
+        index = registry.store(collection).add(record)
+    else:
+        archive.stamp(collection, record)
+        data[collection].append(record)
+        index = len(data[collection]) - 1
+    if collection == "bills":
+        rollup.bill_added(record)
+    save_data()
+    _notify(collection, [], 1)
+    return _item(collection, index)
+
+
+def update_record(collection, index, body):
+    record = data[collection][index]
+    changes = _fields(collection, body)
+    updated = {**record, **changes}
+    for field, value in changes.items():
+        if value is None:
+            updated.pop(field, None)
+    _checked(collection, updated)
+
+    changed, added = [index], 0
+    if collection == "todos":
+        # parent and blocked_by are not writable here, so the links indexed
+        # stay right; completing or reopening only updates counts (toggled())
+        task_graph.sync()
+        completing = updated["completed"] and not record["completed"]
+        if completing and task_graph.blocked(record):
+            names = ", ".join(target["task"] for target in task_graph.blockers(record))
+            raise ApiError(409, f"{record['task']!r} is waiting for: {names}")
+        toggled = updated["completed"] != record["completed"]
+        if completing and updated.get("repeat"):
+            # Stays open, due on its next occurrence, like in the To-Do tab
+            updated["completed"] = toggled = False
+        record.clear()
+        record.update(updated)
+        if completing and record.get("repeat"):
+            data["todos"].append(complete_occurrence(record))
+            added = 1
+        archive.stamp("todos", record)
+        if toggled:
+            # Only the todos waiting for this one can change
+            changed += [
+                task_graph.positions[id(dependent)]
+                for dependent in task_graph.toggled(record)
+            ]
+    elif collection == "bills":
+        rollup.bill_removed(record)
+        record.clear()
+        record.update(updated)
+        archive.stamp("bills", record)
+        rollup.bill_added(record)
+    else:
+        registry.store(collection).replace(index, updated)
+    save_data()
+    _notify(collection, changed, added)
+    return _item(collection, index)
+
+
+def etag(session):
+    return f'"{session}-{storage.revision}"'
+
+
+@perf.timed("api")
+def handle(session, method, segments, query, headers, body):
+    """(status, payload) of a request; runs on the `call` thread."""
+    if storage.loading:
+        raise ApiError(503, "The data is still loading")
+    if not segments:
+        if method != "GET":
+            raise ApiError(405, "Only GET is allowed here")
+        return 200, {
+            "collections": {name: len(data[name]) for name in schema.FIELDS},
+            "writable": sorted([*WRITABLE, *registry.COLLECTIONS]),
+        }
+
+    collection = segments[0]
+    if collection not in schema.FIELDS or len(segments) > 2:
+        raise ApiError(404, f"No such collection: {'/'.join(segments)}")
+    write = "POST" if len(segments) == 1 else "PATCH"
+    if method not in ("GET", write):
+        raise ApiError(405, f"Use GET or {write} here")
+    if method == write:
+        if writable(collection) is None:
+            raise ApiError(405, f"{collection} can only be read here")
+        expected = headers.get("if-match")
+        if expected is not None and expected != etag(session):
+            raise ApiError(412, "The data has changed since it was read")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Send the fields as a JSON object")
+
+    if len(segments) == 1:
+        if method == "GET":
+            return 200, list_records(collection, query)
+        return 201, add_record(collection, body)
+    index = _index(collection, segments[1])
+    if method == "GET":
+        return 200, _item(collection, index)
+    return 200, update_record(collection, index, body)
+
+
+def call_here(fn):
+    """Run fn() at once; for servers without a GUI thread to defer to."""
+    future = Future()
+    try:
+        future.set_result(fn())
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+async def _read_line(reader, status, message):
+    try:
+        return await reader.readline()
+    except ValueError:
+        # Longer than the reader's limit, MAX_LINE: it stops buffering there
+        raise ApiError(status, message) from None
+
+
+async def _read_request(reader):
+    """(method, target, headers, body) of the next request; None at the end."""
+    line = await _read_line(reader, 400, "The request line is too long")
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ApiError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await _read_line(reader, 431, "A header is too long")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise ApiError(431, "Too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise ApiError(400, "Malformed Content-Length")
+    if length > MAX_BODY:
+        raise ApiError(413, f"Requests are limited to {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method.upper(), target, headers, body
+
+
+class ApiServer:
+    """The API served from a background thread, until stop()."""
+
+    def __init__(self, host=HOST, port=PORT, token=TOKEN, call=call_here):
+        self.host = host
+        self.port = port  # 0 picks a free one; the bound port once started
+        self.token = token
+        self.call = call
+        # Tells this run's ETags apart from those of an earlier run
+        self.session = secrets.token_hex(4)
+        self.loop = None
+        self.stopping = None
+        self.thread = None
+        self.started = threading.Event()
+        self.error = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/api"
+
+    def start(self):
+        """Start serving; raises OSError if the port cannot be used."""
+        self.thread = threading.Thread(target=self._run, name="api", daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.error is not None:
+            raise self.error
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.stopping.set)
+            self.thread.join(timeout)
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except OSError as e:
+            self.error = e
+            self.started.set()
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        server = await asyncio.start_server(
+            self._connection, self.host, self.port, limit=MAX_LINE
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        log.info("Serving the API on %s", self.url)
+        self.started.set()
+        async with server:
+            await self.stopping.wait()
+
+    async def _connection(self, reader, writer):
+        try:
+            status, headers, payload = await self._respond(reader)
+        except Exception:
+            log.exception("API request failed")
+            status, headers, payload = 500, {}, {"error": "Internal error"}
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+        headers = {
+            **headers,
+            "Content-Length": str(len(body)),
+            "Connection": "close",
+        }
+        if payload is not None:
+            headers["Content-Type"] = "application/json"
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass  # the client went away
+
+    async def _respond(self, reader):
+        """(status, headers, payload or None) for the request on reader."""
+        try:
+            request = await asyncio.wait_for(_read_request(reader), REQUEST_TIMEOUT)
+            if request is None:
+                raise ApiError(400, "Empty request")
+            method, target, headers, body = request
+            if self.token and not hmac.compare_digest(
+                headers.get("authorization", ""), f"Bearer {self.token}"
+            ):
+                return 401, {"WWW-Authenticate": "Bearer"}, {"error": "Unauthorized"}
+
+            url = urlsplit(target)
+            segments = [part for part in url.path.split("/") if part]
+            if segments[:1] != ["api"]:
+                raise ApiError(404, "The API is under /api")
+            if method == "GET" and headers.get("if-none-match") == etag(self.session):
+                # Checked here rather than on the `call` thread, so polls
+                # of unchanged data never wait for it
+                return 304, {"ETag": etag(self.session)}, None
+            if body:
+                try:
+                    body = json.loads(body)
+                except ValueError:
+                    raise ApiError(400, "The body is not valid JSON")
+            query = parse_qsl(url.query)
+
+            def run():
+                result = handle(
+                    self.session, method, segments[1:], query, headers, body
+                )
+                return result, etag(self.session)
+
+            (status, payload), tag = await asyncio.wrap_future(self.call(run))
+            headers = {"ETag": tag}
+            if status == 201:
+                headers["Location"] = f"{url.path}/{payload['index']}"
+            return status, headers, payload
+        except ApiError as e:
+            return e.status, {}, {"error": str(e)}
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return 408, {}, {"error": "The request was not sent in time"}
@@ -0,0 +1,219 @@
+"""Archive of completed todos and paid bills.
+
+Todos completed and bills paid more than ARCHIVE_DAYS days ago are moved
+out of the data file into an append-only archive next to it, so the tabs
+no longer draw them and saves no longer write them:
+
+    data-archive.bin   the archived records
+    data-archive.idx   a summary of each record, which the history shows
+
+Both files are a sequence of frames, one per sweep: a 4-byte length and
+zlib-compressed JSON, encrypted when the data file is. A sweep only
+appends; a crash can at worst leave an unfinished last frame, which
+readers skip and the next sweep writes over. The records are written
+before they leave the data file, so a crash in between shows them twice
+in the history rather than losing them.
+
+The index is only read when the history is opened. Archived bills still
+count towards budgets and year-end reports through the amounts kept in
+data["archived_totals"] per due month and category.
+"""
+import datetime
+import io
+import json
+import os
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+
+import encryption
+import perf
+import storage
+from budget import UNCATEGORIZED, month_of
+from schema import ARCHIVED_TOTALS_KEY
+
+ARCHIVE_DAYS = int(os.environ.get("FINANCE_ARCHIVE_DAYS", "90"))
+
+# collection -> (flag set once done, field with the day it was set, label)
+ARCHIVED = {
+    "todos": ("completed", "completed_on", lambda todo: todo["task"]),
+    "bills": ("paid", "paid_on", lambda bill: bill["name"]),
+}
+
+Entry = namedtuple(
+    "Entry",
+    ["collection", "label", "category", "amount", "due_date", "done_on"],
+)
+
+LENGTH_SIZE = 4
+
+
+def archive_paths(path=None):
+    """The archive and index files of a data file."""
+    stem = os.path.splitext(path or storage.data_file)[0]
+    return stem + "-archive.bin", stem + "-archive.idx"
+
+
+def stamp(collection, record, today=None):
+    """Record the day a todo was completed or a bill was paid, or clear it."""
+    flag, field, _ = ARCHIVED[collection]
+    if record[flag]:
+        today = today or datetime.date.today()
+        record.setdefault(field, today.isoformat())
+    else:
+        record.pop(field, None)
+
+
+def _done_on(record, field, today):
+    if field not in record:
+        # Done before the day was recorded: no later than it was due
+        try:
+            due = datetime.date.fromisoformat(record["due_date"])
+        except ValueError:
+            due = today
+        record[field] = min(due, today).isoformat()
+    return record[field]
+
+
+def _encode(value, encrypted):
+    payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+    if encrypted:
+        payload = b"".join(encryption.encrypt([payload]))
+    return len(payload).to_bytes(LENGTH_SIZE, "big") + payload
+
+
+def _decode(payload):
+    # Frames written before the data file was encrypted stay readable
+    if payload.startswith(encryption.MAGIC):
+        payload = b"".join(encryption.decrypt(io.BytesIO(payload)))
+    return json.loads(zlib.decompress(payload))
+
+
+def _frames(f):
+    """Yield (offset, payload) of each complete frame of an open file."""
+    offset = 0
+    while True:
+        header = f.read(LENGTH_SIZE)
+        if len(header) < LENGTH_SIZE:
+            return
+        length = int.from_bytes(header, "big")
+        payload = f.read(length)
+        if len(payload) < length:
+            return
+        yield offset, payload
+        offset += LENGTH_SIZE + length
+
+
+def _append(path, frame):
+    """Append a frame after the last complete one."""
+    with open(path, "ab+") as f:
+        f.seek(0)
+        end = 0
+        for offset, payload in _frames(f):
+            end = offset + LENGTH_SIZE + len(payload)
+        f.truncate(end)
+        f.write(frame)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def append(records, path=None, encrypted=False):
+    """Add {collection: [records]} to the archive and to its index."""
+    archive_path, index_path = archive_paths(path)
+    _append(archive_path, _encode(records, encrypted))
+    entries = [
+        [
+            collection,
+            label_of(record),
+            record.get("category", UNCATEGORIZED),
+            record.get("amount"),
+            record["due_date"],
+            record[field],
+        ]
+        for collection, (_, field, label_of) in ARCHIVED.items()
+        for record in records.get(collection, [])
+    ]
+    _append(index_path, _encode(entries, encrypted))
+
+
+@perf.timed("archive")
+def sweep(obj, days=ARCHIVE_DAYS, path=None, encrypted=False, today=None):
+    """Move the records of obj done more than days ago to the archive.
+
+    Returns how many records were moved; days <= 0 turns archiving off.
+    """
+    if days <= 0:
+        return 0
+    today = today or datetime.date.today()
+    cutoff = (today - datetime.timedelta(days=days)).isoformat()
+    kept, moved = {}, {}
+    for collection, (flag, field, _) in ARCHIVED.items():
+        kept[collection], moved[collection] = [], []
+        for record in obj.get(collection, []):
+            old = record[flag] and _done_on(record, field, today) <= cutoff
+            (moved if old else kept)[collection].append(record)
+
+    count = sum(map(len, moved.values()))
+    if count:
+        append(moved, path, encrypted)
+        obj.update(kept)
+        totals = obj.setdefault(ARCHIVED_TOTALS_KEY, {})
+        for bill in moved["bills"]:
+            month = month_of(bill["due_date"])
+            if month:
+                category = bill.get("category", UNCATEGORIZED)
+                by_category = totals.setdefault(month, {})
+                by_category[category] = round(
+                    by_category.get(category, 0.0) + bill["amount"], 2
+                )
+    return count
+
+
+def archived_bills(obj, month):
+    """Archived bills due in a "YYYY-MM" month, one per category."""
+    return [
+        {"amount": amount, "paid": True, "category": category}
+        for category, amount in obj.get(ARCHIVED_TOTALS_KEY, {}).get(month, {}).items()
+    ]
+
+
+@lru_cache(maxsize=1)
+def _read_index(index_path, size, modified):
+    entries = []
+    with open(index_path, "rb") as f:
+        for _, payload in _frames(f):
+            entries.extend(Entry(*entry) for entry in _decode(payload))
+    entries.sort(key=lambda entry: entry.done_on, reverse=True)
+    return entries
+
+
+def index(path=None):
+    """Summaries of every archived record, most recently done first."""
+    index_path = archive_paths(path)[1]
+    try:
+        stat = os.stat(index_path)
+    except FileNotFoundError:
+        return []
+    return _read_index(index_path, stat.st_size, stat.st_mtime_ns)
+
+
+def search(entries, text):
+    """The entries whose name or category contains every word of text."""
+    words = text.lower().split()
+    return [
+        entry
+        for entry in entries
+        if all(word in f"{entry.label} {entry.category}".lower() for word in words)
+    ]
+
+
+def records(path=None):
+    """Yield (collection, record) for every archived record, oldest first."""
+    archive_path = archive_paths(path)[0]
+    if not os.path.exists(archive_path):
+        return
+    with open(archive_path, "rb") as f:
+        for _, payload in _frames(f):
+            for collection, archived in _decode(payload).items():
+                for record in archived:
+                    yield collection, record
@@ -0,0 +1,298 @@
+"""Automatic backups of the data file, deduplicated by content.
+
+A backup is a small manifest listing the blocks that make up each
+collection; every block is stored once, named by the hash of its
+content. Lists are cut into blocks of BLOCK_RECORDS records, so a backup
+only adds the blocks that changed since the last one: nothing for
+collections that were not touched, and only the last block of one that
+grows at the end, like transactions.
+
+    data-backups/
+        objects/ab/ab12...              zlib-compressed JSON of one block
+        manifests/20261019-153000.json  one per backup
+
+Old backups are pruned per RETENTION: the newest backup of each of the
+last 24 hours, 14 days and 8 weeks is kept, as are the KEEP_LATEST
+newest backups whatever their age, together with the blocks they use.
+When the data file is encrypted the blocks are encrypted too, and named
+by a hash keyed with the passphrase; so are the values outside the lists
+and the record counts, which the manifest then names as one more block,
+"details". Only the total number of records stays readable, for listings.
+
+Usage: python backups.py [--data PATH] list | create | restore ID
+"""
+import argparse
+import datetime
+import getpass
+import hashlib
+import hmac
+import io
+import json
+import os
+import sys
+import threading
+import zlib
+
+import encryption
+import storage
+
+BLOCK_RECORDS = 1000
+KEEP_LATEST = 10
+# (name, how many of the latest periods keep a backup, period of a backup)
+RETENTION = (
+    ("hourly", 24, lambda created: created.toordinal() * 24 + created.hour),
+    ("daily", 14, lambda created: created.toordinal()),
+    ("weekly", 8, lambda created: created.toordinal() // 7),
+)
+ID_FORMAT = "%Y%m%d-%H%M%S"
+
+# Backups may run on a background thread; one at a time, so pruning never
+# deletes a block another backup has just reused
+_lock = threading.Lock()
+
+
+def backup_dir(path=None):
+    """The backup folder of a data file: data-backups next to data.json."""
+    return os.path.splitext(path or storage.data_file)[0] + "-backups"
+
+
+def _address(raw, encrypted):
+    if encrypted:
+        key = encryption.require_passphrase().encode("utf-8")
+        return hmac.new(key, raw, hashlib.sha256).hexdigest()
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _object_path(directory, address):
+    return os.path.join(directory, "objects", address[:2], address)
+
+
+def _write_atomic(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(payload)
+    os.replace(temp_path, path)
+
+
+def _store(directory, value, encrypted):
+    """Store one block unless it is there already; returns its address."""
+    raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    address = _address(raw, encrypted)
+    path = _object_path(directory, address)
+    if not os.path.exists(path):
+        payload = zlib.compress(raw)
+        if encrypted:
+            payload = b"".join(encryption.encrypt([payload]))
+        _write_atomic(path, payload)
+    return address
+
+
+def _fetch(directory, address, encrypted):
+    with open(_object_path(directory, address), "rb") as f:
+        payload = f.read()
+    if encrypted:
+        payload = b"".join(encryption.decrypt(io.BytesIO(payload)))
+    return json.loads(zlib.decompress(payload))
+
+
+def list_backups(directory=None):
+    """Manifests of every backup, newest first."""
+    directory = directory or backup_dir()
+    folder = os.path.join(directory, "manifests")
+    if not os.path.isdir(folder):
+        return []
+    ids = [name[:-5] for name in os.listdir(folder) if name.endswith(".json")]
+    manifests = []
+    for backup_id in sorted(ids, reverse=True):
+        with open(os.path.join(folder, backup_id + ".json"), encoding="utf-8") as f:
+            manifests.append(json.load(f))
+    return manifests
+
+
+def _new_id(directory, now):
+    backup_id = now.strftime(ID_FORMAT)
+    suffix = 1
+    while os.path.exists(os.path.join(directory, "manifests", backup_id + ".json")):
+        suffix += 1
+        backup_id = f"{now.strftime(ID_FORMAT)}-{suffix}"
+    return backup_id
+
+
+def create(obj, reason="", directory=None, encrypted=False, now=None):
+    """Back up a data dict; returns the id of the backup.
+
+    A backup identical to the latest one is not written again; the id of
+    the latest one is returned instead.
+    """
+    with _lock:
+        return _create(obj, reason, directory or backup_dir(), encrypted, now)
+
+
+def _create(obj, reason, directory, encrypted, now):
+    now = now or datetime.datetime.now()
+    blocks, values, counts = {}, {}, {}
+    for name, value in obj.items():
+        if isinstance(value, list):
+            blocks[name] = [
+                _store(directory, value[i : i + BLOCK_RECORDS], encrypted)
+                for i in range(0, len(value), BLOCK_RECORDS)
+            ]
+            counts[name] = len(value)
+        else:
+            values[name] = value
+
+    details = {"counts": counts, "values": values}
+    if encrypted:
+        details = {"details": _store(directory, details, encrypted)}
+
+    latest = next(iter(list_backups(directory)), None)
+    if latest and _contents(latest) == _contents({"blocks": blocks, **details}):
+        return latest["id"]
+
+    manifest = {
+        "id": _new_id(directory, now),
+        "created": now.isoformat(timespec="seconds"),
+        "reason": reason,
+        "encrypted": encrypted,
+        "records": sum(counts.values()),
+        "blocks": blocks,
+        **details,
+    }
+    path = os.path.join(directory, "manifests", manifest["id"] + ".json")
+    _write_atomic(path, json.dumps(manifest, indent=1).encode("utf-8"))
+    _prune(directory, now)
+    return manifest["id"]
+
+
+def _contents(manifest):
+    """What a backup holds, for comparing it with another."""
+    return manifest.get("blocks"), manifest.get("details", manifest.get("values"))
+
+
+def record_count(manifest):
+    """The number of records in a backup."""
+    if "records" in manifest:
+        return manifest["records"]
+    return sum(manifest["counts"].values())  # written before "records"
+
+
+def load(backup_id, directory=None):
+    """The data dict saved in a backup."""
+    directory = directory or backup_dir()
+    path = os.path.join(directory, "manifests", backup_id + ".json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"No backup {backup_id}") from None
+    obj = {}
+    for name, addresses in manifest["blocks"].items():
+        obj[name] = []
+        for address in addresses:
+            obj[name].extend(_fetch(directory, address, manifest["encrypted"]))
+    if "details" in manifest:
+        manifest.update(_fetch(directory, manifest["details"], True))
+    obj.update(manifest["values"])
+    return obj
+
+
+def restore(backup_id, path=None, directory=None):
+    """Replace the data file with a backup; returns the restored data.
+
+    The current file is backed up first, so a restore can be undone.
+    """
+    path = path or storage.data_file
+    directory = directory or backup_dir(path)
+    obj = load(backup_id, directory)
+    try:
+        current = storage.read_data(path)
+    except (OSError, ValueError, zlib.error):
+        current = None  # missing or damaged: nothing worth keeping
+    if current is not None:
+        create(current, "before restore", directory, storage.is_encrypted(path))
+    fmt = storage.data_format or (
+        storage.detect_format(path) if os.path.exists(path) else "json"
+    )
+    storage.write_data(obj, path, fmt, storage.compression_level)
+    return obj
+
+
+def retained(manifests, now=None):
+    """Ids of the backups the retention policy keeps."""
+    now = now or datetime.datetime.now()
+    newest = sorted(manifests, key=lambda m: m["created"], reverse=True)
+    keep = {manifest["id"] for manifest in newest[:KEEP_LATEST]}
+    for _, count, period in RETENTION:
+        seen = set()
+        for manifest in newest:
+            slot = period(datetime.datetime.fromisoformat(manifest["created"]))
+            if slot not in seen and period(now) - slot < count:
+                seen.add(slot)
+                keep.add(manifest["id"])
+    return keep
+
+
+def prune(directory=None, now=None):
+    """Delete the backups past retention and blocks no backup uses."""
+    with _lock:
+        _prune(directory or backup_dir(), now)
+
+
+def _prune(directory, now):
+    manifests = list_backups(directory)
+    keep = retained(manifests, now)
+    used = set()
+    for manifest in manifests:
+        if manifest["id"] in keep:
+            for addresses in manifest["blocks"].values():
+                used.update(addresses)
+            if "details" in manifest:
+                used.add(manifest["details"])
+        else:
+            os.remove(os.path.join(directory, "manifests", manifest["id"] + ".json"))
+
+    objects = os.path.join(directory, "objects")
+    for folder, _, names in os.walk(objects):
+        for name in names:
+            if name not in used:
+                os.remove(os.path.join(folder, name))
+
+
+def describe(manifest):
+    records = record_count(manifest)
+    return f"{manifest['id']:<20}{manifest['created']:<22}{records:>10} records  " + (
+        manifest["reason"]
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Back up or restore the data file")
+    parser.add_argument("--data", help="data file (default: the app's data file)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list backups, newest first")
+    commands.add_parser("create", help="back up the data file now")
+    restore_parser = commands.add_parser("restore", help="restore a backup")
+    restore_parser.add_argument("id", help="backup id, as shown by list")
+    args = parser.parse_args(argv)
+
+    path = args.data or storage.data_file
+    directory = backup_dir(path)
+    encrypted = storage.is_encrypted(path)
+    if encrypted and not encryption.passphrase:
+        encryption.passphrase = getpass.getpass("Passphrase: ")
+    if args.command == "list":
+        for manifest in list_backups(directory):
+            print(describe(manifest))
+    elif args.command == "create":
+        print(create(storage.read_data(path), "manual", directory, encrypted))
+    else:
+        restore(args.id, path, directory)
+        print(f"Restored {args.id} to {path}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except ValueError as e:
+        sys.exit(str(e))
@@ -0,0 +1,248 @@
+"""End-to-end GUI benchmarks, run headless on the Qt offscreen platform.
+
+Generates a synthetic data file, then times startup, every load_* method,
+single toggles, add/edit/delete round-trips and save_data(). Results are
+written as JSON so runs can be compared:
+
+    python benchmarks/bench_app.py --output before.json
+    python benchmarks/bench_app.py --output after.json --compare before.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QDialog, QMessageBox
+
+import project
+import storage
+from generate_data import DEFAULT_COUNTS, add_count_arguments, generate_dataset
+from storage import data, write_data
+
+# Slowdown (ratio to the baseline median) reported as a regression
+REGRESSION_THRESHOLD = 1.2
+
+
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "runs": len(samples),
+    }
+
+
+def wait_for_loading(app, window):
+    while storage.loading or window.loading_timer.isActive():
+        app.processEvents()
+
+
+def bench_startup(app, path):
+    """Time to first window and to a fully loaded window, as in main()."""
+    start = time.perf_counter()
+    loader = storage.stream_load_data(path)
+    current = project.load_first_screenful(loader)
+    window = project.MainApp()
+    window.show()
+    app.processEvents()
+    first_window = time.perf_counter() - start
+
+    window.continue_loading(loader, current)
+    wait_for_loading(app, window)
+    fully_loaded = time.perf_counter() - start
+    return window, first_window, fully_loaded
+
+
+def round_trips(window):
+    """(name, add, edit, delete) callables for every editable collection."""
+    todo_tab = window.todo_tab
+    finance_tab = window.finance_tab
+    bills_tab = window.bills_tab
+
+    def add_todo():
+        todo_tab.task_input.setText("Benchmark task")
+        todo_tab.due_date_input.setText("2030-01-01")
+        todo_tab.add_todo()
+
+    def last(name):
+        return len(data[name]) - 1
+
+    return [
+        (
+            "todo",
+            add_todo,
+            lambda: todo_tab.save_todo_edit(
+                last("todos"), "Edited", "", "In Progress", "2030-01-02", QDialog()
+            ),
+            lambda: todo_tab.delete_todo(last("todos")),
+        ),
+        (
+            "credit_card",
+            lambda: finance_tab.add_credit_card_from_dialog(
+                "Bench", "Card", "5000", "100", "25", "2030-01-01", QDialog()
+            ),
+            lambda: finance_tab.save_credit_card_edit(
+                last("credit_cards"),
+                "Bench",
+                "Card",
+                "6000",
+                "200",
+                "30",
+                "2030-01-01",
+                QDialog(),
+            ),
+            lambda: finance_tab.delete_credit_card(last("credit_cards")),
+        ),
+        (
+            "property",
+            lambda: finance_tab.add_property_from_dialog(
+                "1 Bench St", "300000", "100000", QDialog()
+            ),
+            lambda: finance_tab.save_property_edit(
+                last("properties"), "1 Bench St", "310000", "90000", QDialog()
+            ),
+            lambda: finance_tab.delete_property(last("properties")),
+        ),
+        (
+            "account",
+            lambda: finance_tab.add_account_from_dialog(
+                "Bench", "Checking", "Bank", "1000", QDialog()
+            ),
+            lambda: finance_tab.save_account_edit(
+                last("accounts"), "Bench", "Savings", "Bank", "2000", QDialog()
+            ),
+            lambda: finance_tab.delete_account(last("accounts")),
+        ),
+        (
+            "bill",
+            lambda: bills_tab.add_bill_from_dialog(
+                "Bench", "50", "2030-01-01", QDialog()
+            ),
+            lambda: bills_tab.save_bill_edit(
+                last("bills"), "Bench", "60", "2030-01-01", QDialog()
+            ),
+            lambda: bills_tab.delete_bill(last("bills")),
+        ),
+    ]
+
+
+def run(counts, repeat, seed):
+    app = QApplication.instance() or QApplication([])
+    # Delete confirmations would block; answer them automatically
+    QMessageBox.question = staticmethod(lambda *args: QMessageBox.Yes)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.json")
+        write_data(generate_dataset(seed, **counts), path)
+
+        window, first_window, fully_loaded = bench_startup(app, path)
+        results["startup.first_window"] = {"median": first_window, "runs": 1}
+        results["startup.fully_loaded"] = {"median": fully_loaded, "runs": 1}
+
+        for name, func in [
+            ("load_categories", window.todo_tab.load_categories),
+            ("load_todos", window.todo_tab.load_todos),
+            ("load_credit_cards", window.finance_tab.load_credit_cards),
+            ("load_properties", window.finance_tab.load_properties),
+            ("load_accounts", window.finance_tab.load_accounts),
+            ("load_bills", window.bills_tab.load_bills),
+            ("save_data", storage.save_data),
+        ]:
+            results[name] = measure(func, repeat)
+
+        if data["todos"]:
+            flip = iter([Qt.Checked, Qt.Unchecked] * repeat)
+            results["toggle_completed"] = measure(
+                lambda: window.todo_tab.toggle_completed(0, next(flip)), repeat
+            )
+        if data["bills"]:
+            flip = iter([Qt.Checked, Qt.Unchecked] * repeat)
+            results["toggle_paid"] = measure(
+                lambda: window.bills_tab.toggle_paid(0, next(flip)), repeat
+            )
+
+        for name, add, edit, delete in round_trips(window):
+            results[f"add_{name}"] = measure(add, repeat)
+            results[f"edit_{name}"] = measure(edit, repeat)
+            # Put back the records deleted below so every run sees the same size
+            for _ in range(repeat):
+                add()
+            results[f"delete_{name}"] = measure(delete, repeat)
+
+        window.close()
+    return results
+
+
+def compare(results, baseline):
+    """Print each timing against the baseline and return the regressions."""
+    regressions = []
+    print(f"{'benchmark':<28}{'baseline ms':>14}{'now ms':>12}{'ratio':>8}")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None or not before["median"]:
+            continue
+        ratio = result["median"] / before["median"]
+        flag = ""
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append(name)
+            flag = "  <- slower"
+        print(
+            f"{name:<28}{before['median'] * 1000:>14.2f}"
+            f"{result['median'] * 1000:>12.2f}{ratio:>8.2f}{flag}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file")
+    add_count_arguments(parser)
+    args = parser.parse_args(argv)
+
+    counts = {name: getattr(args, name) for name in DEFAULT_COUNTS}
+    results = run(counts, args.repeat, args.seed)
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "counts": counts,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    else:
+        for name, result in results.items():
+            print(f"{name:<28}{result['median'] * 1000:>12.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Compare save/load speed and file size of the data file formats.
+
+Usage: python benchmarks/bench_storage.py [RECORDS ...]
+(defaults to 10k, 100k and 1M records)
+
+The encrypted case runs when the cryptography package is installed. Its
+key is derived once before the runs, as it is once per session in the
+app; the one-time cost of the key derivation is printed separately.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import encryption
+from generate_data import generate_dataset
+from storage import iter_records, read_data, write_data
+
+CASES = [
+    ("json", "json", 0),
+    ("snapshot (raw)", "snapshot", 0),
+    ("snapshot (zlib 1)", "snapshot", 1),
+    ("snapshot (zlib 6)", "snapshot", 6),
+]
+if encryption.available():
+    CASES.append(("encrypted (zlib 6)", "encrypted", 6))
+
+
+def make_data(records):
+    """Build a data dict with `records` records split between todos and bills."""
+    todos = records // 2
+    return generate_dataset(todos=todos, bills=records - todos)
+
+
+def bench(records, directory):
+    obj = make_data(records)
+    rows = []
+    for label, fmt, level in CASES:
+        path = os.path.join(directory, f"bench_{records}_{fmt}_{level}")
+        start = time.perf_counter()
+        write_data(obj, path, fmt, level)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        read_data(path)
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in iter_records(path):
+            pass
+        stream_time = time.perf_counter() - start
+        rows.append((label, save_time, load_time, stream_time, os.path.getsize(path)))
+        os.remove(path)
+    return rows
+
+
+def warm_key(directory):
+    """Derive the benchmark's key up front; returns the time it took."""
+    encryption.passphrase = "benchmark passphrase"
+    start = time.perf_counter()
+    write_data({}, os.path.join(directory, "warm"), "encrypted")
+    return time.perf_counter() - start
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or [10_000, 100_000, 1_000_000]
+    with tempfile.TemporaryDirectory() as directory:
+        if encryption.available():
+            print(f"key derivation (once per session): {warm_key(directory):.3f} s")
+        else:
+            print("cryptography is not installed; skipping the encrypted case")
+        for records in sizes:
+            print(f"\n{records:,} records")
+            print(
+                f"{'format':<20}{'save (s)':>10}{'load (s)':>10}"
+                f"{'stream (s)':>12}{'size (MB)':>12}"
+            )
+            for label, save_time, load_time, stream_time, size in bench(
+                records, directory
+            ):
+                print(
+                    f"{label:<20}{save_time:>10.3f}{load_time:>10.3f}"
+                    f"{stream_time:>12.3f}{size / 1_000_000:>12.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
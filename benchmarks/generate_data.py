@@ -0,0 +1,141 @@
+"""Generate synthetic data files for benchmarking.
+
+Usage: python benchmarks/generate_data.py OUTPUT [--todos N] [--bills N] ...
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schema
+from storage import FORMATS, write_data
+
+DEFAULT_COUNTS = {
+    "todos": 1000,
+    "categories": 20,
+    "credit_cards": 50,
+    "properties": 20,
+    "accounts": 30,
+    "bills": 500,
+}
+
+STATUSES = ["Not Started", "In Progress", "On Hold", "Completed"]
+ACCOUNT_TYPES = ["Checking", "Savings", "Retirement", "Investment", "Business"]
+OWNERS = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie"]
+START_DATE = datetime.date(2024, 1, 1)
+
+
+def random_date(rng, days=730):
+    return (START_DATE + datetime.timedelta(days=rng.randrange(days))).isoformat()
+
+
+def generate_dataset(seed=0, **counts):
+    """Return a data dict with the given number of records per collection."""
+    counts = {**DEFAULT_COUNTS, **counts}
+    rng = random.Random(seed)
+
+    categories = [
+        {"name": f"Category {i}", "color": f"#{rng.randrange(0x1000000):06X}"}
+        for i in range(counts["categories"])
+    ]
+    category_names = [cat["name"] for cat in categories] or [""]
+
+    todos = []
+    for i in range(counts["todos"]):
+        status = rng.choice(STATUSES)
+        todos.append(
+            {
+                "task": f"Task {i}",
+                "category": rng.choice(category_names),
+                "status": status,
+                "due_date": random_date(rng) if rng.random() < 0.8 else "",
+                "completed": status == "Completed",
+            }
+        )
+
+    credit_cards = []
+    for i in range(counts["credit_cards"]):
+        limit = float(rng.randrange(1000, 30000, 500))
+        balance = round(rng.uniform(0, limit), 2)
+        credit_cards.append(
+            {
+                "owner": rng.choice(OWNERS),
+                "card_name": f"Card {i}",
+                "limit": limit,
+                "balance": balance,
+                "payment": round(max(25.0, balance * 0.02), 2),
+                "due_date": random_date(rng),
+                "apr": round(rng.uniform(0, 30), 2),
+            }
+        )
+
+    properties = []
+    for i in range(counts["properties"]):
+        value = float(rng.randrange(150000, 900000, 1000))
+        properties.append(
+            {
+                "address": f"{rng.randrange(1, 9999)} Main St #{i}",
+                "value": value,
+                "loan": float(rng.randrange(0, int(value), 1000)),
+            }
+        )
+
+    accounts = [
+        {
+            "name": f"{rng.choice(OWNERS)} {i}",
+            "type": rng.choice(ACCOUNT_TYPES),
+            "institution": f"Bank {rng.randrange(10)}",
+            "balance": round(rng.uniform(0, 50000), 2),
+        }
+        for i in range(counts["accounts"])
+    ]
+
+    bills = [
+        {
+            "name": f"Bill {i}",
+            "amount": round(rng.uniform(10, 2500), 2),
+            "due_date": random_date(rng),
+            "paid": rng.random() < 0.5,
+        }
+        for i in range(counts["bills"])
+    ]
+
+    return {
+        schema.VERSION_KEY: schema.SCHEMA_VERSION,
+        "todos": todos,
+        "credit_cards": credit_cards,
+        "categories": categories,
+        "properties": properties,
+        "accounts": accounts,
+        "bills": bills,
+    }
+
+
+def add_count_arguments(parser):
+    for name, default in DEFAULT_COUNTS.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            dest=name,
+            type=int,
+            default=default,
+            help=f"number of {name.replace('_', ' ')} (default {default})",
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="data file to write")
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--seed", type=int, default=0)
+    add_count_arguments(parser)
+    args = parser.parse_args(argv)
+
+    counts = {name: getattr(args, name) for name in DEFAULT_COUNTS}
+    write_data(generate_dataset(args.seed, **counts), args.output, args.format)
+
+
+if __name__ == "__main__":
+    main()
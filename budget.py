@@ -0,0 +1,139 @@
+"""Monthly budgets per spending category.
+
+Budgets live in data["budgets"] as {"category", "limit"} records and use
+the same categories (and colours) as the To-Do tab. Spending comes from
+bills (by due month) and from ledger transactions that carry a
+"category": account withdrawals and card charges count as spending,
+deposits and card payments as refunds.
+
+Actuals are kept in per-(category, month) accumulators. Bills report
+their changes through bill_added()/bill_removed() and new transactions
+are picked up incrementally, so reading a month costs one dict lookup
+per budget no matter how long the history is. Bills moved to the
+archive still count, through the totals kept in data["archived_totals"].
+"""
+from collections import defaultdict
+
+from schema import ARCHIVED_TOTALS_KEY
+from storage import data
+
+UNCATEGORIZED = ""
+
+
+def category_names():
+    return [cat["name"] for cat in data["categories"]]
+
+
+def category_colors():
+    """Map of category name to colour, as shown in the To-Do tab."""
+    colors = {}
+    for cat in data["categories"]:
+        colors.setdefault(cat["name"], cat["color"])
+    return colors
+
+
+def month_of(date):
+    """Return the YYYY-MM month of an ISO date, or None if there is none."""
+    if len(date) >= 7 and date[4] == "-":
+        return date[:7]
+    return None
+
+
+def find_budget(category):
+    for budget in data.setdefault("budgets", []):
+        if budget["category"] == category:
+            return budget
+    return None
+
+
+def set_budget(category, limit):
+    """Create or update the monthly limit of a category; 0 removes it."""
+    budget = find_budget(category)
+    if not limit:
+        if budget is not None:
+            data["budgets"].remove(budget)
+        return
+    if budget is None:
+        data["budgets"].append({"category": category, "limit": limit})
+    else:
+        budget["limit"] = limit
+
+
+class BudgetRollup:
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.bills = None
+        self.transactions = None
+        self.indexed = 0
+        self.card_ids = set()
+
+    def sync(self):
+        """Rebuild after a reload; otherwise add transactions appended since."""
+        bills = data.setdefault("bills", [])
+        transactions = data.setdefault("transactions", [])
+        if (
+            bills is not self.bills
+            or transactions is not self.transactions
+            or len(transactions) < self.indexed
+        ):
+            self.totals.clear()
+            self.bills = bills
+            self.transactions = transactions
+            self.indexed = 0
+            for bill in bills:
+                self._add_bill(bill, 1)
+            for month, spent in data.get(ARCHIVED_TOTALS_KEY, {}).items():
+                for category, amount in spent.items():
+                    key = (category, month)
+                    self.totals[key] = round(self.totals[key] + amount, 2)
+
+        if self.indexed < len(transactions):
+            self.card_ids = {card.get("id") for card in data["credit_cards"]}
+            for entry in transactions[self.indexed :]:
+                self._add_transaction(entry)
+            self.indexed = len(transactions)
+
+    def bill_added(self, bill):
+        if self.bills is data.get("bills"):
+            self._add_bill(bill, 1)
+
+    def bill_removed(self, bill):
+        if self.bills is data.get("bills"):
+            self._add_bill(bill, -1)
+
+    def actual(self, category, month):
+        self.sync()
+        return self.totals.get((category, month), 0.0)
+
+    def month_report(self, month):
+        """(category, limit, spent) for every budget in a "YYYY-MM" month."""
+        self.sync()
+        return [
+            (
+                budget["category"],
+                budget["limit"],
+                self.totals.get((budget["category"], month), 0.0),
+            )
+            for budget in data.setdefault("budgets", [])
+        ]
+
+    def _add_bill(self, bill, sign):
+        month = month_of(bill.get("due_date", ""))
+        if month:
+            key = (bill.get("category", UNCATEGORIZED), month)
+            self.totals[key] = round(self.totals[key] + sign * bill["amount"], 2)
+
+    def _add_transaction(self, entry):
+        category = entry.get("category")
+        month = month_of(entry["date"])
+        if not category or not month:
+            return
+        # Withdrawals are negative on accounts; charges are positive on cards
+        spent = entry["amount"]
+        if entry["account"] not in self.card_ids:
+            spent = -spent
+        key = (category, month)
+        self.totals[key] = round(self.totals[key] + spent, 2)
+
+
+rollup = BudgetRollup()
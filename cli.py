@@ -0,0 +1,384 @@
+"""Command line access to the data file, without the GUI.
+
+    python cli.py todo add "Pay rent" --category Home --due 2026-11-01
+    python cli.py bills list --overdue --format csv
+    python cli.py cards summary
+    python cli.py batch nightly.txt
+
+Commands that change the data run as one transaction: the data file is
+locked, read, changed and written once (see storage.locked()), so they
+are safe to run while the app is open; it reloads when the file changes.
+batch runs one command per line of a file (or of stdin) in a single
+transaction, and writes nothing if any of them fails.
+
+Results are printed as JSON, or as CSV with --format csv. PyQt5 is never
+imported, so a call costs little more than reading the data file.
+"""
+import argparse
+import csv
+import datetime
+import getpass
+import json
+import shlex
+import sys
+from contextlib import nullcontext
+
+import encryption
+import registry
+import schema
+import storage
+from storage import data
+
+FORMATS = ("json", "csv")
+STATUSES = ("Not Started", "In Progress", "On Hold", "Completed")
+
+# (group, action) -> (arguments, writes, func(args) -> rows)
+COMMANDS = {}
+
+
+def arg(*names, **options):
+    return names, options
+
+
+def command(group, action, *arguments, writes=False):
+    """Register func(args) -> list of rows as `cli.py group action`."""
+
+    def register(func):
+        COMMANDS[group, action] = (arguments, writes, func)
+        return func
+
+    return register
+
+
+def iso_date(text):
+    try:
+        return datetime.date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {text}")
+
+
+def today():
+    return datetime.date.today().isoformat()
+
+
+def find_category(name):
+    """The category called name, ignoring case; "" stays uncategorized."""
+    if not name:
+        return ""
+    for category in data["categories"]:
+        if category["name"].lower() == name.lower():
+            return category["name"]
+    raise ValueError(f"Unknown category: {name}")
+
+
+def find_by_name(collection, name, field="name"):
+    for record in data[collection]:
+        if record[field].lower() == name.lower():
+            return record
+    raise ValueError(f"No {collection[:-1].replace('_', ' ')} is called {name!r}")
+
+
+@command(
+    "todo",
+    "list",
+    arg("--open", action="store_true", help="only tasks not completed yet"),
+    arg("--overdue", action="store_true", help="only open tasks past their date"),
+    arg("--category", help="only tasks of this category"),
+)
+def todo_list(args):
+    """List tasks."""
+    todos = data["todos"]
+    if args.open or args.overdue:
+        todos = [todo for todo in todos if not todo["completed"]]
+    if args.overdue:
+        todos = [todo for todo in todos if "" < todo["due_date"] < today()]
+    if args.category is not None:
+        category = find_category(args.category)
+        todos = [todo for todo in todos if todo["category"] == category]
+    return todos
+
+
+@command(
+    "todo",
+    "add",
+    arg("task"),
+    arg("--category", default=""),
+    arg("--due", type=iso_date),
+    arg("--status", choices=STATUSES, default="Not Started"),
+    arg("--repeat", choices=("daily", "weekly", "monthly", "yearly")),
+    writes=True,
+)
+def todo_add(args):
+    """Add a task."""
+    todo = {
+        "task": args.task,
+        "category": find_category(args.category),
+        "status": args.status,
+        "due_date": args.due or "",
+        "completed": False,
+    }
+    if args.repeat:
+        todo["repeat"] = args.repeat
+    data["todos"].append(todo)
+    return [todo]
+
+
+@command("todo", "done", arg("task", help="name of an open task"), writes=True)
+def todo_done(args):
+    """Complete an open task; a recurring one moves to its next date."""
+    import archive
+    from taskgraph import complete_occurrence, task_graph
+
+    task_graph.rebuild()
+    todo = task_graph.find(args.task)
+    if task_graph.blocked(todo):
+        names = ", ".join(target["task"] for target in task_graph.blockers(todo))
+        raise ValueError(f"{todo['task']!r} is waiting for: {names}")
+    if todo.get("repeat"):
+        done = complete_occurrence(todo)
+        data["todos"].append(done)
+        return [done, todo]
+    todo["completed"] = True
+    archive.stamp("todos", todo)
+    return [todo]
+
+
+@command(
+    "bills",
+    "list",
+    arg("--unpaid", action="store_true", help="only bills not paid yet"),
+    arg("--overdue", action="store_true", help="only unpaid bills past due"),
+)
+def bills_list(args):
+    """List bills."""
+    bills = data["bills"]
+    if args.unpaid or args.overdue:
+        bills = [bill for bill in bills if not bill["paid"]]
+    if args.overdue:
+        bills = [bill for bill in bills if "" < bill["due_date"] < today()]
+    return bills
+
+
+@command(
+    "bills",
+    "add",
+    arg("name"),
+    arg("amount", type=float),
+    arg("--due", type=iso_date),
+    arg("--category", default=""),
+    writes=True,
+)
+def bills_add(args):
+    """Add an unpaid bill."""
+    bill = {
+        "name": args.name,
+        "amount": args.amount,
+        "due_date": args.due or "",
+        "paid": False,
+    }
+    category = find_category(args.category)
+    if category:
+        bill["category"] = category
+    data["bills"].append(bill)
+    return [bill]
+
+
+@command("bills", "pay", arg("name"), writes=True)
+def bills_pay(args):
+    """Pay the unpaid bill of that name that is due first."""
+    import archive
+
+    unpaid = [
+        bill
+        for bill in data["bills"]
+        if bill["name"].lower() == args.name.lower() and not bill["paid"]
+    ]
+    if not unpaid:
+        raise ValueError(f"No unpaid bill is called {args.name!r}")
+    # Bills without a due date come last
+    bill = min(unpaid, key=lambda bill: (not bill["due_date"], bill["due_date"]))
+    bill["paid"] = True
+    archive.stamp("bills", bill)
+    return [bill]
+
+
+@command("cards", "summary")
+def cards_summary(args):
+    """Balance, available credit and usage of each card."""
+    from ledger import ledger
+
+    rows = []
+    for card in data["credit_cards"]:
+        balance = ledger.balance(card)
+        rows.append(
+            {
+                "owner": card["owner"],
+                "card_name": card["card_name"],
+                "limit": card["limit"],
+                "balance": balance,
+                "available": round(card["limit"] - balance, 2),
+                "usage_pct": round(balance / card["limit"] * 100, 1)
+                if card["limit"]
+                else 0.0,
+                "payment": card["payment"],
+                "due_date": card["due_date"],
+                "apr": card["apr"],
+            }
+        )
+    return rows
+
+
+@command("accounts", "list")
+def accounts_list(args):
+    """Accounts with their balances."""
+    from ledger import ledger
+
+    return [
+        {
+            "name": account["name"],
+            "type": account["type"],
+            "institution": account["institution"],
+            "balance": ledger.balance(account),
+        }
+        for account in data["accounts"]
+    ]
+
+
+@command(
+    "accounts",
+    "set-balance",
+    arg("name"),
+    arg("balance", type=float),
+    arg("--date", type=iso_date, help="day of the balance (default: today)"),
+    writes=True,
+)
+def accounts_set_balance(args):
+    """Set the balance of an account, as its edit dialog does."""
+    from ledger import ledger
+
+    account = find_by_name("accounts", args.name)
+    # The difference goes into the ledger as an adjustment
+    ledger.set_balance(account, args.balance, args.date)
+    return [account]
+
+
+@command("data", "export", arg("collection", choices=schema.FIELDS))
+def data_export(args):
+    """Print every record of a collection."""
+    return data[args.collection]
+
+
+class LineParser(argparse.ArgumentParser):
+    """Parses a line of a batch, raising ValueError instead of exiting."""
+
+    def error(self, message):
+        raise ValueError(message)
+
+
+def global_options(default):
+    """--data and --format; the commands take them with no default too."""
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument(
+        "--data", default=default, help="data file (default: the app's data file)"
+    )
+    options.add_argument(
+        "--format", choices=FORMATS, default=default or "json", help="output format"
+    )
+    return options
+
+
+def add_commands(parser, parents=()):
+    groups = parser.add_subparsers(dest="group", required=True)
+    actions = {}
+    for (group, action), (arguments, _, func) in COMMANDS.items():
+        if group not in actions:
+            actions[group] = groups.add_parser(group).add_subparsers(
+                dest="action", required=True
+            )
+        sub = actions[group].add_parser(action, help=func.__doc__, parents=parents)
+        for names, options in arguments:
+            sub.add_argument(*names, **options)
+    return groups
+
+
+def parse_batch(lines):
+    """The parsed commands of a batch, one per non-empty line."""
+    parser = LineParser(prog="batch", add_help=False)
+    add_commands(parser)
+    commands = []
+    for number, line in enumerate(lines, 1):
+        try:
+            words = shlex.split(line, comments=True)
+            if words:
+                commands.append(parser.parse_args(words))
+        except ValueError as e:
+            raise ValueError(f"Line {number}: {e}") from None
+    return commands
+
+
+def write_rows(rows, fmt, out):
+    if fmt == "json":
+        json.dump(rows, out, indent=2)
+        out.write("\n")
+        return
+    fields = list(dict.fromkeys(field for row in rows for field in row))
+    writer = csv.DictWriter(out, fields, lineterminator="\n")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(
+            {
+                field: ";".join(value) if isinstance(value, list) else value
+                for field, value in row.items()
+            }
+        )
+
+
+def main(argv=None, out=None):
+    # Before the parsers, so data export knows the plugins' collections
+    registry.load_plugins()
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0], parents=[global_options(None)]
+    )
+    parents = [global_options(argparse.SUPPRESS)]
+    groups = add_commands(parser, parents)
+    batch = groups.add_parser(
+        "batch", help="run the commands of a file in one go", parents=parents
+    )
+    batch.add_argument("file", nargs="?", help="commands to run (default: stdin)")
+    args = parser.parse_args(argv)
+
+    path = args.data or storage.data_file
+    if storage.is_encrypted(path) and not encryption.passphrase:
+        encryption.passphrase = getpass.getpass("Passphrase: ")
+    if args.group == "batch":
+        if args.file:
+            with open(args.file, encoding="utf-8") as f:
+                commands = parse_batch(f)
+        else:
+            commands = parse_batch(sys.stdin)
+    else:
+        commands = [args]
+
+    writes = any(COMMANDS[c.group, c.action][1] for c in commands)
+    rows = []
+    # Held from the read to the write, so no other writer comes in between
+    with storage.locked(path) if writes else nullcontext():
+        storage.load_data(path)
+        for c in commands:
+            rows.extend(COMMANDS[c.group, c.action][2](c))
+        if writes:
+            storage.write_data(
+                data,
+                path,
+                storage.data_format or storage.loaded_format,
+                storage.compression_level,
+                check=True,
+            )
+    write_rows(rows, args.format, out or sys.stdout)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (OSError, ValueError) as e:
+        sys.exit(str(e))
@@ -0,0 +1,13 @@
+import pytest
+
+from storage import data, default_data
+
+
+@pytest.fixture
+def fresh_data(monkeypatch):
+    """The app's data as in a new data file, put back after the test."""
+    for key in list(data):
+        monkeypatch.delitem(data, key)
+    for key, value in default_data().items():
+        monkeypatch.setitem(data, key, value)
+    return data
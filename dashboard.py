@@ -0,0 +1,136 @@
+"""Pre-aggregated series behind the dashboard charts.
+
+Each series is a list of (label, value) points computed from a few
+collections. Series are cached until one of their collections is
+invalidated (the tabs do so whenever they reload a collection after an
+edit) or replaced by a reload, so an edit to a bill only recomputes the
+bills chart.
+
+downsample() reduces a long series to what fits in a chart's pixel
+width, keeping the lowest and highest point of each bucket so spikes
+survive.
+"""
+from collections import defaultdict
+
+from budget import category_names, month_of
+from ledger import ledger
+from mortgage import equity
+from storage import data
+
+SERIES = {}
+
+
+def series(*collections):
+    """Register a series computed from the given collections."""
+
+    def register(func):
+        SERIES[func.__name__] = (collections, func)
+        return func
+
+    return register
+
+
+@series("credit_cards", "transactions")
+def credit_usage_by_owner():
+    """Credit usage (%) per card owner."""
+    balances = defaultdict(float)
+    limits = defaultdict(float)
+    for card in data["credit_cards"]:
+        balances[card["owner"]] += ledger.balance(card)
+        limits[card["owner"]] += card["limit"]
+    return [
+        (owner, (balances[owner] / limits[owner] * 100) if limits[owner] else 0.0)
+        for owner in sorted(balances)
+    ]
+
+
+@series("properties")
+def equity_by_property():
+    return [(prop["address"], equity(prop)[0]) for prop in data["properties"]]
+
+
+@series("bills")
+def unpaid_bills_by_month():
+    """Total of unpaid bills per due month, with empty months filled in."""
+    totals = defaultdict(float)
+    for bill in data["bills"]:
+        month = month_of(bill["due_date"]) if not bill["paid"] else None
+        if month:
+            totals[month] += bill["amount"]
+    if not totals:
+        return []
+
+    points = []
+    year, month = map(int, min(totals).split("-"))
+    last = max(totals)
+    while True:
+        key = f"{year:04d}-{month:02d}"
+        points.append((key, round(totals.get(key, 0.0), 2)))
+        if key >= last:
+            return points
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+@series("todos", "categories")
+def todo_completion_by_category():
+    """Completed todos (%) per category, in category order."""
+    done = defaultdict(int)
+    total = defaultdict(int)
+    for todo in data["todos"]:
+        total[todo["category"]] += 1
+        done[todo["category"]] += todo["completed"]
+    names = [name for name in category_names() if total.get(name)]
+    names += sorted(name for name in total if name not in names)
+    return [(name, done[name] / total[name] * 100) for name in names]
+
+
+def downsample(points, width):
+    """At most width points, keeping each bucket's lowest and highest."""
+    if width <= 0 or len(points) <= width:
+        return list(points)
+    buckets = max(width // 2, 1)
+    size = len(points) / buckets
+    result = []
+    for bucket in range(buckets):
+        indices = range(int(bucket * size), int((bucket + 1) * size))
+        if not indices:
+            continue
+        low = min(indices, key=lambda i: points[i][1])
+        high = max(indices, key=lambda i: points[i][1])
+        # Keep them in their original order
+        result.extend(points[i] for i in sorted({low, high}))
+    return result
+
+
+class SeriesCache:
+    def __init__(self):
+        self.values = {}
+        self.sources = {}
+        self.samples = {}
+
+    def invalidate(self, *collections):
+        """Forget every series computed from one of the collections."""
+        for name, (depends, _) in SERIES.items():
+            if set(depends) & set(collections):
+                self.values.pop(name, None)
+
+    def get(self, name):
+        depends, compute = SERIES[name]
+        # A reload replaces the lists, which invalidates everything built on them
+        sources = tuple(id(data.get(collection)) for collection in depends)
+        if name not in self.values or self.sources.get(name) != sources:
+            self.values[name] = compute()
+            self.sources[name] = sources
+        return self.values[name]
+
+    def sampled(self, name, width):
+        """The series downsampled to width, cached until either changes."""
+        points = self.get(name)
+        cached = self.samples.get(name)
+        if cached is None or cached[0] is not points or cached[1] != width:
+            cached = (points, width, downsample(points, width))
+            self.samples[name] = cached
+        return cached[2]
+
+
+charts = SeriesCache()
@@ -0,0 +1,183 @@
+"""Passphrase encryption of the data file.
+
+An encrypted file is a header followed by the payload in chunks of
+CHUNK_SIZE bytes, each sealed on its own with AES-256-GCM:
+
+    MAGIC | version | log2(n) r p | salt (16) | nonce prefix (8) | chunk size (4)
+    sealed chunk 0 | sealed chunk 1 | ... | sealed last chunk
+
+Chunk i uses the nonce prefix followed by i as its nonce and the header
+plus a last-chunk flag as associated data, so chunks cannot be dropped,
+reordered or cut off without the file failing to decrypt. Saving and
+loading go through the payload one chunk at a time.
+
+The key is derived from the passphrase with scrypt. That is slow on
+purpose, so keys are cached for the session and saves keep the salt of
+the file that was loaded: only the first load or save pays for it.
+
+AES-GCM comes from the optional cryptography package.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+MAGIC = b"FFCRYPT"
+VERSION = 1
+CHUNK_SIZE = 64 * 1024
+TAG_SIZE = 16
+SALT_SIZE = 16
+NONCE_PREFIX_SIZE = 8
+HEADER_SIZE = len(MAGIC) + 4 + SALT_SIZE + NONCE_PREFIX_SIZE + 4
+
+# scrypt cost: 2**16 * 8 * 128 bytes = 64 MiB and a fraction of a second
+SCRYPT_LOG2_N = 16
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# Passphrase for this session; set from the GUI prompt or the environment
+passphrase = os.environ.get("FINANCE_PASSPHRASE") or None
+
+# Salt and scrypt parameters to reuse per passphrase, so the cached key fits
+_salts = {}
+
+
+def available():
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _aesgcm(key):
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        raise ValueError(
+            "Encrypted data files need the cryptography package "
+            "(pip install cryptography)"
+        ) from None
+    return AESGCM(key)
+
+
+@lru_cache(maxsize=8)
+def derive_key(secret, salt, log2_n=SCRYPT_LOG2_N, r=SCRYPT_R, p=SCRYPT_P):
+    n = 1 << log2_n
+    return hashlib.scrypt(
+        secret.encode("utf-8"),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * n * r + (1 << 20),
+        dklen=32,
+    )
+
+
+def require_passphrase(secret=None):
+    """secret, or the session's passphrase; raises ValueError if neither."""
+    secret = secret if secret is not None else passphrase
+    if not secret:
+        raise ValueError("This data file is encrypted; a passphrase is needed")
+    return secret
+
+
+def _nonce(prefix, counter):
+    return prefix + counter.to_bytes(4, "big")
+
+
+def _associated_data(header, last):
+    return header + (b"\x01" if last else b"\x00")
+
+
+def encrypt(chunks, secret=None, chunk_size=CHUNK_SIZE):
+    """Yield the encrypted file for an iterable of plaintext byte strings."""
+    secret = require_passphrase(secret)
+    if secret not in _salts:
+        _salts[secret] = (os.urandom(SALT_SIZE), SCRYPT_LOG2_N, SCRYPT_R, SCRYPT_P)
+    salt, log2_n, r, p = _salts[secret]
+    # A fresh nonce prefix per file; the counter makes it unique per chunk
+    prefix = os.urandom(NONCE_PREFIX_SIZE)
+    header = (
+        MAGIC
+        + bytes([VERSION, log2_n, r, p])
+        + salt
+        + prefix
+        + chunk_size.to_bytes(4, "big")
+    )
+    aead = _aesgcm(derive_key(secret, salt, log2_n, r, p))
+    yield header
+
+    counter = 0
+    buf = bytearray()
+    for piece in chunks:
+        buf += piece
+        # Keep at least one byte back: only the last chunk may be short
+        while len(buf) > chunk_size:
+            chunk = bytes(buf[:chunk_size])
+            del buf[:chunk_size]
+            yield aead.encrypt(
+                _nonce(prefix, counter), chunk, _associated_data(header, False)
+            )
+            counter += 1
+    yield aead.encrypt(
+        _nonce(prefix, counter), bytes(buf), _associated_data(header, True)
+    )
+
+
+def read_header(f):
+    """Parse the header of an open encrypted file; returns its fields."""
+    header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+        raise ValueError("Not an encrypted data file")
+    pos = len(MAGIC)
+    version, log2_n, r, p = header[pos : pos + 4]
+    if version != VERSION:
+        raise ValueError(f"Unsupported encrypted file version: {version}")
+    pos += 4
+    salt = header[pos : pos + SALT_SIZE]
+    pos += SALT_SIZE
+    prefix = header[pos : pos + NONCE_PREFIX_SIZE]
+    pos += NONCE_PREFIX_SIZE
+    chunk_size = int.from_bytes(header[pos : pos + 4], "big")
+    return header, salt, (log2_n, r, p), prefix, chunk_size
+
+
+def decrypt(f, secret=None):
+    """Yield the plaintext of an open encrypted file, chunk by chunk."""
+    secret = require_passphrase(secret)
+    header, salt, params, prefix, chunk_size = read_header(f)
+    aead = _aesgcm(derive_key(secret, salt, *params))
+    from cryptography.exceptions import InvalidTag
+
+    counter = 0
+    sealed = f.read(chunk_size + TAG_SIZE)
+    while True:
+        following = f.read(chunk_size + TAG_SIZE) if sealed else b""
+        last = not following
+        try:
+            plain = aead.decrypt(
+                _nonce(prefix, counter), sealed, _associated_data(header, last)
+            )
+        except InvalidTag:
+            if counter == 0:
+                raise ValueError("Wrong passphrase or damaged data file") from None
+            raise ValueError("The data file is damaged") from None
+        if counter == 0:
+            # Later saves reuse this salt, and with it the cached key
+            _salts[secret] = (salt, *params)
+        yield plain
+        if last:
+            return
+        sealed = following
+        counter += 1
+
+
+def check_passphrase(path, secret):
+    """True if secret opens the encrypted file at path."""
+    with open(path, "rb") as f:
+        try:
+            next(decrypt(f, secret))
+        except ValueError:
+            return False
+    return True
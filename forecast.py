@@ -0,0 +1,189 @@
+"""Day-by-day cash-flow forecast for the liquid accounts.
+
+The forecast starts from today's balance of the checking and savings
+accounts and subtracts, on their due dates:
+
+- unpaid bills (overdue ones on the first day),
+- the minimum payment of every card with a balance, monthly on the day
+  of its due date, until the card is paid off,
+- the monthly payment of every property with loan terms.
+
+Each card and property contributes a sorted event stream, cached on the
+inputs it depends on, so recomputing after an edit only regenerates the
+streams of what changed. The streams are merged lazily with a heap and
+walked once to produce the daily series.
+"""
+import calendar
+import datetime
+import heapq
+from collections import namedtuple
+from functools import lru_cache
+from operator import itemgetter
+
+from ledger import ledger
+from mortgage import amortize, has_terms, terms
+from storage import data
+
+LIQUID_TYPES = ("Checking", "Savings")
+DEFAULT_DAYS = 90
+
+# One dated change of the liquid balance
+Event = namedtuple("Event", ["date", "amount", "label"])
+
+Forecast = namedtuple(
+    "Forecast",
+    [
+        "opening",  # liquid balance at the start
+        "days",  # per day: (date, balance at the end of that day)
+        "events",  # (Event, balance after it), in date order
+        "low_days",  # days ending below the threshold
+        "lowest",  # (date, balance) of the lowest day
+    ],
+)
+
+
+def parse_date(text):
+    try:
+        return datetime.date.fromisoformat(text.strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+def due_day(text):
+    """Day of the month of a due date given as YYYY-MM-DD or as a day number."""
+    date = parse_date(text)
+    if date is not None:
+        return date.day
+    try:
+        day = int(text)
+    except (TypeError, ValueError):
+        return None
+    return day if 1 <= day <= 31 else None
+
+
+def add_months(date, months, day):
+    """The given day of the month months after date's month, clamped."""
+    month = date.month - 1 + months
+    year = date.year + month // 12
+    month = month % 12 + 1
+    return datetime.date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def monthly(day, first, last):
+    """Dates on a day of the month from first to last, inclusive."""
+    date = add_months(first, 0, day)
+    months = 0
+    if date < first:
+        months = 1
+        date = add_months(first, 1, day)
+    while date <= last:
+        yield date
+        months += 1
+        date = add_months(first, months, day)
+
+
+def liquid_balance(accounts=None):
+    accounts = data["accounts"] if accounts is None else accounts
+    return round(
+        sum(ledger.balance(acc) for acc in accounts if acc["type"] in LIQUID_TYPES),
+        2,
+    )
+
+
+def bill_events(bills, first, last):
+    """Unpaid bills due up to last; overdue bills fall on the first day."""
+    events = []
+    for bill in bills:
+        if bill["paid"]:
+            continue
+        date = parse_date(bill["due_date"])
+        if date is None or date > last:
+            continue
+        events.append(Event(max(date, first), -bill["amount"], bill["name"]))
+    events.sort(key=itemgetter(0))
+    return events
+
+
+@lru_cache(maxsize=1024)
+def card_payments(label, balance, apr, payment, day, first, last):
+    """Monthly minimum payments of one card until it is paid off."""
+    events = []
+    rate = apr / 1200
+    for date in monthly(day, first, last):
+        if balance <= 0 or payment <= 0:
+            break
+        paid = round(min(payment, balance), 2)
+        events.append(Event(date, -paid, f"{label} payment"))
+        balance = round((balance - paid) * (1 + rate), 2)
+    return tuple(events)
+
+
+@lru_cache(maxsize=1024)
+def mortgage_payments(label, loan_terms, start, first, last):
+    """Monthly payments of one amortized loan between first and last."""
+    plan = amortize(*loan_terms)
+    events = []
+    growth = 1 + loan_terms[1] / 1200
+    previous = loan_terms[0]
+    for month, balance in enumerate(plan.balances, 1):
+        date = add_months(start, month, start.day)
+        if date > last:
+            break
+        paid = round(previous * growth - balance, 2)
+        previous = balance
+        if date >= first:
+            events.append(Event(date, -paid, f"{label} mortgage"))
+    return tuple(events)
+
+
+def event_streams(first, last):
+    """One sorted event stream per source."""
+    streams = [bill_events(data["bills"], first, last)]
+    for card in data["credit_cards"]:
+        day = due_day(card.get("due_date", ""))
+        if day is None:
+            continue
+        streams.append(
+            card_payments(
+                card["card_name"],
+                round(ledger.balance(card), 2),
+                float(card.get("apr", 0.0)),
+                float(card["payment"]),
+                day,
+                first,
+                last,
+            )
+        )
+    for prop in data["properties"]:
+        start = parse_date(prop.get("start_date", ""))
+        if has_terms(prop) and start is not None:
+            streams.append(
+                mortgage_payments(prop["address"], terms(prop), start, first, last)
+            )
+    return streams
+
+
+def forecast(start=None, days=DEFAULT_DAYS, threshold=0.0):
+    """Project the liquid balance for days days from start (today)."""
+    first = start or datetime.date.today()
+    last = first + datetime.timedelta(days=days - 1)
+    opening = liquid_balance()
+
+    events = heapq.merge(*event_streams(first, last), key=itemgetter(0))
+    upcoming = next(events, None)
+    balance = opening
+    series, applied, low_days = [], [], []
+    lowest = None
+    for offset in range(days):
+        day = first + datetime.timedelta(days=offset)
+        while upcoming is not None and upcoming.date <= day:
+            balance = round(balance + upcoming.amount, 2)
+            applied.append((upcoming, balance))
+            upcoming = next(events, None)
+        series.append((day, balance))
+        if balance < threshold:
+            low_days.append((day, balance))
+        if lowest is None or balance < lowest[1]:
+            lowest = (day, balance)
+
+    return Forecast(opening, series, applied, low_days, lowest)
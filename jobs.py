@@ -0,0 +1,266 @@
+"""Background jobs on a thread pool, with results delivered to the GUI.
+
+    queue = JobQueue()
+    queue.submit(compute, args, key="payoff", on_result=show)
+
+on_result, on_error and on_progress are called on the thread that owns
+the queue (the GUI thread), through queued signals. Jobs can be given a
+priority, and jobs with the same key are coalesced: a new job replaces
+one with its key that has not started yet, and waits for one that is
+running, so there is never more than one of them running and one
+waiting. Cancelled jobs never deliver a result; long jobs can poll
+cancelled() or call check_cancelled() to stop early.
+
+MainThread goes the other way: it runs functions on the GUI thread for
+other threads, such as the API server's.
+
+StallGuard watches the GUI thread itself and logs whenever the event
+loop was blocked for longer than a threshold.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from PyQt5.QtCore import (
+    QCoreApplication,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    QTimer,
+    pyqtSignal,
+)
+
+import perf
+
+LOW, NORMAL, HIGH = -1, 0, 1
+# Event loop delays longer than this are logged as stalls
+STALL_THRESHOLD_MS = int(os.environ.get("FINANCE_STALL_MS", "250"))
+
+log = logging.getLogger(__name__)
+_current = threading.local()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def cancelled():
+    """True if the job running on this thread has been cancelled."""
+    job = getattr(_current, "job", None)
+    return job is not None and job.is_cancelled
+
+
+def check_cancelled():
+    if cancelled():
+        raise JobCancelled()
+
+
+def report_progress(done, total):
+    """Progress callback for functions running as a job.
+
+    Delivers (done, total) to the job's on_progress and stops the job
+    with JobCancelled once it has been cancelled.
+    """
+    job = getattr(_current, "job", None)
+    if job is not None:
+        job.report_progress(done, total)
+
+
+class JobSignals(QObject):
+    done = pyqtSignal(object, object, object)  # job, result, exception
+    progress = pyqtSignal(object, int, int)  # job, done, total
+
+
+class Job(QRunnable):
+    def __init__(self, signals, fn, args, kwargs, key, priority):
+        super().__init__()
+        # The queue keeps jobs alive until their result is delivered
+        self.setAutoDelete(False)
+        self.signals = signals
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.priority = priority
+        self.is_cancelled = False
+        self.on_result = None
+        self.on_error = None
+        self.on_progress = None
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def report_progress(self, done, total):
+        """Progress callback for the job's function; stops it once cancelled."""
+        check_cancelled()
+        self.signals.progress.emit(self, done, total)
+
+    def run(self):
+        result = error = None
+        _current.job = self
+        try:
+            check_cancelled()
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            error = e
+        finally:
+            _current.job = None
+            self.signals.done.emit(self, result, error)
+
+
+class JobQueue:
+    def __init__(self, max_threads=None):
+        self.pool = QThreadPool()
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self.signals = JobSignals()
+        self.signals.done.connect(self._done)
+        self.signals.progress.connect(self._progress)
+        self.active = set()  # jobs whose result has not been delivered
+        self.running = {}  # key -> job in the pool
+        self.waiting = {}  # key -> job waiting for the running one
+
+    def submit(
+        self,
+        fn,
+        *args,
+        key=None,
+        priority=NORMAL,
+        on_result=None,
+        on_error=None,
+        on_progress=None,
+        **kwargs,
+    ):
+        """Run fn(*args, **kwargs) in the pool; returns the Job."""
+        job = Job(self.signals, fn, args, kwargs, key, priority)
+        job.on_result = on_result
+        job.on_error = on_error
+        job.on_progress = on_progress
+        self.active.add(job)
+
+        if key is not None:
+            # The new job supersedes one waiting with its key; a running
+            # one finishes, so a failed save still reports its error
+            if key in self.waiting:
+                self.cancel(self.waiting[key])
+            if key in self.running:
+                # Already started: wait for it rather than run side by side
+                self.waiting[key] = job
+                return job
+            self.running[key] = job
+        self.pool.start(job, priority)
+        return job
+
+    def cancel(self, job):
+        """Cancel a job; it stops early if it polls cancelled()."""
+        job.cancel()
+        if job.key is not None and self.waiting.get(job.key) is job:
+            del self.waiting[job.key]
+            self.active.discard(job)
+        elif self.pool.tryTake(job):
+            # Never started, so it will not report back
+            self.active.discard(job)
+            self._release(job)
+
+    def cancel_all(self):
+        for job in list(self.active):
+            self.cancel(job)
+
+    def wait(self, timeout=None):
+        """Run until every job has delivered its result; False on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self.active:
+            self.pool.waitForDone(10)
+            QCoreApplication.processEvents()
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+        return True
+
+    def _release(self, job):
+        """Start the job waiting on the same key, if any."""
+        if job.key is None or self.running.get(job.key) is not job:
+            return
+        del self.running[job.key]
+        waiting = self.waiting.pop(job.key, None)
+        if waiting is not None:
+            self.running[job.key] = waiting
+            self.pool.start(waiting, waiting.priority)
+
+    def _done(self, job, result, error):
+        self.active.discard(job)
+        self._release(job)
+        if isinstance(error, JobCancelled):
+            return
+        if error is not None:
+            # Reported even when cancelled: the job did not stop by choice
+            if job.on_error:
+                job.on_error(error)
+            else:
+                log.error(
+                    "Background job %s failed",
+                    getattr(job.fn, "__qualname__", job.fn),
+                    exc_info=error,
+                )
+        elif job.on_result and not job.is_cancelled:
+            job.on_result(result)
+
+    def _progress(self, job, done, total):
+        if job.on_progress and not job.is_cancelled:
+            job.on_progress(done, total)
+
+
+class MainThread(QObject):
+    """Runs functions on the thread that created it, usually the GUI's."""
+
+    requested = pyqtSignal(object, object)  # fn, future
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Queued when emitted from another thread
+        self.requested.connect(self._run)
+
+    def call(self, fn):
+        """Schedule fn(); returns a concurrent.futures.Future of its result."""
+        future = Future()
+        self.requested.emit(fn, future)
+        return future
+
+    def _run(self, fn, future):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except Exception as e:
+            future.set_exception(e)
+
+
+class StallGuard:
+    """Logs event loop stalls longer than threshold_ms.
+
+    A timer ticks every interval_ms; when a tick arrives late, the GUI
+    thread was busy for that long.
+    """
+
+    def __init__(self, threshold_ms=STALL_THRESHOLD_MS, interval_ms=50, parent=None):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stalls = []
+        self.last = time.perf_counter()
+        self.timer = QTimer(parent)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(interval_ms)
+
+    def tick(self):
+        now = time.perf_counter()
+        late = now - self.last - self.interval
+        self.last = now
+        if late >= self.threshold:
+            self.stalls.append(late)
+            perf.record("gui_stall", late)
+            log.warning("GUI thread stalled for %.0f ms", late * 1000)
+
+
+# Shared by every tab
+background = JobQueue()
@@ -0,0 +1,156 @@
+"""Transaction ledger for accounts and credit cards.
+
+Transactions are appended to data["transactions"] and never rewritten.
+Each entry belongs to one account or card (by its "id") and moves its
+balance by "amount": deposits and card charges are positive, withdrawals
+and card payments negative.
+
+The in-memory index keeps, per account, the entries in date order with
+a checkpoint of the running balance every CHECKPOINT entries, so the
+current balance is O(1) and the balance on any date is a binary search
+plus at most CHECKPOINT additions. A backdated entry only moves the
+checkpoints after it. New entries are picked up incrementally: only
+entries appended since the last look are indexed.
+"""
+import datetime
+import uuid
+from bisect import bisect_right
+
+from storage import data
+
+# Date given to the entry that carries a record's balance from before the ledger
+OPENING_DATE = "0001-01-01"
+OPENING_MEMO = "Opening balance"
+ADJUSTMENT_MEMO = "Manual adjustment"
+# Entries between checkpoints of an account's running balance
+CHECKPOINT = 64
+
+
+def new_id():
+    return uuid.uuid4().hex[:12]
+
+
+def ensure_id(record):
+    """Give a record a stable id, used to link other records to it."""
+    if "id" not in record:
+        record["id"] = new_id()
+    return record["id"]
+
+
+def _entry(account, date, amount, memo, category=None):
+    entry = {"account": account, "date": date, "amount": amount, "memo": memo}
+    if category:
+        entry["category"] = category
+    return entry
+
+
+class AccountIndex:
+    """Sorted entries of one account and checkpoints of their balance.
+
+    checkpoints[j] is the balance after the first j * CHECKPOINT entries.
+    """
+
+    def __init__(self):
+        self.dates = []
+        self.entries = []
+        self.checkpoints = [0]
+        self.total = 0
+
+    def add(self, entry):
+        date, amount = entry["date"], entry["amount"]
+        pos = len(self.dates)
+        if self.dates and date < self.dates[-1]:
+            # Backdated; the common case is entries arriving in date order
+            pos = bisect_right(self.dates, date)
+        self.dates.insert(pos, date)
+        self.entries.insert(pos, entry)
+        self.total = round(self.total + amount, 2)
+        # The checkpoints after pos count this entry instead of the one it
+        # pushed past them
+        for j in range(pos // CHECKPOINT + 1, len(self.checkpoints)):
+            pushed = self.entries[j * CHECKPOINT]["amount"]
+            self.checkpoints[j] = round(self.checkpoints[j] + amount - pushed, 2)
+        if len(self.entries) % CHECKPOINT == 0:
+            self.checkpoints.append(self.total)
+
+    def balance(self, date=None):
+        if date is None:
+            return self.total
+        pos = bisect_right(self.dates, date)
+        start = pos - pos % CHECKPOINT
+        since = sum(entry["amount"] for entry in self.entries[start:pos])
+        return round(self.checkpoints[pos // CHECKPOINT] + since, 2)
+
+
+class Ledger:
+    def __init__(self):
+        self.transactions = None
+        self.indexed = 0
+        self.accounts = {}
+
+    def sync(self):
+        """Index transactions appended since the last call."""
+        transactions = data.setdefault("transactions", [])
+        if transactions is not self.transactions or len(transactions) < self.indexed:
+            # A different data file was loaded
+            self.transactions = transactions
+            self.indexed = 0
+            self.accounts = {}
+        for entry in transactions[self.indexed :]:
+            self.accounts.setdefault(entry["account"], AccountIndex()).add(entry)
+        self.indexed = len(transactions)
+
+    def balance(self, record, date=None):
+        """Balance of an account or card, optionally at the end of a date.
+
+        Records without transactions report their stored balance.
+        """
+        self.sync()
+        index = self.accounts.get(record.get("id"))
+        if index is None:
+            return record["balance"]
+        return index.balance(date)
+
+    def entries(self, record):
+        """Transactions of one account or card, oldest first."""
+        self.sync()
+        index = self.accounts.get(record.get("id"))
+        return list(index.entries) if index else []
+
+    def add(self, record, amount, date=None, memo="", category=None):
+        """Append a transaction and update the record's stored balance."""
+        date = date or datetime.date.today().isoformat()
+        return self.add_many(record, [(date, amount, memo, category)])[0]
+
+    def add_many(self, record, items):
+        """Append (date, amount, memo[, category]) transactions to one record."""
+        self.sync()
+        account = ensure_id(record)
+        entries = []
+        if account not in self.accounts and record.get("balance"):
+            # First transaction: carry the balance typed in before the ledger
+            entries.append(
+                _entry(account, OPENING_DATE, record["balance"], OPENING_MEMO)
+            )
+        first = len(entries)
+        entries.extend(_entry(account, *item) for item in items)
+        if not entries:
+            return []
+
+        self.transactions.extend(entries)
+        self.sync()
+        record["balance"] = self.accounts[account].balance()
+        return entries[first:]
+
+    def set_balance(self, record, balance, date=None):
+        """Record the difference to a hand-entered balance as an adjustment.
+
+        With a date, balance is the one at the end of that day; the stored
+        balance stays the ledger's latest, which includes later entries.
+        """
+        delta = round(balance - self.balance(record, date), 2)
+        if delta:
+            self.add(record, delta, date, ADJUSTMENT_MEMO)
+
+
+ledger = Ledger()
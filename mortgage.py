@@ -0,0 +1,151 @@
+"""Mortgage amortization and equity projections for properties.
+
+A property with loan terms carries "rate" (annual %), "term" (years),
+"start_date" (ISO date of the loan) and optionally "extra" (paid on top of
+the scheduled payment every month); its "loan" is then the amount
+borrowed on the start date. Properties without terms keep "loan" as a
+hand-entered balance that never changes.
+
+With a fixed payment the balance after k payments has a closed form, so a
+whole schedule is computed month by month without stepping through the
+previous months. Schedules are cached on the loan terms: editing one
+property only invalidates that property's schedule.
+"""
+import datetime
+from collections import namedtuple
+from functools import lru_cache
+
+# How far ahead the properties table projects equity
+PROJECTION_YEARS = 5
+
+Schedule = namedtuple(
+    "Schedule",
+    [
+        "payment",  # scheduled monthly payment, without extra
+        "balances",  # per month: balance after that month's payment
+        "interest",  # per month: interest paid up to and including that month
+        "payoff_month",  # month the loan is paid off
+    ],
+)
+
+
+def monthly_payment(principal, rate, years):
+    """The fixed monthly payment that pays off principal over years."""
+    months = int(years * 12)
+    if months <= 0:
+        return principal
+    r = rate / 1200
+    if not r:
+        return principal / months
+    return principal * r / (1 - (1 + r) ** -months)
+
+
+def has_terms(prop):
+    return bool(prop.get("term")) and bool(prop.get("start_date"))
+
+
+def terms(prop):
+    """The inputs of a property's schedule, used as its cache key."""
+    return (
+        round(float(prop["loan"]), 2),
+        float(prop.get("rate", 0.0)),
+        float(prop["term"]),
+        round(float(prop.get("extra", 0.0)), 2),
+    )
+
+
+@lru_cache(maxsize=256)
+def amortize(principal, rate, years, extra=0.0):
+    """Schedule of a fixed-rate loan paid monthly, plus extra every month."""
+    payment = monthly_payment(principal, rate, years)
+    paid = payment + extra
+    r = rate / 1200
+    growth = 1 + r
+    months = range(1, max(int(years * 12), 1) + 1)
+
+    # B_k = P (1 + r)^k - paid ((1 + r)^k - 1) / r
+    if r:
+        factors = [growth**k for k in months]
+        balances = [principal * f - paid * (f - 1) / r for f in factors]
+    else:
+        balances = [principal - paid * k for k in months]
+    balances = [round(b, 2) if b > 0.005 else 0.0 for b in balances]
+    payoff_month = next(
+        (k for k, b in zip(months, balances) if not b), len(balances)
+    )
+    balances = balances[:payoff_month]
+
+    # Interest is what was paid minus how far the balance came down; the
+    # last payment only covers what was left
+    last = balances[-2] * growth if payoff_month > 1 else principal * growth
+    interest = [
+        paid * k - (principal - b) for k, b in zip(months, balances[:-1])
+    ]
+    interest.append(paid * (payoff_month - 1) + last - principal)
+    interest = [round(max(i, 0.0), 2) for i in interest]
+
+    return Schedule(round(payment, 2), tuple(balances), tuple(interest), payoff_month)
+
+
+def schedule(prop):
+    """The cached amortization schedule of a property, or None without terms."""
+    if not has_terms(prop):
+        return None
+    return amortize(*terms(prop))
+
+
+def months_between(start, date):
+    """Monthly payments made from the start date up to a date."""
+    start = datetime.date.fromisoformat(start)
+    return (date.year - start.year) * 12 + date.month - start.month
+
+
+def _loan_balance(loan, loan_terms, start_date, date):
+    if loan_terms is None:
+        return loan
+    months = months_between(start_date, date)
+    if months <= 0:
+        return loan
+    plan = amortize(*loan_terms)
+    if months > len(plan.balances):
+        return 0.0
+    return plan.balances[months - 1]
+
+
+def loan_balance(prop, date=None):
+    """Loan balance of a property on a date (today by default)."""
+    loan_terms = terms(prop) if has_terms(prop) else None
+    date = date or datetime.date.today()
+    return _loan_balance(prop["loan"], loan_terms, prop.get("start_date"), date)
+
+
+def equity(prop, date=None):
+    """(equity, equity %) of a property on a date, at its current value.
+
+    Computed on demand rather than stored, and memoized on the fields it
+    depends on, so redrawing an unchanged property is a cache hit and
+    editing one is a miss for that property alone.
+    """
+    loan_terms = terms(prop) if has_terms(prop) else None
+    date = date or datetime.date.today()
+    return _equity(
+        prop["value"], prop["loan"], loan_terms, prop.get("start_date"), date
+    )
+
+
+@lru_cache(maxsize=4096)
+def _equity(value, loan, loan_terms, start_date, date):
+    amount = value - _loan_balance(loan, loan_terms, start_date, date)
+    pct = (amount / value * 100) if value else 0
+    return amount, pct
+
+
+def projected_equity(prop, years=PROJECTION_YEARS, today=None):
+    """Equity a number of years from today, at today's estimated value."""
+    today = today or datetime.date.today()
+    try:
+        later = today.replace(year=today.year + years)
+    except ValueError:
+        # Feb 29
+        later = today.replace(year=today.year + years, day=28)
+    return equity(prop, later)[0]
@@ -0,0 +1,112 @@
+"""Credit card payoff projections (avalanche and snowball).
+
+simulate() steps every card forward one month at a time: interest is
+added at each card's APR, minimum payments are made, and whatever is
+left of the monthly budget goes to one target card (highest APR first
+for avalanche, lowest balance first for snowball). Each month is computed
+for all cards at once as whole-column list operations, and results are
+cached by their inputs, so re-running an unchanged scenario is free.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+from ledger import ledger
+
+STRATEGIES = ("avalanche", "snowball")
+# Give up on plans that would take longer than this
+MAX_MONTHS = 600
+
+PayoffResult = namedtuple(
+    "PayoffResult",
+    [
+        "months",  # months until every card is paid off (MAX_MONTHS if never)
+        "total_interest",
+        "total_paid",
+        "payoff_months",  # per card: month it reaches zero, or None
+        "interest",  # per card: interest paid
+        "schedule",  # per month: tuple of card balances after payment
+        "paid_off",  # False if the budget never clears the debt
+    ],
+)
+
+
+def simulate(balances, aprs, minimums, budget, strategy="avalanche"):
+    """Project a payoff plan; arguments are sequences with one item per card."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    return _simulate(
+        tuple(round(float(b), 2) for b in balances),
+        tuple(float(a) for a in aprs),
+        tuple(float(m) for m in minimums),
+        round(float(budget), 2),
+        strategy,
+    )
+
+
+@lru_cache(maxsize=256)
+def _simulate(balances, aprs, minimums, budget, strategy):
+    count = len(balances)
+    rates = [apr / 1200 for apr in aprs]
+    current = list(balances)
+    interest = [0.0] * count
+    payoff_months = [0 if b <= 0 else None for b in current]
+    schedule = []
+    total_paid = 0.0
+    # The budget can never be less than the minimums
+    budget = max(budget, sum(minimums))
+
+    if strategy == "avalanche":
+        order = sorted(range(count), key=lambda i: -rates[i])
+
+    month = 0
+    while any(b > 0 for b in current) and month < MAX_MONTHS:
+        month += 1
+        charged = [round(b * r, 2) if b > 0 else 0 for b, r in zip(current, rates)]
+        current = [b + c for b, c in zip(current, charged)]
+        interest = [i + c for i, c in zip(interest, charged)]
+
+        payments = [min(m, b) if b > 0 else 0.0 for m, b in zip(minimums, current)]
+        current = [b - p for b, p in zip(current, payments)]
+        extra = budget - sum(payments)
+
+        if strategy == "snowball":
+            order = sorted(range(count), key=lambda i: current[i])
+        for i in order:
+            if extra <= 0:
+                break
+            if current[i] > 0:
+                paid = min(extra, current[i])
+                current[i] -= paid
+                payments[i] += paid
+                extra -= paid
+
+        current = [round(b, 2) if b > 0.005 else 0.0 for b in current]
+        total_paid += sum(payments)
+        for i, b in enumerate(current):
+            if b <= 0 and payoff_months[i] is None:
+                payoff_months[i] = month
+        schedule.append(tuple(current))
+
+    return PayoffResult(
+        months=month,
+        total_interest=round(sum(interest), 2),
+        total_paid=round(total_paid, 2),
+        payoff_months=tuple(payoff_months),
+        interest=tuple(round(i, 2) for i in interest),
+        schedule=tuple(schedule),
+        paid_off=not any(b > 0 for b in current),
+    )
+
+
+def card_terms(cards):
+    """(balances, aprs, minimums) of credit card records, for simulate()."""
+    return (
+        [ledger.balance(card) for card in cards],
+        [card.get("apr", 0.0) for card in cards],
+        [card.get("payment", 0.0) for card in cards],
+    )
+
+
+def simulate_cards(cards, budget, strategy="avalanche"):
+    """simulate() for credit card records (balance, apr, payment)."""
+    return simulate(*card_terms(cards), budget, strategy)
@@ -0,0 +1,121 @@
+"""Timers, counters and profiling hooks for finding slow spots.
+
+Instrumentation is off unless FINANCE_PERF is set (or ``--perf`` is
+passed to the app). While it is off, an instrumented call costs a single
+flag check. FINANCE_PROFILE=<path> (or ``--profile <path>``) records a
+cProfile dump of the whole session, readable with ``python -m pstats``.
+"""
+import cProfile
+import os
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+enabled = bool(os.environ.get("FINANCE_PERF"))
+profile_path = os.environ.get("FINANCE_PROFILE", "")
+
+# name -> [calls, total seconds, last seconds, max seconds]
+timings = {}
+counters = defaultdict(int)
+# Callables notified with (name, seconds) after each timed call
+listeners = []
+
+_profiler = None
+
+
+def record(name, seconds):
+    """Add one measurement for name."""
+    entry = timings.get(name)
+    if entry is None:
+        timings[name] = [1, seconds, seconds, seconds]
+    else:
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = seconds
+        if seconds > entry[3]:
+            entry[3] = seconds
+    for listener in listeners:
+        listener(name, seconds)
+
+
+def count(name, n=1):
+    if enabled:
+        counters[name] += n
+
+
+def timed(name=None):
+    """Decorator that records how long each call takes.
+
+    Don't connect decorated methods straight to Qt signals: PyQt passes
+    signal arguments to a generic wrapper. Use a lambda instead.
+    """
+
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def timer(name):
+    """Context manager version of timed()."""
+    if not enabled:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record(name, perf_counter() - start)
+
+
+def reset():
+    timings.clear()
+    counters.clear()
+
+
+def report():
+    """Return a plain-text table of all timings and counters."""
+    lines = [f"{'name':<45}{'calls':>8}{'total ms':>12}{'last ms':>10}{'max ms':>10}"]
+    for name, (calls, total, last, longest) in sorted(
+        timings.items(), key=lambda item: -item[1][1]
+    ):
+        lines.append(
+            f"{name:<45}{calls:>8}{total * 1000:>12.1f}"
+            f"{last * 1000:>10.1f}{longest * 1000:>10.1f}"
+        )
+    for name, value in sorted(counters.items()):
+        lines.append(f"{name:<45}{value:>8}")
+    return "\n".join(lines)
+
+
+def start_profiling(path):
+    global _profiler, profile_path
+    profile_path = path
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def stop_profiling():
+    """Stop the session profiler and write its dump, if one is running."""
+    global _profiler
+    if _profiler is None:
+        return
+    _profiler.disable()
+    _profiler.dump_stats(profile_path)
+    print(f"Profile written to {profile_path}", file=sys.stderr)
+    _profiler = None
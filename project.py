@@ -1,6 +1,10 @@
-import sys
-import json
+import argparse
+import datetime
 import os
+import sys
+import time
+from collections import OrderedDict
+from itertools import islice
 from PyQt5.QtWidgets import (
     QApplication,
     QWidget,
@@ -24,9 +28,78 @@ from PyQt5.QtWidgets import (
     QDialog,
     QDialogButtonBox,
     QScrollArea,
+    QFileDialog,
+    QTableView,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+    QStyle,
+    QProgressDialog,
+    QListWidget,
+    QListWidgetItem,
+    QShortcut,
 )
-from PyQt5.QtCore import Qt, QDate
-from PyQt5.QtGui import QColor
+from PyQt5.QtCore import (
+    Qt,
+    QDate,
+    QTimer,
+    QAbstractTableModel,
+    QEvent,
+    QModelIndex,
+    QRect,
+    QPointF,
+)
+from PyQt5.QtGui import QColor, QKeySequence, QPainter, QPen, QPolygonF
+
+import api
+import archive
+import backups
+import encryption
+import perf
+import registry
+import reports
+import storage
+from budget import category_colors, category_names, rollup, set_budget
+from dashboard import charts
+from forecast import forecast
+from jobs import HIGH, LOW, MainThread, StallGuard, background, report_progress
+from ledger import ensure_id, ledger
+from mortgage import PROJECTION_YEARS, equity, projected_equity, schedule
+from payoff import MAX_MONTHS, card_terms, simulate
+from search import SOURCES, QuickAdd, has_markers, parse_quick_add, search_index
+from statements import default_folder, import_statements
+from storage import data, save_data, stream_load_data, write_data
+from taskgraph import REPEATS, complete_occurrence, occurrences, task_graph
+
+# Rows loaded before the window is shown; the rest streams in afterwards
+FIRST_SCREENFUL = 50
+# Time budget per slice of background loading, in milliseconds
+LOAD_SLICE_MS = 15
+# Number of recent timings shown in the performance overlay
+PERF_OVERLAY_ITEMS = 4
+# Transactions listed in the tooltip of a balance cell
+RECENT_TRANSACTIONS = 5
+# Deepest subtask level drawn with its own indentation
+MAX_INDENT = 8
+# Upcoming dates listed in the tooltip of a recurring task
+UPCOMING_OCCURRENCES = 3
+# How often to look for changes other programs made to the data file
+WATCH_MS = 2000
+# Minutes between automatic backups; 0 turns them off
+BACKUP_MINUTES = int(os.environ.get("FINANCE_BACKUP_MINUTES", "30"))
+
+
+def back_up(reason):
+    """Back up the data as it is now, writing the backup in the background."""
+    if storage.loading:
+        return  # only part of the file is in
+    background.submit(
+        backups.create,
+        storage.copy_data(),
+        reason,
+        backups.backup_dir(),
+        storage.is_encrypted(),
+        priority=LOW,
+    )
 
 
 def format_currency(amount):
@@ -49,34 +122,197 @@ def validate_float(value):
         return None
 
 
-# File to store data
-data_file = "data.json"
-if not os.path.exists(data_file):
-    with open(data_file, "w") as f:
-        json.dump(
-            {
-                "todos": [],
-                "credit_cards": [],
-                "categories": [
-                    {"name": "Personal", "color": "#FF5733"},
-                    {"name": "Home", "color": "#33FF57"},
-                    {"name": "Education", "color": "#3357FF"},
-                    {"name": "Business", "color": "#F033FF"},
-                ],
-                "properties": [],
-                "accounts": [],
-                "bills": [],
-            },
-            f,
-        )
+def category_combo_box(current=""):
+    """Combo box of the To-Do categories, with "No category" first."""
+    combo = QComboBox()
+    combo.addItem("No category", "")
+    for name in category_names():
+        combo.addItem(name, name)
+    index = combo.findData(current)
+    if index >= 0:
+        combo.setCurrentIndex(index)
+    return combo
+
+
+def repeat_combo_box(current=""):
+    """Combo box of the ways a task can repeat, with "Never" first."""
+    combo = QComboBox()
+    combo.addItem("Never", "")
+    for repeat in REPEATS:
+        combo.addItem(repeat.capitalize(), repeat)
+    combo.setCurrentIndex(max(0, combo.findData(current)))
+    return combo
+
+
+def add_loan_term_rows(layout, prop):
+    """Optional mortgage term fields of the property dialogs."""
+    rate_edit = QLineEdit(str(prop["rate"]) if "rate" in prop else "")
+    term_edit = QLineEdit(str(prop["term"]) if "term" in prop else "")
+    term_edit.setPlaceholderText("Leave empty for a fixed loan balance")
+    start_edit = QLineEdit(prop.get("start_date", ""))
+    start_edit.setPlaceholderText("YYYY-MM-DD")
+    extra_edit = QLineEdit(str(prop["extra"]) if "extra" in prop else "")
+    layout.addRow("Interest Rate (%):", rate_edit)
+    layout.addRow("Term (years):", term_edit)
+    layout.addRow("Loan Start Date:", start_edit)
+    layout.addRow("Extra Monthly Payment:", extra_edit)
+    return rate_edit, term_edit, start_edit, extra_edit
+
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """Draws a row of push buttons in a cell without creating widgets.
+
+    actions is a list of (label, callback) pairs; a click calls
+    callback(row) once control is back in the event loop.
+    """
+
+    def __init__(self, actions, parent=None):
+        super().__init__(parent)
+        self.actions = actions
+
+    def button_rects(self, rect):
+        width = rect.width() // len(self.actions)
+        return [
+            QRect(rect.x() + i * width, rect.y(), width, rect.height()).adjusted(
+                2, 2, -2, -2
+            )
+            for i in range(len(self.actions))
+        ]
 
-with open(data_file, "r") as f:
-    data = json.load(f)
+    def paint(self, painter, option, index):
+        for (label, _), rect in zip(self.actions, self.button_rects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = label
+            button.state = QStyle.State_Enabled | QStyle.State_Raised
+            QApplication.style().drawControl(QStyle.CE_PushButton, button, painter)
+
+    def editorEvent(self, event, model, option, index):
+        if (
+            event.type() == QEvent.MouseButtonRelease
+            and event.button() == Qt.LeftButton
+        ):
+            for (_, callback), rect in zip(
+                self.actions, self.button_rects(option.rect)
+            ):
+                if rect.contains(event.pos()):
+                    row = index.row()
+                    QTimer.singleShot(0, lambda: callback(row))
+                    return True
+        return False
+
+
+class TodoTableModel(QAbstractTableModel):
+    """Exposes data["todos"] to a QTableView; rows are only built when shown.
+
+    Subtasks are listed under their parent, indented by their depth.
+    """
+
+    headers = ["Status", "Completed", "Task", "Category", "Due Date", "Actions"]
+
+    def __init__(self, tab):
+        super().__init__(tab)
+        self.tab = tab
+        self.category_colors = {}
+        self.order = None  # (data index, depth) per row; None: data order
+        self.rows = None  # data index -> row
+
+    def reset(self):
+        self.beginResetModel()
+        self.category_colors = {}
+        for cat in data["categories"]:
+            self.category_colors.setdefault(cat["name"], QColor(cat["color"]))
+        task_graph.rebuild()
+        self.order = task_graph.rows()
+        if self.order is not None:
+            self.rows = {index: row for row, (index, _) in enumerate(self.order)}
+        self.endResetModel()
+
+    def todo_index(self, row):
+        """Index in data["todos"] of the todo shown in row."""
+        return row if self.order is None else self.order[row][0]
+
+    def refresh_row(self, index):
+        row = index if self.order is None else self.rows[index]
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, len(self.headers) - 1)
+        )
 
+    def rows_appended(self, count):
+        """Show the last count todos, just appended; False if out of order."""
+        if self.order is not None:
+            return False
+        last = len(data["todos"]) - 1
+        self.beginInsertRows(QModelIndex(), last - count + 1, last)
+        self.endInsertRows()
+        return True
+
+    def rowCount(self, parent=None):
+        return len(data["todos"]) if self.order is None else len(self.order)
+
+    def columnCount(self, parent=None):
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if index.column() == 1:
+            return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        todo = data["todos"][self.todo_index(index.row())]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                if task_graph.blocked(todo):
+                    return f"🔒 {todo['status']}"
+                return todo["status"]
+            if column == 2:
+                depth = 0 if self.order is None else self.order[index.row()][1]
+                task = f"🔁 {todo['task']}" if todo.get("repeat") else todo["task"]
+                if depth:
+                    return "    " * min(depth, MAX_INDENT) + "↳ " + task
+                return task
+            if column == 3:
+                return todo["category"]
+            if column == 4:
+                return todo["due_date"] if todo["due_date"] else "No due date"
+        elif role == Qt.ToolTipRole:
+            if column == 0 and task_graph.blocked(todo):
+                names = ", ".join(t["task"] for t in task_graph.blockers(todo))
+                return f"Waiting for: {names}"
+            if column == 2 and todo.get("repeat"):
+                upcoming = islice(occurrences(todo), UPCOMING_OCCURRENCES)
+                return f"Repeats {todo['repeat']}: " + ", ".join(upcoming)
+        elif role == Qt.CheckStateRole and column == 1:
+            return Qt.Checked if todo["completed"] else Qt.Unchecked
+        elif role == Qt.ForegroundRole:
+            if column == 0 and task_graph.blocked(todo):
+                return QColor(150, 150, 150)
+            if column == 2 and todo["completed"]:
+                return QColor(150, 150, 150)
+            if column == 3:
+                return self.category_colors.get(todo["category"])
+            if column == 4 and todo["due_date"] and not todo["completed"]:
+                due_date = QDate.fromString(todo["due_date"], "yyyy-MM-dd")
+                if due_date < QDate.currentDate():
+                    return QColor(255, 0, 0)
+        elif role == Qt.FontRole and column == 2 and todo["completed"]:
+            font = self.tab.table.font()
+            font.setStrikeOut(True)
+            return font
+        return None
 
-def save_data():
-    with open(data_file, "w") as f:
-        json.dump(data, f, indent=4)
+    def setData(self, index, value, role=Qt.EditRole):
+        if role == Qt.CheckStateRole and index.column() == 1:
+            self.tab.toggle_completed(self.todo_index(index.row()), value)
+            return True
+        return False
 
 
 class ToDoTab(QWidget):
@@ -90,10 +326,20 @@ class ToDoTab(QWidget):
         content = QWidget()
         content_layout = QVBoxLayout(content)
 
-        # Table for displaying todos
-        self.table = QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(
-            ["Status", "Completed", "Task", "Category", "Due Date", "Actions"]
+        # Table for displaying todos; the model builds only the visible rows
+        self.model = TodoTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(
+            5,
+            ActionButtonsDelegate(
+                [
+                    ("Edit", self.for_row(self.edit_todo)),
+                    ("Subtask", self.for_row(self.add_subtask)),
+                    ("Delete", self.for_row(self.delete_todo)),
+                ],
+                self.table,
+            ),
         )
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setColumnWidth(0, 100)
@@ -101,7 +347,7 @@ class ToDoTab(QWidget):
         self.table.setColumnWidth(2, 200)
         self.table.setColumnWidth(3, 150)
         self.table.setColumnWidth(4, 150)
-        self.table.setColumnWidth(5, 150)
+        self.table.setColumnWidth(5, 220)
         content_layout.addWidget(self.table)
 
         # Form for adding new todos (collapsible)
@@ -118,14 +364,16 @@ class ToDoTab(QWidget):
         )
         self.due_date_input = QLineEdit()
         self.due_date_input.setPlaceholderText("YYYY-MM-DD (optional)")
+        self.repeat_combo = repeat_combo_box()
 
         form_layout.addRow("Task", self.task_input)
         form_layout.addRow("Category", self.category_combo)
         form_layout.addRow("Status", self.status_combo)
         form_layout.addRow("Due Date", self.due_date_input)
+        form_layout.addRow("Repeat", self.repeat_combo)
 
         self.add_button = QPushButton("Add Task")
-        self.add_button.clicked.connect(self.add_todo)
+        self.add_button.clicked.connect(lambda: self.add_todo())
         form_layout.addRow(self.add_button)
 
         self.form_group.setLayout(form_layout)
@@ -165,6 +413,10 @@ class ToDoTab(QWidget):
         self.load_categories()
         self.load_todos()
 
+    def for_row(self, action):
+        """action(index) as a callback that takes the row of the table."""
+        return lambda row: action(self.model.todo_index(row))
+
     def choose_color(self):
         color = QColorDialog.getColor()
         if color.isValid():
@@ -188,13 +440,12 @@ class ToDoTab(QWidget):
         self.new_cat_input.clear()
 
     def load_categories(self):
+        charts.invalidate("categories")
         self.category_combo.clear()
         for category in data["categories"]:
-            if isinstance(category, dict):
-                self.category_combo.addItem(category["name"])
-            else:
-                self.category_combo.addItem(category)
+            self.category_combo.addItem(category["name"])
 
+    @perf.timed()
     def add_todo(self):
         task = self.task_input.text()
         if not task:
@@ -210,100 +461,79 @@ class ToDoTab(QWidget):
             except:
                 due_date = ""
 
-        data["todos"].append(
-            {
-                "task": task,
-                "category": category,
-                "status": status,
-                "due_date": due_date,
-                "completed": False,
-            }
-        )
+        todo = {
+            "task": task,
+            "category": category,
+            "status": status,
+            "due_date": due_date,
+            "completed": False,
+        }
+        if self.repeat_combo.currentData():
+            todo["repeat"] = self.repeat_combo.currentData()
+        data["todos"].append(todo)
         save_data()
         self.load_todos()
         self.task_input.clear()
         self.due_date_input.clear()
 
-    def load_todos(self):
-        self.table.setRowCount(0)
-        for i, todo in enumerate(data["todos"]):
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-
-            # Status
-            status_item = QTableWidgetItem(todo.get("status", "Not Started"))
-            status_item.setFlags(status_item.flags() ^ Qt.ItemIsEditable)
-            self.table.setItem(row, 0, status_item)
-
-            # Completed checkbox
-            checkbox = QCheckBox()
-            checkbox.setChecked(todo["completed"])
-            checkbox.stateChanged.connect(
-                lambda state, idx=i: self.toggle_completed(idx, state)
-            )
-            cell_widget = QWidget()
-            layout = QHBoxLayout(cell_widget)
-            layout.addWidget(checkbox)
-            layout.setAlignment(Qt.AlignCenter)
-            layout.setContentsMargins(0, 0, 0, 0)
-            self.table.setCellWidget(row, 1, cell_widget)
-
-            # Task
-            task_item = QTableWidgetItem(todo["task"])
-            task_item.setFlags(task_item.flags() ^ Qt.ItemIsEditable)
-            if todo["completed"]:
-                task_item.setForeground(QColor(150, 150, 150))
-                font = task_item.font()
-                font.setStrikeOut(True)
-                task_item.setFont(font)
-            self.table.setItem(row, 2, task_item)
-
-            # Category with color
-            category_item = QTableWidgetItem(todo["category"])
-            category_item.setFlags(category_item.flags() ^ Qt.ItemIsEditable)
-
-            for cat in data["categories"]:
-                if isinstance(cat, dict) and cat["name"] == todo["category"]:
-                    category_item.setForeground(QColor(cat["color"]))
-                    break
-                elif cat == todo["category"]:
-                    category_item.setForeground(QColor("#000000"))
-                    break
-
-            self.table.setItem(row, 3, category_item)
-
-            # Due date
-            due_date = todo["due_date"] if todo["due_date"] else "No due date"
-            due_item = QTableWidgetItem(due_date)
-            due_item.setFlags(due_item.flags() ^ Qt.ItemIsEditable)
-
-            if todo["due_date"] and not todo["completed"]:
-                due_date = QDate.fromString(todo["due_date"], "yyyy-MM-dd")
-                if due_date < QDate.currentDate():
-                    due_item.setForeground(QColor(255, 0, 0))
-
-            self.table.setItem(row, 4, due_item)
-
-            # Action buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-
-            edit_btn = QPushButton("Edit")
-            edit_btn.clicked.connect(lambda _, idx=i: self.edit_todo(idx))
-
-            delete_btn = QPushButton("Delete")
-            delete_btn.clicked.connect(lambda _, idx=i: self.delete_todo(idx))
+    def add_subtask(self, index):
+        parent = data["todos"][index]
+        task, ok = QInputDialog.getText(
+            self, "Add Subtask", f"Subtask of {parent['task']}:"
+        )
+        if not ok or not task:
+            return
+        todo = {
+            "task": task,
+            "category": parent["category"],
+            "status": "Not Started",
+            "due_date": "",
+            "completed": False,
+        }
+        task_graph.link(todo, parent=parent)
+        data["todos"].append(todo)
+        save_data()
+        self.load_todos()
 
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(delete_btn)
-            action_layout.setContentsMargins(0, 0, 0, 0)
+    @perf.timed()
+    def load_todos(self):
+        charts.invalidate("todos")
+        self.model.reset()
 
-            self.table.setCellWidget(row, 5, action_widget)
+    def records_changed(self, changed, added):
+        """Redraw the rows of changed todos and add rows for new ones."""
+        if added and not self.model.rows_appended(added):
+            # Subtasks are shown under their parent: place them anew
+            self.load_todos()
+            return
+        charts.invalidate("todos")
+        for index in changed:
+            self.model.refresh_row(index)
 
+    @perf.timed()
     def toggle_completed(self, index, state):
-        data["todos"][index]["completed"] = state == Qt.Checked
+        todo = data["todos"][index]
+        completed = state == Qt.Checked
+        if completed and task_graph.blocked(todo):
+            names = ", ".join(target["task"] for target in task_graph.blockers(todo))
+            QMessageBox.warning(self, "Blocked", f"Finish these first: {names}")
+            self.model.refresh_row(index)
+            return
+        if completed and todo.get("repeat"):
+            # Stays open, due on its next occurrence
+            data["todos"].append(complete_occurrence(todo))
+            save_data()
+            self.load_todos()
+            return
+
+        todo["completed"] = completed
+        archive.stamp("todos", todo)
         save_data()
-        self.load_todos()
+        charts.invalidate("todos")
+        self.model.refresh_row(index)
+        # Only the todos waiting for this one can change
+        for dependent in task_graph.toggled(todo):
+            self.model.refresh_row(task_graph.positions[id(dependent)])
 
     def edit_todo(self, index):
         todo = data["todos"][index]
@@ -316,23 +546,31 @@ class ToDoTab(QWidget):
         task_edit = QLineEdit(todo["task"])
         category_combo = QComboBox()
         for category in data["categories"]:
-            if isinstance(category, dict):
-                category_combo.addItem(category["name"])
-            else:
-                category_combo.addItem(category)
+            category_combo.addItem(category["name"])
         category_combo.setCurrentText(todo["category"])
 
         status_combo = QComboBox()
         status_combo.addItems(["Not Started", "In Progress", "On Hold", "Completed"])
-        status_combo.setCurrentText(todo.get("status", "Not Started"))
+        status_combo.setCurrentText(todo["status"])
 
         due_date_edit = QLineEdit(todo["due_date"])
         due_date_edit.setPlaceholderText("YYYY-MM-DD")
+        repeat_combo = repeat_combo_box(todo.get("repeat", ""))
+        blocked_by_edit = QLineEdit(
+            ", ".join(
+                target["task"]
+                for target in task_graph.blockers(todo)
+                if target.get("id") in todo.get("blocked_by", [])
+            )
+        )
+        blocked_by_edit.setPlaceholderText("Names of open tasks, separated by commas")
 
         layout.addRow("Task", task_edit)
         layout.addRow("Category", category_combo)
         layout.addRow("Status", status_combo)
         layout.addRow("Due Date", due_date_edit)
+        layout.addRow("Repeat", repeat_combo)
+        layout.addRow("Blocked By", blocked_by_edit)
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(
@@ -343,6 +581,8 @@ class ToDoTab(QWidget):
                 status_combo.currentText(),
                 due_date_edit.text(),
                 dialog,
+                repeat_combo.currentData(),
+                blocked_by_edit.text(),
             )
         )
         buttons.rejected.connect(dialog.reject)
@@ -350,7 +590,10 @@ class ToDoTab(QWidget):
 
         dialog.exec_()
 
-    def save_todo_edit(self, index, task, category, status, due_date, dialog):
+    @perf.timed()
+    def save_todo_edit(
+        self, index, task, category, status, due_date, dialog, repeat="", blocked_by=""
+    ):
         if not task:
             QMessageBox.warning(self, "Error", "Task cannot be empty")
             return
@@ -361,13 +604,25 @@ class ToDoTab(QWidget):
             except:
                 due_date = ""
 
-        data["todos"][index] = {
-            "task": task,
-            "category": category,
-            "status": status,
-            "due_date": due_date,
-            "completed": data["todos"][index]["completed"],
-        }
+        todo = data["todos"][index]
+        try:
+            blockers = [
+                task_graph.find(name.strip())
+                for name in blocked_by.split(",")
+                if name.strip()
+            ]
+            # Keeps its parent; a new blocker must not close a cycle
+            parent = task_graph.by_id.get(todo.get("parent"))
+            task_graph.link(todo, parent, blockers)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+
+        todo.update(task=task, category=category, status=status, due_date=due_date)
+        if repeat:
+            todo["repeat"] = repeat
+        else:
+            todo.pop("repeat", None)
         save_data()
         self.load_todos()
         dialog.accept()
@@ -387,6 +642,94 @@ class ToDoTab(QWidget):
             self.load_todos()
 
 
+class SummaryModel(QAbstractTableModel):
+    """Label and value rows of a summary, such as the totals of a section.
+
+    update() compares the new rows with the shown ones by key and only
+    signals the cells that changed, inserting and removing rows as keys
+    come and go, so a refresh costs little however many rows there are.
+    """
+
+    def __init__(self, title, parent=None):
+        super().__init__(parent)
+        self.headers = [title, ""]
+        self.rows = []  # (key, label, value)
+
+    def update(self, rows):
+        keys = {key for key, _, _ in rows}
+        for row in reversed(range(len(self.rows))):
+            if self.rows[row][0] not in keys:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.rows[row]
+                self.endRemoveRows()
+        shown = {key for key, _, _ in self.rows}
+        for row, new in enumerate(rows):
+            if new[0] not in shown:
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.rows.insert(row, new)
+                self.endInsertRows()
+        if [key for key, _, _ in self.rows] != [key for key, _, _ in rows]:
+            # Reordered: cheaper to show afresh than to move rows one by one
+            self.beginResetModel()
+            self.rows = list(rows)
+            self.endResetModel()
+            return
+        for row, new in enumerate(rows):
+            old = self.rows[row]
+            if old != new:
+                self.rows[row] = new
+                first = 0 if old[1] != new[1] else 1
+                last = 1 if old[2] != new[2] else 0
+                self.dataChanged.emit(self.index(row, first), self.index(row, last))
+
+    def rowCount(self, parent=None):
+        return len(self.rows)
+
+    def columnCount(self, parent=None):
+        return 2
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self.rows[index.row()][index.column() + 1]
+        if role == Qt.TextAlignmentRole and index.column() == 1:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+
+class SummaryTable(QTableView):
+    """Compact, scrolling view of a SummaryModel."""
+
+    def __init__(self, title, visible_rows=8, parent=None):
+        super().__init__(parent)
+        self.setModel(SummaryModel(title, self))
+        self.verticalHeader().hide()
+        self.setShowGrid(False)
+        self.setSelectionMode(QTableView.NoSelection)
+        self.setEditTriggers(QTableView.NoEditTriggers)
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 6)
+        height = header.sizeHint().height()
+        height += visible_rows * self.verticalHeader().defaultSectionSize()
+        self.setMaximumHeight(height + 2 * self.frameWidth())
+
+    def update_rows(self, rows):
+        self.model().update(rows)
+
+    def text(self):
+        """The rows as "label: value" lines, like the labels used to show."""
+        return "\n".join(
+            f"{label}: {value}" if value else label
+            for _, label, value in self.model().rows
+        )
+
+
 class FinancialTab(QWidget):
     def __init__(self):
         super().__init__()
@@ -398,6 +741,20 @@ class FinancialTab(QWidget):
         content = QWidget()
         content_layout = QVBoxLayout(content)
 
+        # Statement import for accounts and cards
+        self.import_button = QPushButton("📥 Import Bank Statements")
+        self.import_button.setToolTip(
+            "Import OFX, QIF and CSV files from a folder with one subfolder "
+            "per account or card"
+        )
+        self.import_button.clicked.connect(self.show_import_dialog)
+        content_layout.addWidget(self.import_button)
+
+        self.report_button = QPushButton("📄 Year-End Report")
+        self.report_button.setToolTip("Save a yearly summary as PDF, HTML or CSV")
+        self.report_button.clicked.connect(self.show_report_dialog)
+        content_layout.addWidget(self.report_button)
+
         # Credit Card Section (Collapsible)
         self.cc_group = QGroupBox("Credit Cards (Click to Expand)")
         self.cc_group.setCheckable(True)
@@ -410,6 +767,16 @@ class FinancialTab(QWidget):
         self.add_cc_button.clicked.connect(self.show_add_credit_card_dialog)
         cc_layout.addWidget(self.add_cc_button)
 
+        self.add_cc_txn_button = QPushButton("➕ Add Card Transaction")
+        self.add_cc_txn_button.clicked.connect(
+            lambda: self.show_add_transaction_dialog("credit_cards")
+        )
+        cc_layout.addWidget(self.add_cc_txn_button)
+
+        self.payoff_button = QPushButton("📉 Debt Payoff Planner")
+        self.payoff_button.clicked.connect(self.show_payoff_dialog)
+        cc_layout.addWidget(self.payoff_button)
+
         # Credit Card Table
         self.cc_table = QTableWidget(0, 4)
         self.cc_table.setHorizontalHeaderLabels(
@@ -418,7 +785,7 @@ class FinancialTab(QWidget):
         self.cc_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         cc_layout.addWidget(self.cc_table)
 
-        self.cc_summary = QLabel()
+        self.cc_summary = SummaryTable("Credit Card Summary")
         cc_layout.addWidget(self.cc_summary)
 
         self.cc_group.setLayout(cc_layout)
@@ -437,14 +804,22 @@ class FinancialTab(QWidget):
         prop_layout.addWidget(self.add_prop_button)
 
         # Property Table
-        self.prop_table = QTableWidget(0, 5)
+        self.prop_table = QTableWidget(0, 7)
         self.prop_table.setHorizontalHeaderLabels(
-            ["Address", "Estimated Value", "Loan Balance", "Equity ($)", "Equity (%)"]
+            [
+                "Address",
+                "Estimated Value",
+                "Loan Balance",
+                "Equity ($)",
+                "Equity (%)",
+                f"Equity in {PROJECTION_YEARS} Years",
+                "Actions",
+            ]
         )
         self.prop_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         prop_layout.addWidget(self.prop_table)
 
-        self.prop_summary = QLabel()
+        self.prop_summary = SummaryTable("Property Summary")
         prop_layout.addWidget(self.prop_summary)
 
         self.prop_group.setLayout(prop_layout)
@@ -462,15 +837,21 @@ class FinancialTab(QWidget):
         self.add_acc_button.clicked.connect(self.show_add_account_dialog)
         acc_layout.addWidget(self.add_acc_button)
 
+        self.add_acc_txn_button = QPushButton("➕ Add Account Transaction")
+        self.add_acc_txn_button.clicked.connect(
+            lambda: self.show_add_transaction_dialog("accounts")
+        )
+        acc_layout.addWidget(self.add_acc_txn_button)
+
         # Accounts Table
-        self.acc_table = QTableWidget(0, 4)
+        self.acc_table = QTableWidget(0, 5)
         self.acc_table.setHorizontalHeaderLabels(
-            ["Account Name", "Type", "Institution", "Balance"]
+            ["Account Name", "Type", "Institution", "Balance", "Actions"]
         )
         self.acc_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         acc_layout.addWidget(self.acc_table)
 
-        self.acc_summary = QLabel()
+        self.acc_summary = SummaryTable("Account Summary")
         acc_layout.addWidget(self.acc_summary)
 
         self.acc_group.setLayout(acc_layout)
@@ -495,6 +876,8 @@ class FinancialTab(QWidget):
         balance_edit = QLineEdit()
         payment_edit = QLineEdit()
         due_edit = QLineEdit()
+        apr_edit = QLineEdit()
+        apr_edit.setPlaceholderText("e.g. 24.99 (optional)")
 
         layout.addRow("Owner:", owner_edit)
         layout.addRow("Card Name:", name_edit)
@@ -502,6 +885,7 @@ class FinancialTab(QWidget):
         layout.addRow("Current Balance:", balance_edit)
         layout.addRow("Minimum Payment:", payment_edit)
         layout.addRow("Due Date:", due_edit)
+        layout.addRow("APR (%):", apr_edit)
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(
@@ -513,6 +897,7 @@ class FinancialTab(QWidget):
                 payment_edit.text(),
                 due_edit.text(),
                 dialog,
+                apr_edit.text(),
             )
         )
         buttons.rejected.connect(dialog.reject)
@@ -520,18 +905,20 @@ class FinancialTab(QWidget):
 
         dialog.exec_()
 
+    @perf.timed()
     def add_credit_card_from_dialog(
-        self, owner, name, limit, balance, payment, due, dialog
+        self, owner, name, limit, balance, payment, due, dialog, apr=""
     ):
         try:
             limit = float(limit)
             balance = float(balance)
             payment = float(payment)
+            apr = float(apr) if apr else 0.0
         except ValueError:
             QMessageBox.warning(
                 self,
                 "Error",
-                "Please enter valid numbers for limit, balance and payment",
+                "Please enter valid numbers for limit, balance, payment and APR",
             )
             return
 
@@ -539,35 +926,37 @@ class FinancialTab(QWidget):
             QMessageBox.warning(self, "Error", "Owner and Card Name are required")
             return
 
-        available = limit - balance
-
         card = {
             "owner": owner,
             "card_name": name,
             "limit": limit,
-            "available": available,
             "balance": balance,
             "payment": payment,
             "due_date": due,
+            "apr": apr,
         }
+        ensure_id(card)
         data["credit_cards"].append(card)
         save_data()
         self.load_credit_cards()
         dialog.accept()
 
+    @perf.timed()
     def load_credit_cards(self):
+        charts.invalidate("credit_cards")
         self.cc_table.setRowCount(0)
         total_usage_amount = 0
         total_limit = 0
-        owner_debts = {}
+        owners = {}  # owner -> [limit, debt]
 
         for i, card in enumerate(data["credit_cards"]):
             row = self.cc_table.rowCount()
             self.cc_table.insertRow(row)
+            balance = ledger.balance(card)
 
             self.cc_table.setItem(row, 0, QTableWidgetItem(card["owner"]))
             self.cc_table.setItem(row, 1, QTableWidgetItem(card["card_name"]))
-            self.cc_table.setItem(row, 2, QTableWidgetItem(f"${card['balance']:,.2f}"))
+            self.cc_table.setItem(row, 2, self.balance_item(card, balance))
 
             # Action buttons
             action_widget = QWidget()
@@ -586,26 +975,31 @@ class FinancialTab(QWidget):
             self.cc_table.setCellWidget(row, 3, action_widget)
 
             total_limit += card["limit"]
-            total_usage_amount += card["balance"]
-            owner = card["owner"]
-            if owner not in owner_debts:
-                owner_debts[owner] = 0
-            owner_debts[owner] += card["balance"]
+            total_usage_amount += balance
+            totals = owners.setdefault(card["owner"], [0, 0])
+            totals[0] += card["limit"]
+            totals[1] += balance
 
-        total_usage_pct = calculate_credit_usage(total_usage_amount, total_limit)
-        total_debt = sum(owner_debts.values())
+        with perf.timer("FinancialTab.cc_summary"):
+            total_usage_pct = calculate_credit_usage(total_usage_amount, total_limit)
+            total_debt = sum(debt for _, debt in owners.values())
 
-        summary = [
-            f"<b>Credit Card Summary:</b>",
-            f"Total Credit Limit: ${total_limit:,.2f}",
-            f"Total Used: ${total_usage_amount:,.2f}",
-            f"Total Usage: {total_usage_pct:.2f}%",
-            f"Total Credit Card Debt: ${total_debt:,.2f}",
-        ]
-        for owner, debt in owner_debts.items():
-            summary.append(f"{owner}'s Debt: ${debt:,.2f}")
-
-        self.cc_summary.setText("<br>".join(summary))
+            summary = [
+                ("limit", "Total Credit Limit", format_currency(total_limit)),
+                ("used", "Total Used", format_currency(total_usage_amount)),
+                ("usage", "Total Usage", f"{total_usage_pct:.2f}%"),
+                ("debt", "Total Credit Card Debt", format_currency(total_debt)),
+            ]
+            for owner, (limit, debt) in owners.items():
+                usage = calculate_credit_usage(debt, limit)
+                summary.append(
+                    (
+                        ("owner", owner),
+                        f"{owner}'s Debt",
+                        f"{format_currency(debt)} ({usage:.0f}% used)",
+                    )
+                )
+            self.cc_summary.update_rows(summary)
 
     def edit_credit_card(self, index):
         card = data["credit_cards"][index]
@@ -621,6 +1015,7 @@ class FinancialTab(QWidget):
         balance_edit = QLineEdit(str(card["balance"]))
         payment_edit = QLineEdit(str(card["payment"]))
         due_edit = QLineEdit(card["due_date"])
+        apr_edit = QLineEdit(str(card.get("apr", 0.0)))
 
         layout.addRow("Owner:", owner_edit)
         layout.addRow("Card Name:", name_edit)
@@ -628,6 +1023,7 @@ class FinancialTab(QWidget):
         layout.addRow("Current Balance:", balance_edit)
         layout.addRow("Minimum Payment:", payment_edit)
         layout.addRow("Due Date:", due_edit)
+        layout.addRow("APR (%):", apr_edit)
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(
@@ -640,6 +1036,7 @@ class FinancialTab(QWidget):
                 payment_edit.text(),
                 due_edit.text(),
                 dialog,
+                apr_edit.text(),
             )
         )
         buttons.rejected.connect(dialog.reject)
@@ -647,32 +1044,39 @@ class FinancialTab(QWidget):
 
         dialog.exec_()
 
+    @perf.timed()
     def save_credit_card_edit(
-        self, index, owner, name, limit, balance, payment, due, dialog
+        self, index, owner, name, limit, balance, payment, due, dialog, apr=""
     ):
-        limit = validate_float(self.cc_limit_input.text())
-        available = validate_float(self.cc_available_input.text())
-        balance = validate_float(self.cc_balance_input.text())
-        payment = validate_float(self.cc_payment_input.text())
+        limit = validate_float(limit)
+        balance = validate_float(balance)
+        payment = validate_float(payment)
+        apr = validate_float(apr) if apr else 0.0
 
-        if None in [limit, available, balance, payment]:
+        if None in [limit, balance, payment, apr]:
+            QMessageBox.warning(
+                self,
+                "Error",
+                "Please enter valid numbers for limit, balance, payment and APR",
+            )
             return
 
         if not owner or not name:
             QMessageBox.warning(self, "Error", "Owner and Card Name are required")
             return
 
-        available = limit - balance
-
-        data["credit_cards"][index] = {
-            "owner": owner,
-            "card_name": name,
-            "limit": limit,
-            "available": available,
-            "balance": balance,
-            "payment": payment,
-            "due_date": due,
-        }
+        card = data["credit_cards"][index]
+        card.update(
+            {
+                "owner": owner,
+                "card_name": name,
+                "limit": limit,
+                "payment": payment,
+                "due_date": due,
+                "apr": apr,
+            }
+        )
+        ledger.set_balance(card, balance)
         save_data()
         self.load_credit_cards()
         dialog.accept()
@@ -704,11 +1108,16 @@ class FinancialTab(QWidget):
         layout.addRow("Address:", address_edit)
         layout.addRow("Estimated Value:", value_edit)
         layout.addRow("Loan Balance:", loan_edit)
+        loan_terms = add_loan_term_rows(layout, {})
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(
             lambda: self.add_property_from_dialog(
-                address_edit.text(), value_edit.text(), loan_edit.text(), dialog
+                address_edit.text(),
+                value_edit.text(),
+                loan_edit.text(),
+                dialog,
+                *[edit.text() for edit in loan_terms],
             )
         )
         buttons.rejected.connect(dialog.reject)
@@ -716,7 +1125,10 @@ class FinancialTab(QWidget):
 
         dialog.exec_()
 
-    def add_property_from_dialog(self, address, value, loan, dialog):
+    @perf.timed()
+    def add_property_from_dialog(
+        self, address, value, loan, dialog, rate="", term="", start="", extra=""
+    ):
         try:
             value = float(value)
             loan = float(loan)
@@ -730,37 +1142,49 @@ class FinancialTab(QWidget):
             QMessageBox.warning(self, "Error", "Address is required")
             return
 
-        equity = value - loan
-        equity_pct = (equity / value * 100) if value else 0
+        loan_terms = self.parse_loan_terms(rate, term, start, extra)
+        if loan_terms is None:
+            return
 
-        data["properties"].append(
-            {
-                "address": address,
-                "value": value,
-                "loan": loan,
-                "equity": equity,
-                "equity_pct": equity_pct,
-            }
-        )
+        prop = {"address": address, "value": value, "loan": loan, **loan_terms}
+        data["properties"].append(prop)
         save_data()
         self.load_properties()
         dialog.accept()
 
+    @perf.timed()
     def load_properties(self):
+        charts.invalidate("properties")
         self.prop_table.setRowCount(0)
         total_equity = 0
         total_value = 0
 
+        today = datetime.date.today()
         for i, prop in enumerate(data["properties"]):
             row = self.prop_table.rowCount()
             self.prop_table.insertRow(row)
 
+            # Amortized loans move every month; equity is memoized on the
+            # property's fields and the date, so this is a lookup for
+            # properties that have not changed
+            amount, pct = equity(prop, today)
+            balance = prop["value"] - amount
+            loan_item = QTableWidgetItem(f"${balance:,.2f}")
+            plan = schedule(prop)
+            if plan is not None:
+                loan_item.setToolTip(
+                    f"Payment: {format_currency(plan.payment + prop['extra'])}"
+                    f"/month\nPaid off after {plan.payoff_month} months"
+                    f"\nTotal interest: {format_currency(plan.interest[-1])}"
+                )
+
             self.prop_table.setItem(row, 0, QTableWidgetItem(prop["address"]))
             self.prop_table.setItem(row, 1, QTableWidgetItem(f"${prop['value']:,.2f}"))
-            self.prop_table.setItem(row, 2, QTableWidgetItem(f"${prop['loan']:,.2f}"))
-            self.prop_table.setItem(row, 3, QTableWidgetItem(f"${prop['equity']:,.2f}"))
+            self.prop_table.setItem(row, 2, loan_item)
+            self.prop_table.setItem(row, 3, QTableWidgetItem(f"${amount:,.2f}"))
+            self.prop_table.setItem(row, 4, QTableWidgetItem(f"{pct:.2f}%"))
             self.prop_table.setItem(
-                row, 4, QTableWidgetItem(f"{prop['equity_pct']:.2f}%")
+                row, 5, QTableWidgetItem(f"${projected_equity(prop, today=today):,.2f}")
             )
 
             # Action buttons
@@ -777,23 +1201,27 @@ class FinancialTab(QWidget):
             action_layout.addWidget(delete_btn)
             action_layout.setContentsMargins(0, 0, 0, 0)
 
-            self.prop_table.setCellWidget(row, 5, action_widget)
+            self.prop_table.setCellWidget(row, 6, action_widget)
 
-            total_equity += prop["equity"]
+            total_equity += amount
             total_value += prop["value"]
 
-        if data["properties"]:
-            total_equity_pct = (total_equity / total_value * 100) if total_value else 0
-            summary = [
-                f"<b>Property Summary:</b>",
-                f"Total Properties: {len(data['properties'])}",
-                f"Total Estimated Value: ${total_value:,.2f}",
-                f"Total Equity: ${total_equity:,.2f}",
-                f"Total Equity Percentage: {total_equity_pct:.2f}%",
-            ]
-            self.prop_summary.setText("<br>".join(summary))
-        else:
-            self.prop_summary.setText("<b>No properties added yet</b>")
+        with perf.timer("FinancialTab.prop_summary"):
+            if data["properties"]:
+                total_equity_pct = (
+                    (total_equity / total_value * 100) if total_value else 0
+                )
+                summary = [
+                    ("count", "Total Properties", str(len(data["properties"]))),
+                    ("value", "Total Estimated Value", format_currency(total_value)),
+                    ("equity", "Total Equity", format_currency(total_equity)),
+                    ("pct", "Total Equity Percentage", f"{total_equity_pct:.2f}%"),
+                ]
+                self.prop_summary.update_rows(summary)
+            else:
+                self.prop_summary.update_rows(
+                    [("empty", "No properties added yet", "")]
+                )
 
     def edit_property(self, index):
         prop = data["properties"][index]
@@ -810,11 +1238,17 @@ class FinancialTab(QWidget):
         layout.addRow("Address:", address_edit)
         layout.addRow("Estimated Value:", value_edit)
         layout.addRow("Loan Balance:", loan_edit)
+        loan_terms = add_loan_term_rows(layout, prop)
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(
             lambda: self.save_property_edit(
-                index, address_edit.text(), value_edit.text(), loan_edit.text(), dialog
+                index,
+                address_edit.text(),
+                value_edit.text(),
+                loan_edit.text(),
+                dialog,
+                *[edit.text() for edit in loan_terms],
             )
         )
         buttons.rejected.connect(dialog.reject)
@@ -822,7 +1256,10 @@ class FinancialTab(QWidget):
 
         dialog.exec_()
 
-    def save_property_edit(self, index, address, value, loan, dialog):
+    @perf.timed()
+    def save_property_edit(
+        self, index, address, value, loan, dialog, rate="", term="", start="", extra=""
+    ):
         if not address:
             QMessageBox.warning(self, "Error", "Address cannot be empty")
             return
@@ -836,20 +1273,40 @@ class FinancialTab(QWidget):
             )
             return
 
-        equity = value - loan
-        equity_pct = (equity / value * 100) if value else 0
+        loan_terms = self.parse_loan_terms(rate, term, start, extra)
+        if loan_terms is None:
+            return
 
-        data["properties"][index] = {
-            "address": address,
-            "value": value,
-            "loan": loan,
-            "equity": equity,
-            "equity_pct": equity_pct,
-        }
+        prop = {"address": address, "value": value, "loan": loan, **loan_terms}
+        data["properties"][index] = prop
         save_data()
         self.load_properties()
         dialog.accept()
 
+    def parse_loan_terms(self, rate, term, start, extra):
+        """Loan term fields of a property dialog, or None after a warning."""
+        if not term.strip():
+            return {}
+        try:
+            loan_terms = {
+                "rate": float(rate) if rate.strip() else 0.0,
+                "term": float(term),
+                "start_date": datetime.date.fromisoformat(start.strip()).isoformat(),
+                "extra": float(extra) if extra.strip() else 0.0,
+            }
+        except ValueError:
+            QMessageBox.warning(
+                self,
+                "Error",
+                "Please enter a valid rate, term, start date (YYYY-MM-DD) "
+                "and extra payment",
+            )
+            return None
+        if loan_terms["term"] <= 0:
+            QMessageBox.warning(self, "Error", "The loan term must be positive")
+            return None
+        return loan_terms
+
     def delete_property(self, index):
         reply = QMessageBox.question(
             self,
@@ -898,6 +1355,7 @@ class FinancialTab(QWidget):
 
         dialog.exec_()
 
+    @perf.timed()
     def add_account_from_dialog(self, name, acc_type, institution, balance, dialog):
         try:
             balance = float(balance)
@@ -909,18 +1367,19 @@ class FinancialTab(QWidget):
             QMessageBox.warning(self, "Error", "Account name is required")
             return
 
-        data["accounts"].append(
-            {
-                "name": name,
-                "type": acc_type,
-                "institution": institution,
-                "balance": balance,
-            }
-        )
+        account = {
+            "name": name,
+            "type": acc_type,
+            "institution": institution,
+            "balance": balance,
+        }
+        ensure_id(account)
+        data["accounts"].append(account)
         save_data()
         self.load_accounts()
         dialog.accept()
 
+    @perf.timed()
     def load_accounts(self):
         self.acc_table.setRowCount(0)
         total_balance = 0
@@ -928,11 +1387,12 @@ class FinancialTab(QWidget):
         for i, acc in enumerate(data["accounts"]):
             row = self.acc_table.rowCount()
             self.acc_table.insertRow(row)
+            balance = ledger.balance(acc)
 
             self.acc_table.setItem(row, 0, QTableWidgetItem(acc["name"]))
             self.acc_table.setItem(row, 1, QTableWidgetItem(acc["type"]))
             self.acc_table.setItem(row, 2, QTableWidgetItem(acc["institution"]))
-            self.acc_table.setItem(row, 3, QTableWidgetItem(f"${acc['balance']:,.2f}"))
+            self.acc_table.setItem(row, 3, self.balance_item(acc, balance))
 
             # Action buttons
             action_widget = QWidget()
@@ -950,17 +1410,17 @@ class FinancialTab(QWidget):
 
             self.acc_table.setCellWidget(row, 4, action_widget)
 
-            total_balance += acc["balance"]
+            total_balance += balance
 
-        if data["accounts"]:
-            summary = [
-                f"<b>Account Summary:</b>",
-                f"Total Accounts: {len(data['accounts'])}",
-                f"Total Balance: ${total_balance:,.2f}",
-            ]
-            self.acc_summary.setText("<br>".join(summary))
-        else:
-            self.acc_summary.setText("<b>No accounts added yet</b>")
+        with perf.timer("FinancialTab.acc_summary"):
+            if data["accounts"]:
+                summary = [
+                    ("count", "Total Accounts", str(len(data["accounts"]))),
+                    ("balance", "Total Balance", format_currency(total_balance)),
+                ]
+                self.acc_summary.update_rows(summary)
+            else:
+                self.acc_summary.update_rows([("empty", "No accounts added yet", "")])
 
     def edit_account(self, index):
         acc = data["accounts"][index]
@@ -1000,6 +1460,7 @@ class FinancialTab(QWidget):
 
         dialog.exec_()
 
+    @perf.timed()
     def save_account_edit(self, index, name, acc_type, institution, balance, dialog):
         if not name:
             QMessageBox.warning(self, "Error", "Account name cannot be empty")
@@ -1011,12 +1472,9 @@ class FinancialTab(QWidget):
             QMessageBox.warning(self, "Error", "Please enter a valid balance")
             return
 
-        data["accounts"][index] = {
-            "name": name,
-            "type": acc_type,
-            "institution": institution,
-            "balance": balance,
-        }
+        acc = data["accounts"][index]
+        acc.update({"name": name, "type": acc_type, "institution": institution})
+        ledger.set_balance(acc, balance)
         save_data()
         self.load_accounts()
         dialog.close()
@@ -1035,6 +1493,467 @@ class FinancialTab(QWidget):
             save_data()
             self.load_accounts()
 
+    def show_payoff_dialog(self):
+        if not data["credit_cards"]:
+            QMessageBox.warning(self, "Error", "Add a credit card first")
+            return
+        PayoffDialog(self).exec_()
+
+    def show_import_dialog(self):
+        folder = QFileDialog.getExistingDirectory(
+            self, "Statement Folder", default_folder()
+        )
+        if folder:
+            self.import_statements_from(folder)
+
+    @perf.timed()
+    def import_statements_from(self, folder):
+        back_up("before statement import")
+        summary = import_statements(folder)
+        if summary["imported"]:
+            save_data()
+            self.load_credit_cards()
+            self.load_accounts()
+
+        lines = [
+            f"Files read: {summary['files']}",
+            f"Transactions imported: {summary['imported']}",
+            f"Already imported: {summary['duplicates']}",
+        ]
+        lines += [f"Skipped {reason}" for reason in summary["skipped"]]
+        QMessageBox.information(self, "Statement Import", "\n".join(lines))
+
+    def show_report_dialog(self):
+        year, ok = QInputDialog.getInt(
+            self, "Year-End Report", "Year:", QDate.currentDate().year() - 1, 1900, 9999
+        )
+        if not ok:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Report",
+            f"report-{year}.pdf",
+            "PDF (*.pdf);;HTML (*.html);;CSV (*.csv)",
+        )
+        if path:
+            self.start_report(year, path)
+
+    def start_report(self, year, path, workers=None):
+        try:
+            reports.format_of(path)
+        except ValueError:
+            QMessageBox.warning(
+                self, "Error", "Reports can be saved as PDF, HTML or CSV"
+            )
+            return None
+        self.report_runner = ReportRunner(year, path, self, workers)
+        return self.report_runner
+
+    def balance_item(self, record, balance):
+        """Balance cell with the latest transactions as its tooltip."""
+        item = QTableWidgetItem(f"${balance:,.2f}")
+        entries = ledger.entries(record)[-RECENT_TRANSACTIONS:]
+        if entries:
+            item.setToolTip(
+                "<br>".join(
+                    f"{entry['date']}  {format_currency(entry['amount'])}  "
+                    f"{entry['memo']}"
+                    for entry in reversed(entries)
+                )
+            )
+        return item
+
+    def show_add_transaction_dialog(self, collection):
+        if not data[collection]:
+            QMessageBox.warning(self, "Error", "Add an account or card first")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Add Transaction")
+        dialog.setMinimumWidth(400)
+        layout = QFormLayout(dialog)
+
+        record_combo = QComboBox()
+        for record in data[collection]:
+            if collection == "credit_cards":
+                record_combo.addItem(f"{record['owner']} - {record['card_name']}")
+            else:
+                record_combo.addItem(f"{record['name']} ({record['institution']})")
+        date_edit = QLineEdit(QDate.currentDate().toString("yyyy-MM-dd"))
+        date_edit.setPlaceholderText("YYYY-MM-DD")
+        amount_edit = QLineEdit()
+        if collection == "credit_cards":
+            amount_edit.setPlaceholderText("Charges positive, payments negative")
+        else:
+            amount_edit.setPlaceholderText("Deposits positive, withdrawals negative")
+        memo_edit = QLineEdit()
+        category_combo = category_combo_box()
+
+        layout.addRow("Account:", record_combo)
+        layout.addRow("Date:", date_edit)
+        layout.addRow("Amount:", amount_edit)
+        layout.addRow("Memo:", memo_edit)
+        layout.addRow("Budget Category:", category_combo)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(
+            lambda: self.add_transaction_from_dialog(
+                collection,
+                record_combo.currentIndex(),
+                date_edit.text(),
+                amount_edit.text(),
+                memo_edit.text(),
+                dialog,
+                category_combo.currentData(),
+            )
+        )
+        buttons.rejected.connect(dialog.reject)
+        layout.addRow(buttons)
+
+        dialog.exec_()
+
+    @perf.timed()
+    def add_transaction_from_dialog(
+        self, collection, index, date, amount, memo, dialog, category=""
+    ):
+        amount = validate_float(amount)
+        if amount is None:
+            QMessageBox.warning(self, "Error", "Please enter a valid amount")
+            return
+
+        if not QDate.fromString(date, "yyyy-MM-dd").isValid():
+            QMessageBox.warning(self, "Error", "Date must be YYYY-MM-DD")
+            return
+
+        record = data[collection][index]
+        ledger.add(record, amount, date, memo, category)
+        save_data()
+        if collection == "credit_cards":
+            self.load_credit_cards()
+        else:
+            self.load_accounts()
+        dialog.accept()
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """Archived todos and bills, filtered by a search text."""
+
+    headers = ["Type", "Name", "Category", "Amount", "Due Date", "Done On"]
+
+    def __init__(self, entries, parent=None):
+        super().__init__(parent)
+        self.entries = entries
+        self.shown = entries
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self.shown = archive.search(self.entries, text)
+        self.endResetModel()
+
+    def rowCount(self, parent=None):
+        return len(self.shown)
+
+    def columnCount(self, parent=None):
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        entry = self.shown[index.row()]
+        return [
+            SOURCES[entry.collection][0],
+            entry.label,
+            entry.category,
+            format_currency(entry.amount) if entry.amount is not None else "",
+            entry.due_date or "No due date",
+            entry.done_on,
+        ][index.column()]
+
+
+class HistoryDialog(QDialog):
+    """Completed todos and paid bills that were moved to the archive."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("History")
+        self.setMinimumSize(700, 450)
+        layout = QVBoxLayout(self)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search archived tasks and bills")
+        self.search_edit.textChanged.connect(lambda: self.filter_history())
+        layout.addWidget(self.search_edit)
+
+        # The archive is only read now, when its history is asked for
+        try:
+            with perf.timer("HistoryDialog.load"):
+                entries = archive.index()
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Could not read the archive: {e}")
+            entries = []
+        self.model = HistoryTableModel(entries, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.count_label = QLabel()
+        layout.addWidget(self.count_label)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.filter_history()
+
+    @perf.timed()
+    def filter_history(self):
+        self.model.set_filter(self.search_edit.text())
+        self.count_label.setText(
+            f"{len(self.model.shown):,} of {len(self.model.entries):,} archived "
+            f"records · done more than {archive.ARCHIVE_DAYS} days ago"
+        )
+
+
+class BackupDialog(QDialog):
+    """Lists the backups of the data file and restores one of them."""
+
+    def __init__(self, parent=None, on_restore=None):
+        super().__init__(parent)
+        self.on_restore = on_restore
+        self.setWindowTitle("Backups")
+        self.setMinimumSize(600, 400)
+        layout = QVBoxLayout(self)
+
+        self.backup_table = QTableWidget(0, 3)
+        self.backup_table.setHorizontalHeaderLabels(["Created", "Reason", "Records"])
+        self.backup_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.backup_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.backup_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.backup_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.backup_table)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        backup_button = buttons.addButton("Back Up Now", QDialogButtonBox.ActionRole)
+        backup_button.clicked.connect(lambda: self.back_up_now())
+        restore_button = buttons.addButton("Restore", QDialogButtonBox.ActionRole)
+        restore_button.clicked.connect(lambda: self.restore_selected())
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.load_backups()
+
+    def load_backups(self):
+        self.manifests = backups.list_backups()
+        self.backup_table.setRowCount(len(self.manifests))
+        for row, manifest in enumerate(self.manifests):
+            created = manifest["created"].replace("T", " ")
+            records = backups.record_count(manifest)
+            self.backup_table.setItem(row, 0, QTableWidgetItem(created))
+            self.backup_table.setItem(row, 1, QTableWidgetItem(manifest["reason"]))
+            self.backup_table.setItem(row, 2, QTableWidgetItem(f"{records:,}"))
+
+    def back_up_now(self):
+        try:
+            backups.create(
+                storage.copy_data(), "manual", encrypted=storage.is_encrypted()
+            )
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Could not back up: {e}")
+        self.load_backups()
+
+    @perf.timed()
+    def restore_selected(self):
+        rows = self.backup_table.selectionModel().selectedRows()
+        if not rows:
+            QMessageBox.warning(self, "Error", "Select a backup to restore")
+            return
+        manifest = self.manifests[rows[0].row()]
+        answer = QMessageBox.question(
+            self,
+            "Restore Backup",
+            f"Replace all data with the backup from "
+            f"{manifest['created'].replace('T', ' ')}?\n"
+            "The current data is backed up first.",
+        )
+        if answer != QMessageBox.Yes:
+            return
+
+        # Let pending saves land first, or they would overwrite the restore
+        background.wait()
+        try:
+            backups.restore(manifest["id"])
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Could not restore the backup: {e}")
+            return
+        if self.on_restore:
+            self.on_restore()
+        self.accept()
+
+
+def describe_quick_add(adding):
+    """List text for a record the palette is about to add."""
+    record = adding.record
+    if adding.collection == "todos":
+        label = f"➕ Add task: {record['task']}"
+        details = []
+    else:
+        label = f"➕ Add bill: {record['name']}"
+        details = [format_currency(record["amount"])]
+    details.append(record.get("category"))
+    if record["due_date"]:
+        details.append(f"due {record['due_date']}")
+    details = [detail for detail in details if detail]
+    return label + (f" ({', '.join(details)})" if details else "")
+
+
+class CommandPalette(QDialog):
+    """Ctrl+K: jump to any record, or quick-add a task or bill."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.setWindowTitle("Find or Add")
+        self.setMinimumWidth(560)
+        layout = QVBoxLayout(self)
+
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText(
+            "Search tasks, bills, cards, accounts and properties, or add a task"
+        )
+        self.query_edit.textChanged.connect(lambda: self.update_results())
+        self.query_edit.returnPressed.connect(lambda: self.activate())
+        layout.addWidget(self.query_edit)
+
+        self.result_list = QListWidget()
+        self.result_list.itemActivated.connect(lambda: self.activate())
+        layout.addWidget(self.result_list)
+
+        self.hint = QLabel()
+        self.hint.setStyleSheet("color: #555;")
+        layout.addWidget(self.hint)
+
+        with perf.timer("CommandPalette.sync"):
+            search_index.sync()
+        self.update_results()
+
+    def keyPressEvent(self, event):
+        # The query keeps the focus; the arrows move through the results
+        if event.key() in (Qt.Key_Up, Qt.Key_Down) and self.result_list.count():
+            step = -1 if event.key() == Qt.Key_Up else 1
+            row = self.result_list.currentRow() + step
+            self.result_list.setCurrentRow(
+                max(0, min(row, self.result_list.count() - 1))
+            )
+            return
+        super().keyPressEvent(event)
+
+    @perf.timed()
+    def update_results(self):
+        text = self.query_edit.text()
+        self.result_list.clear()
+        self.hint.setText(
+            "Enter opens a result · add a task with #Category and "
+            "due:YYYY-MM-DD, or a bill with $amount"
+        )
+        if not text.strip():
+            return
+
+        items = []
+        for result in search_index.search(text):
+            kind = SOURCES[result.collection][0]
+            item = QListWidgetItem(f"{kind}: {result.label}")
+            item.setData(Qt.UserRole, result)
+            items.append(item)
+
+        try:
+            adding = parse_quick_add(text, category_names())
+        except ValueError as e:
+            self.hint.setText(str(e))
+        else:
+            item = QListWidgetItem(describe_quick_add(adding))
+            item.setData(Qt.UserRole, adding)
+            # Text with #, due: or $ is meant as a new record
+            items.insert(0 if has_markers(text) else len(items), item)
+
+        for item in items:
+            self.result_list.addItem(item)
+        self.result_list.setCurrentRow(0)
+
+    def activate(self):
+        item = self.result_list.currentItem()
+        if item is None:
+            return
+        choice = item.data(Qt.UserRole)
+        self.accept()
+        if isinstance(choice, QuickAdd):
+            self.app.quick_add(choice.collection, choice.record)
+        else:
+            self.app.open_record(choice.collection, choice.record)
+
+
+class ReportRunner:
+    """Aggregates a year-end report in the background.
+
+    The months are split up, and their records copied, on the GUI thread,
+    then aggregated by worker processes from a background job, so the
+    progress dialog stays live while the data goes on changing.
+    """
+
+    def __init__(self, year, path, parent, workers=None):
+        self.year = year
+        self.path = path
+        self.parent = parent
+        self.finished = False
+        parts = reports.partitions(year)
+
+        self.progress = QProgressDialog(
+            f"Aggregating {year}...", "Cancel", 0, len(parts), parent
+        )
+        self.progress.setWindowTitle("Year-End Report")
+        self.progress.setWindowModality(Qt.WindowModal)
+        self.progress.setMinimumDuration(0)
+        self.progress.canceled.connect(self.cancel)
+
+        self.job = background.submit(
+            reports.aggregate_report,
+            year,
+            parts,
+            reports.balances(year),
+            workers,
+            report_progress,
+            key="report",
+            priority=LOW,
+            on_result=self.save,
+            on_error=self.failed,
+            on_progress=lambda done, total: self.progress.setValue(done),
+        )
+
+    def save(self, report):
+        self.finished = True
+        try:
+            reports.write_report(report, self.path)
+        except (OSError, ValueError) as e:
+            self.failed(e)
+            return
+        self.progress.setValue(self.progress.maximum())
+        QMessageBox.information(
+            self.parent, "Year-End Report", f"Report saved to {self.path}"
+        )
+
+    def failed(self, error):
+        self.finished = True
+        self.progress.reset()
+        QMessageBox.warning(self.parent, "Error", f"Could not write report: {error}")
+
+    def cancel(self):
+        if not self.finished:
+            self.finished = True
+            background.cancel(self.job)
+
 
 class BillsTab(QWidget):
     def __init__(self):
@@ -1048,9 +1967,9 @@ class BillsTab(QWidget):
         content_layout = QVBoxLayout(content)
 
         # Bills Table
-        self.bills_table = QTableWidget(0, 5)
+        self.bills_table = QTableWidget(0, 6)
         self.bills_table.setHorizontalHeaderLabels(
-            ["Bill Name", "Amount", "Due Date", "Paid", "Actions"]
+            ["Bill Name", "Category", "Amount", "Due Date", "Paid", "Actions"]
         )
         self.bills_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         content_layout.addWidget(self.bills_table)
@@ -1081,15 +2000,21 @@ class BillsTab(QWidget):
         amount_edit = QLineEdit()
         due_edit = QLineEdit()
         due_edit.setPlaceholderText("YYYY-MM-DD")
+        category_combo = category_combo_box()
 
         layout.addRow("Bill Name:", name_edit)
         layout.addRow("Amount:", amount_edit)
         layout.addRow("Due Date:", due_edit)
+        layout.addRow("Budget Category:", category_combo)
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(
             lambda: self.add_bill_from_dialog(
-                name_edit.text(), amount_edit.text(), due_edit.text(), dialog
+                name_edit.text(),
+                amount_edit.text(),
+                due_edit.text(),
+                dialog,
+                category_combo.currentData(),
             )
         )
         buttons.rejected.connect(dialog.reject)
@@ -1097,7 +2022,8 @@ class BillsTab(QWidget):
 
         dialog.exec_()
 
-    def add_bill_from_dialog(self, name, amount, due_date, dialog):
+    @perf.timed()
+    def add_bill_from_dialog(self, name, amount, due_date, dialog, category=""):
         try:
             amount = float(amount)
         except ValueError:
@@ -1115,80 +2041,109 @@ class BillsTab(QWidget):
             except:
                 due_date = ""
 
-        data["bills"].append(
-            {"name": name, "amount": amount, "due_date": due_date, "paid": False}
-        )
+        bill = {"name": name, "amount": amount, "due_date": due_date, "paid": False}
+        if category:
+            bill["category"] = category
+        data["bills"].append(bill)
+        rollup.bill_added(bill)
         save_data()
         self.load_bills()
         dialog.accept()
 
+    @perf.timed()
     def load_bills(self):
+        charts.invalidate("bills")
         self.bills_table.setRowCount(0)
-        total_amount = 0
+        colors = category_colors()
 
-        for i, bill in enumerate(data["bills"]):
-            row = self.bills_table.rowCount()
+        for row in range(len(data["bills"])):
             self.bills_table.insertRow(row)
+            self.show_bill(row, colors)
+        self.show_total()
+
+    def records_changed(self, changed, added):
+        """Redraw the rows of changed bills and add rows for new ones."""
+        charts.invalidate("bills")
+        colors = category_colors()
+        for row in range(len(data["bills"]) - added, len(data["bills"])):
+            self.bills_table.insertRow(row)
+            self.show_bill(row, colors)
+        for row in changed:
+            self.show_bill(row, colors)
+        self.show_total()
 
-            # Bill Name
-            name_item = QTableWidgetItem(bill["name"])
-            name_item.setFlags(name_item.flags() ^ Qt.ItemIsEditable)
-            self.bills_table.setItem(row, 0, name_item)
-
-            # Amount
-            amount_item = QTableWidgetItem(f"${bill['amount']:,.2f}")
-            amount_item.setFlags(amount_item.flags() ^ Qt.ItemIsEditable)
-            self.bills_table.setItem(row, 1, amount_item)
-
-            # Due Date
-            due_date = bill["due_date"] if bill["due_date"] else "No due date"
-            due_item = QTableWidgetItem(due_date)
-            due_item.setFlags(due_item.flags() ^ Qt.ItemIsEditable)
-
-            # Highlight overdue bills in red
-            if bill["due_date"] and not bill["paid"]:
-                due_date = QDate.fromString(bill["due_date"], "yyyy-MM-dd")
-                if due_date < QDate.currentDate():
-                    due_item.setForeground(QColor(255, 0, 0))
-
-            self.bills_table.setItem(row, 2, due_item)
-
-            # Paid checkbox
-            checkbox = QCheckBox()
-            checkbox.setChecked(bill["paid"])
-            checkbox.stateChanged.connect(
-                lambda state, idx=i: self.toggle_paid(idx, state)
-            )
-            cell_widget = QWidget()
-            layout = QHBoxLayout(cell_widget)
-            layout.addWidget(checkbox)
-            layout.setAlignment(Qt.AlignCenter)
-            layout.setContentsMargins(0, 0, 0, 0)
-            self.bills_table.setCellWidget(row, 3, cell_widget)
-
-            # Action buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
+    def show_total(self):
+        total_amount = sum(bill["amount"] for bill in data["bills"] if not bill["paid"])
+        self.total_label.setText(f"<b>Monthly Total: ${total_amount:,.2f}</b>")
 
-            edit_btn = QPushButton("Edit")
-            edit_btn.clicked.connect(lambda _, idx=i: self.edit_bill(idx))
+    def show_bill(self, row, colors):
+        """Fill a row of the table with the bill at that index."""
+        bill = data["bills"][row]
+
+        # Bill Name
+        name_item = QTableWidgetItem(bill["name"])
+        name_item.setFlags(name_item.flags() ^ Qt.ItemIsEditable)
+        self.bills_table.setItem(row, 0, name_item)
+
+        # Budget category, in its To-Do colour
+        category = bill.get("category", "")
+        category_item = QTableWidgetItem(category)
+        category_item.setFlags(category_item.flags() ^ Qt.ItemIsEditable)
+        if category in colors:
+            category_item.setForeground(QColor(colors[category]))
+        self.bills_table.setItem(row, 1, category_item)
+
+        # Amount
+        amount_item = QTableWidgetItem(f"${bill['amount']:,.2f}")
+        amount_item.setFlags(amount_item.flags() ^ Qt.ItemIsEditable)
+        self.bills_table.setItem(row, 2, amount_item)
+
+        # Due Date
+        due_date = bill["due_date"] if bill["due_date"] else "No due date"
+        due_item = QTableWidgetItem(due_date)
+        due_item.setFlags(due_item.flags() ^ Qt.ItemIsEditable)
+
+        # Highlight overdue bills in red
+        if bill["due_date"] and not bill["paid"]:
+            due_date = QDate.fromString(bill["due_date"], "yyyy-MM-dd")
+            if due_date < QDate.currentDate():
+                due_item.setForeground(QColor(255, 0, 0))
+
+        self.bills_table.setItem(row, 3, due_item)
+
+        # Paid checkbox
+        checkbox = QCheckBox()
+        checkbox.setChecked(bill["paid"])
+        checkbox.stateChanged.connect(
+            lambda state, idx=row: self.toggle_paid(idx, state)
+        )
+        cell_widget = QWidget()
+        layout = QHBoxLayout(cell_widget)
+        layout.addWidget(checkbox)
+        layout.setAlignment(Qt.AlignCenter)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.bills_table.setCellWidget(row, 4, cell_widget)
 
-            delete_btn = QPushButton("Delete")
-            delete_btn.clicked.connect(lambda _, idx=i: self.delete_bill(idx))
+        # Action buttons
+        action_widget = QWidget()
+        action_layout = QHBoxLayout(action_widget)
 
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(delete_btn)
-            action_layout.setContentsMargins(0, 0, 0, 0)
+        edit_btn = QPushButton("Edit")
+        edit_btn.clicked.connect(lambda _, idx=row: self.edit_bill(idx))
 
-            self.bills_table.setCellWidget(row, 4, action_widget)
+        delete_btn = QPushButton("Delete")
+        delete_btn.clicked.connect(lambda _, idx=row: self.delete_bill(idx))
 
-            if not bill["paid"]:
-                total_amount += bill["amount"]
+        action_layout.addWidget(edit_btn)
+        action_layout.addWidget(delete_btn)
+        action_layout.setContentsMargins(0, 0, 0, 0)
 
-        self.total_label.setText(f"<b>Monthly Total: ${total_amount:,.2f}</b>")
+        self.bills_table.setCellWidget(row, 5, action_widget)
 
+    @perf.timed()
     def toggle_paid(self, index, state):
         data["bills"][index]["paid"] = state == Qt.Checked
+        archive.stamp("bills", data["bills"][index])
         save_data()
         self.load_bills()
 
@@ -1204,15 +2159,22 @@ class BillsTab(QWidget):
         amount_edit = QLineEdit(str(bill["amount"]))
         due_edit = QLineEdit(bill["due_date"])
         due_edit.setPlaceholderText("YYYY-MM-DD")
+        category_combo = category_combo_box(bill.get("category", ""))
 
         layout.addRow("Bill Name:", name_edit)
         layout.addRow("Amount:", amount_edit)
         layout.addRow("Due Date:", due_edit)
+        layout.addRow("Budget Category:", category_combo)
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(
             lambda: self.save_bill_edit(
-                index, name_edit.text(), amount_edit.text(), due_edit.text(), dialog
+                index,
+                name_edit.text(),
+                amount_edit.text(),
+                due_edit.text(),
+                dialog,
+                category_combo.currentData(),
             )
         )
         buttons.rejected.connect(dialog.reject)
@@ -1220,7 +2182,8 @@ class BillsTab(QWidget):
 
         dialog.exec_()
 
-    def save_bill_edit(self, index, name, amount, due_date, dialog):
+    @perf.timed()
+    def save_bill_edit(self, index, name, amount, due_date, dialog, category=""):
         if not name:
             QMessageBox.warning(self, "Error", "Bill name cannot be empty")
             return
@@ -1238,12 +2201,20 @@ class BillsTab(QWidget):
             except:
                 due_date = ""
 
-        data["bills"][index] = {
+        previous = data["bills"][index]
+        bill = {
             "name": name,
             "amount": amount,
             "due_date": due_date,
-            "paid": data["bills"][index]["paid"],
+            "paid": previous["paid"],
         }
+        if category:
+            bill["category"] = category
+        if "paid_on" in previous:
+            bill["paid_on"] = previous["paid_on"]
+        rollup.bill_removed(previous)
+        data["bills"][index] = bill
+        rollup.bill_added(bill)
         save_data()
         self.load_bills()
         dialog.accept()
@@ -1258,11 +2229,644 @@ class BillsTab(QWidget):
         )
 
         if reply == QMessageBox.Yes:
-            data["bills"].pop(index)
+            rollup.bill_removed(data["bills"].pop(index))
             save_data()
             self.load_bills()
 
 
+class PayoffDialog(QDialog):
+    """What-if payoff plans for all credit cards."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Debt Payoff Planner")
+        self.setMinimumSize(700, 500)
+        layout = QVBoxLayout(self)
+
+        form_layout = QFormLayout()
+        minimum = sum(card["payment"] for card in data["credit_cards"])
+        self.budget_edit = QLineEdit(f"{minimum:.2f}")
+        self.budget_edit.textChanged.connect(lambda: self.update_plan())
+        self.strategy_combo = QComboBox()
+        self.strategy_combo.addItem("Avalanche (highest APR first)", "avalanche")
+        self.strategy_combo.addItem("Snowball (lowest balance first)", "snowball")
+        self.strategy_combo.currentIndexChanged.connect(lambda: self.update_plan())
+        form_layout.addRow("Monthly Payment Budget:", self.budget_edit)
+        form_layout.addRow("Strategy:", self.strategy_combo)
+        layout.addLayout(form_layout)
+
+        self.plan_table = QTableWidget(0, 5)
+        self.plan_table.setHorizontalHeaderLabels(
+            ["Owner", "Card Name", "APR (%)", "Paid Off In", "Interest"]
+        )
+        self.plan_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.plan_table)
+
+        self.plan_summary = QLabel()
+        layout.addWidget(self.plan_summary)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.update_plan()
+
+    def update_plan(self):
+        budget = validate_float(self.budget_edit.text())
+        if budget is None:
+            self.plan_summary.setText("<b>Enter a valid monthly budget</b>")
+            return
+
+        # Only the newest plan matters while the budget is being typed; one
+        # already running still delivers, so it is shown with its own cards
+        cards = list(data["credit_cards"])
+        background.submit(
+            simulate,
+            *card_terms(cards),
+            budget,
+            self.strategy_combo.currentData(),
+            key="payoff",
+            on_result=lambda result: self.show_plan(result, cards),
+        )
+
+    @perf.timed()
+    def show_plan(self, result, cards):
+        self.plan_table.setRowCount(len(cards))
+        for row, card in enumerate(cards):
+            months = result.payoff_months[row]
+            self.plan_table.setItem(row, 0, QTableWidgetItem(card["owner"]))
+            self.plan_table.setItem(row, 1, QTableWidgetItem(card["card_name"]))
+            self.plan_table.setItem(
+                row, 2, QTableWidgetItem(f"{card.get('apr', 0.0):.2f}")
+            )
+            self.plan_table.setItem(
+                row,
+                3,
+                QTableWidgetItem(f"{months} months" if months is not None else "Never"),
+            )
+            self.plan_table.setItem(
+                row, 4, QTableWidgetItem(format_currency(result.interest[row]))
+            )
+
+        if result.paid_off:
+            summary = [
+                f"<b>Debt-free in {result.months} months</b>",
+                f"Total Interest: {format_currency(result.total_interest)}",
+                f"Total Paid: {format_currency(result.total_paid)}",
+            ]
+        else:
+            summary = [
+                f"<b>Not paid off within {MAX_MONTHS} months at this budget</b>",
+                f"Interest so far: {format_currency(result.total_interest)}",
+            ]
+        self.plan_summary.setText("<br>".join(summary))
+
+
+class BudgetTab(QWidget):
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout()
+
+        # Create scroll area
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        content = QWidget()
+        content_layout = QVBoxLayout(content)
+
+        # Month navigation
+        self.month = QDate(QDate.currentDate().year(), QDate.currentDate().month(), 1)
+        nav_layout = QHBoxLayout()
+        self.prev_month_button = QPushButton("◀")
+        self.prev_month_button.clicked.connect(lambda: self.change_month(-1))
+        self.month_label = QLabel()
+        self.month_label.setAlignment(Qt.AlignCenter)
+        self.month_label.setStyleSheet("font-weight: bold; font-size: 14px;")
+        self.next_month_button = QPushButton("▶")
+        self.next_month_button.clicked.connect(lambda: self.change_month(1))
+        nav_layout.addWidget(self.prev_month_button)
+        nav_layout.addWidget(self.month_label)
+        nav_layout.addWidget(self.next_month_button)
+        content_layout.addLayout(nav_layout)
+
+        # Budget Table
+        self.budget_table = QTableWidget(0, 5)
+        self.budget_table.setHorizontalHeaderLabels(
+            ["Category", "Budget", "Spent", "Remaining", "Used (%)"]
+        )
+        self.budget_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        content_layout.addWidget(self.budget_table)
+
+        # Set Budget Button
+        self.set_budget_button = QPushButton("➕ Set Category Budget")
+        self.set_budget_button.setStyleSheet("font-weight: bold; font-size: 12px;")
+        self.set_budget_button.clicked.connect(self.show_set_budget_dialog)
+        content_layout.addWidget(self.set_budget_button)
+
+        self.budget_summary = QLabel()
+        content_layout.addWidget(self.budget_summary)
+
+        scroll.setWidget(content)
+        layout.addWidget(scroll)
+        self.setLayout(layout)
+        self.load_budget()
+
+    def change_month(self, months):
+        self.month = self.month.addMonths(months)
+        self.load_budget()
+
+    @perf.timed()
+    def load_budget(self):
+        month = self.month.toString("yyyy-MM")
+        self.month_label.setText(self.month.toString("MMMM yyyy"))
+        colors = category_colors()
+        report = rollup.month_report(month)
+
+        self.budget_table.setRowCount(0)
+        total_limit = 0
+        total_spent = 0
+        for category, limit, spent in report:
+            row = self.budget_table.rowCount()
+            self.budget_table.insertRow(row)
+            remaining = limit - spent
+
+            category_item = QTableWidgetItem(category)
+            if category in colors:
+                category_item.setForeground(QColor(colors[category]))
+            self.budget_table.setItem(row, 0, category_item)
+            self.budget_table.setItem(row, 1, QTableWidgetItem(format_currency(limit)))
+            self.budget_table.setItem(row, 2, QTableWidgetItem(format_currency(spent)))
+            remaining_item = QTableWidgetItem(format_currency(remaining))
+            if remaining < 0:
+                remaining_item.setForeground(QColor(255, 0, 0))
+            self.budget_table.setItem(row, 3, remaining_item)
+            self.budget_table.setItem(
+                row, 4, QTableWidgetItem(f"{calculate_credit_usage(spent, limit):.1f}%")
+            )
+
+            total_limit += limit
+            total_spent += spent
+
+        if report:
+            summary = [
+                "<b>Budget Summary:</b>",
+                f"Total Budget: {format_currency(total_limit)}",
+                f"Total Spent: {format_currency(total_spent)}",
+                f"Remaining: {format_currency(total_limit - total_spent)}",
+            ]
+            self.budget_summary.setText("<br>".join(summary))
+        else:
+            self.budget_summary.setText("<b>No budgets set yet</b>")
+
+    def show_set_budget_dialog(self):
+        if not category_names():
+            QMessageBox.warning(self, "Error", "Add a category in the To-Do tab first")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Set Category Budget")
+        dialog.setMinimumWidth(400)
+        layout = QFormLayout(dialog)
+
+        category_combo = QComboBox()
+        category_combo.addItems(category_names())
+        limit_edit = QLineEdit()
+        limit_edit.setPlaceholderText("Monthly limit (0 removes the budget)")
+
+        layout.addRow("Category:", category_combo)
+        layout.addRow("Monthly Limit:", limit_edit)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(
+            lambda: self.set_budget_from_dialog(
+                category_combo.currentText(), limit_edit.text(), dialog
+            )
+        )
+        buttons.rejected.connect(dialog.reject)
+        layout.addRow(buttons)
+
+        dialog.exec_()
+
+    @perf.timed()
+    def set_budget_from_dialog(self, category, limit, dialog):
+        limit = validate_float(limit)
+        if limit is None or limit < 0:
+            QMessageBox.warning(self, "Error", "Please enter a valid limit")
+            return
+
+        set_budget(category, limit)
+        save_data()
+        self.load_budget()
+        dialog.accept()
+
+
+class ForecastTab(QWidget):
+    HORIZONS = [("30 days", 30), ("90 days", 90), ("1 year", 365), ("2 years", 730)]
+
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout()
+
+        # Create scroll area
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        content = QWidget()
+        content_layout = QVBoxLayout(content)
+
+        form_layout = QFormLayout()
+        self.horizon_combo = QComboBox()
+        for label, days in self.HORIZONS:
+            self.horizon_combo.addItem(label, days)
+        self.horizon_combo.setCurrentIndex(1)
+        self.horizon_combo.currentIndexChanged.connect(lambda: self.load_forecast())
+        self.threshold_edit = QLineEdit("0")
+        self.threshold_edit.editingFinished.connect(lambda: self.load_forecast())
+        form_layout.addRow("Horizon:", self.horizon_combo)
+        form_layout.addRow("Warn Below:", self.threshold_edit)
+        content_layout.addLayout(form_layout)
+
+        # Upcoming payments and the balance after each
+        self.forecast_table = QTableWidget(0, 4)
+        self.forecast_table.setHorizontalHeaderLabels(
+            ["Date", "Description", "Amount", "Projected Balance"]
+        )
+        self.forecast_table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.Stretch
+        )
+        content_layout.addWidget(self.forecast_table)
+
+        self.forecast_summary = QLabel()
+        content_layout.addWidget(self.forecast_summary)
+
+        scroll.setWidget(content)
+        layout.addWidget(scroll)
+        self.setLayout(layout)
+        self.load_forecast()
+
+    @perf.timed()
+    def load_forecast(self):
+        threshold = validate_float(self.threshold_edit.text())
+        if threshold is None:
+            threshold = 0.0
+            self.threshold_edit.setText("0")
+        result = forecast(days=self.horizon_combo.currentData(), threshold=threshold)
+
+        self.forecast_table.setRowCount(len(result.events))
+        for row, (event, balance) in enumerate(result.events):
+            date_item = QTableWidgetItem(event.date.isoformat())
+            self.forecast_table.setItem(row, 0, date_item)
+            self.forecast_table.setItem(row, 1, QTableWidgetItem(event.label))
+            self.forecast_table.setItem(
+                row, 2, QTableWidgetItem(format_currency(event.amount))
+            )
+            balance_item = QTableWidgetItem(format_currency(balance))
+            if balance < threshold:
+                balance_item.setForeground(QColor(255, 0, 0))
+            self.forecast_table.setItem(row, 3, balance_item)
+
+        lowest_date, lowest = result.lowest
+        closing = result.days[-1][1]
+        summary = [
+            "<b>Cash-Flow Forecast:</b>",
+            f"Checking & Savings Today: {format_currency(result.opening)}",
+            f"Projected at {result.days[-1][0].isoformat()}: "
+            f"{format_currency(closing)}",
+            f"Lowest: {format_currency(lowest)} on {lowest_date.isoformat()}",
+        ]
+        if result.low_days:
+            summary.append(
+                f"<span style='color: red;'>Below {format_currency(threshold)} "
+                f"on {len(result.low_days)} days, first on "
+                f"{result.low_days[0][0].isoformat()}</span>"
+            )
+        self.forecast_summary.setText("<br>".join(summary))
+
+
+class ChartWidget(QWidget):
+    """A bar or line chart of one dashboard series, painted with QPainter."""
+
+    MARGIN = 40
+    BAR_WIDTH = 12  # narrowest bar before bars get downsampled
+    BAR_COLOR = QColor(70, 130, 180)
+    NEGATIVE_COLOR = QColor(200, 60, 60)
+
+    def __init__(self, title, series, kind="bar", value_format=format_currency):
+        super().__init__()
+        self.title = title
+        self.series = series
+        self.kind = kind
+        self.value_format = value_format
+        self.setMinimumSize(300, 220)
+
+    def plot_rect(self):
+        return self.rect().adjusted(self.MARGIN + 20, 28, -12, -self.MARGIN)
+
+    def points(self):
+        """The series, downsampled to what the plot area can show."""
+        width = self.plot_rect().width()
+        if self.kind == "bar":
+            width //= self.BAR_WIDTH
+        return charts.sampled(self.series, max(width, 1))
+
+    def paintEvent(self, event):
+        with perf.timer("ChartWidget.paint"):
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.drawText(
+                self.rect().adjusted(0, 4, 0, 0),
+                Qt.AlignHCenter | Qt.AlignTop,
+                self.title,
+            )
+            points = self.points()
+            if not points:
+                painter.drawText(self.rect(), Qt.AlignCenter, "No data yet")
+                return
+
+            rect = self.plot_rect()
+            values = [value for _, value in points]
+            low, high = min(0, min(values)), max(0, max(values))
+            if high == low:
+                high = low + 1
+
+            def y(value):
+                return rect.bottom() - (value - low) / (high - low) * rect.height()
+
+            # Axes with the extremes and the first/last labels
+            painter.setPen(Qt.gray)
+            painter.drawLine(rect.left(), int(y(0)), rect.right(), int(y(0)))
+            painter.drawLine(rect.bottomLeft(), rect.topLeft())
+            painter.drawText(
+                QRect(0, rect.top() - 8, rect.left() - 4, 16),
+                Qt.AlignRight | Qt.AlignVCenter,
+                self.value_format(high),
+            )
+            painter.drawText(
+                QRect(0, rect.bottom() - 8, rect.left() - 4, 16),
+                Qt.AlignRight | Qt.AlignVCenter,
+                self.value_format(low),
+            )
+
+            if self.kind == "bar":
+                self.paint_bars(painter, rect, points, y)
+            else:
+                self.paint_line(painter, rect, points, y)
+            painter.end()
+
+    def paint_bars(self, painter, rect, points, y):
+        step = rect.width() / len(points)
+        metrics = painter.fontMetrics()
+        for i, (label, value) in enumerate(points):
+            left = rect.left() + int(i * step) + 2
+            top, bottom = sorted((int(y(value)), int(y(0))))
+            color = self.BAR_COLOR if value >= 0 else self.NEGATIVE_COLOR
+            painter.fillRect(
+                QRect(left, top, max(int(step) - 4, 1), max(bottom - top, 1)), color
+            )
+            painter.setPen(Qt.black)
+            painter.drawText(
+                QRect(left, rect.bottom() + 4, int(step) - 4, 16),
+                Qt.AlignHCenter | Qt.AlignTop,
+                metrics.elidedText(label, Qt.ElideRight, int(step) - 4),
+            )
+
+    def paint_line(self, painter, rect, points, y):
+        step = rect.width() / max(len(points) - 1, 1)
+        line = QPolygonF(
+            [
+                QPointF(rect.left() + i * step, y(value))
+                for i, (_, value) in enumerate(points)
+            ]
+        )
+        painter.setPen(QPen(self.BAR_COLOR, 2))
+        painter.drawPolyline(line)
+        painter.setPen(Qt.black)
+        painter.drawText(
+            QRect(rect.left(), rect.bottom() + 4, rect.width(), 16),
+            Qt.AlignLeft | Qt.AlignTop,
+            points[0][0],
+        )
+        painter.drawText(
+            QRect(rect.left(), rect.bottom() + 4, rect.width(), 16),
+            Qt.AlignRight | Qt.AlignTop,
+            points[-1][0],
+        )
+
+
+class DashboardTab(QWidget):
+    def __init__(self):
+        super().__init__()
+        layout = QGridLayout()
+
+        def percent(value):
+            return f"{value:.0f}%"
+
+        self.charts = [
+            ChartWidget(
+                "Credit Usage by Owner", "credit_usage_by_owner", value_format=percent
+            ),
+            ChartWidget("Equity by Property", "equity_by_property"),
+            ChartWidget(
+                "Unpaid Bills by Month", "unpaid_bills_by_month", kind="line"
+            ),
+            ChartWidget(
+                "To-Do Completion by Category",
+                "todo_completion_by_category",
+                value_format=percent,
+            ),
+        ]
+        for i, chart in enumerate(self.charts):
+            layout.addWidget(chart, i // 2, i % 2)
+        self.setLayout(layout)
+
+    def load_dashboard(self):
+        # Charts repaint from the cached series; only invalidated ones recompute
+        for chart in self.charts:
+            chart.update()
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Exposes a registered collection (see registry.py) to a QTableView.
+
+    Its fields come first, then its computed columns and the actions.
+    """
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.fields = store.collection.fields
+        self.name = store.collection.name
+        computed = [label for label, _ in registry.COMPUTED[self.name]]
+        self.headers = [field.label for field in self.fields] + computed + ["Actions"]
+
+    def reset(self):
+        self.beginResetModel()
+        self.store.sync()
+        self.endResetModel()
+
+    def refresh_row(self, row):
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, len(self.headers) - 1)
+        )
+
+    def rows_appended(self, count):
+        last = len(self.store.sync()) - 1
+        self.beginInsertRows(QModelIndex(), last - count + 1, last)
+        self.endInsertRows()
+
+    def remove(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.store.remove(row)
+        self.endRemoveRows()
+
+    def rowCount(self, parent=None):
+        return len(data.get(self.name, []))
+
+    def columnCount(self, parent=None):
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        record = data[self.name][index.row()]
+        column = index.column()
+        if column < len(self.fields):
+            return registry.display(record.get(self.fields[column].name))
+        computed = self.store.computed(record)
+        if column < len(self.headers) - 1:
+            return registry.display(computed[column - len(self.fields)])
+        return None
+
+
+class CollectionTab(QWidget):
+    """Table, dialogs and summary of a registered collection."""
+
+    def __init__(self, collection):
+        super().__init__()
+        self.collection = collection
+        self.store = registry.store(collection.name)
+        layout = QVBoxLayout(self)
+
+        self.add_button = QPushButton(f"➕ Add New {collection.noun}")
+        self.add_button.setStyleSheet("font-weight: bold; font-size: 12px;")
+        self.add_button.clicked.connect(lambda: self.show_record_dialog())
+        layout.addWidget(self.add_button)
+
+        self.model = RecordTableModel(self.store, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(
+            self.model.columnCount() - 1,
+            ActionButtonsDelegate(
+                [
+                    ("Edit", lambda row: self.show_record_dialog(row)),
+                    ("Delete", lambda row: self.delete_record(row)),
+                ],
+                self.table,
+            ),
+        )
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.summary = None
+        if collection.totals:
+            self.summary = SummaryTable(f"{collection.noun} Summary")
+            layout.addWidget(self.summary)
+        self.load_records()
+
+    @perf.timed()
+    def load_records(self):
+        charts.invalidate(self.collection.name)
+        self.model.reset()
+        self.show_summary()
+
+    def show_summary(self):
+        if self.summary is not None:
+            self.summary.update_rows(self.store.summary())
+
+    def records_changed(self, changed, added):
+        """Redraw the rows of changed records and add rows for new ones."""
+        charts.invalidate(self.collection.name)
+        if added:
+            self.model.rows_appended(added)
+        for row in changed:
+            self.model.refresh_row(row)
+        self.show_summary()
+
+    def show_record_dialog(self, index=None):
+        """The add dialog, or the edit dialog of the record at index."""
+        record = {} if index is None else data[self.collection.name][index]
+        noun = self.collection.noun
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Add {noun}" if index is None else f"Edit {noun}")
+        layout = QFormLayout(dialog)
+
+        editors = {}
+        for field in self.collection.fields:
+            value = record.get(field.name, field.default)
+            if field.kind is bool:
+                editor = QCheckBox()
+                editor.setChecked(bool(value))
+            else:
+                editor = QLineEdit("" if value is None else str(value))
+                if field.kind == registry.DATE:
+                    editor.setPlaceholderText("YYYY-MM-DD")
+                if not field.required:
+                    editor.setPlaceholderText(
+                        f"{editor.placeholderText()} (optional)".strip()
+                    )
+            editors[field.name] = editor
+            layout.addRow(f"{field.label}:", editor)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(lambda: self.save_record(index, editors, dialog))
+        buttons.rejected.connect(dialog.reject)
+        layout.addRow(buttons)
+
+        dialog.exec_()
+
+    @perf.timed()
+    def save_record(self, index, editors, dialog):
+        values = {
+            name: editor.isChecked() if isinstance(editor, QCheckBox) else editor.text()
+            for name, editor in editors.items()
+        }
+        try:
+            record = self.store.record(values)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+
+        if index is None:
+            self.store.add(record)
+            self.model.rows_appended(1)
+        else:
+            self.store.replace(index, record)
+            self.model.refresh_row(index)
+        save_data()
+        charts.invalidate(self.collection.name)
+        self.show_summary()
+        dialog.accept()
+
+    def delete_record(self, index):
+        reply = QMessageBox.question(
+            self,
+            f"Delete {self.collection.noun}",
+            f"Are you sure you want to delete this {self.collection.noun.lower()}?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No,
+        )
+
+        if reply == QMessageBox.Yes:
+            self.model.remove(index)
+            save_data()
+            charts.invalidate(self.collection.name)
+            self.show_summary()
+
+
 class MainApp(QTabWidget):
     def __init__(self):
         super().__init__()
@@ -1272,17 +2876,428 @@ class MainApp(QTabWidget):
         self.todo_tab = ToDoTab()
         self.finance_tab = FinancialTab()
         self.bills_tab = BillsTab()
+        self.budget_tab = BudgetTab()
+        self.forecast_tab = ForecastTab()
+        self.dashboard_tab = DashboardTab()
 
         self.addTab(self.todo_tab, "To-Do List")
         self.addTab(self.finance_tab, "Financial Snapshot")
         self.addTab(self.bills_tab, "Monthly Bills")
+        self.addTab(self.budget_tab, "Budget")
+        self.addTab(self.forecast_tab, "Cash Flow")
+        self.addTab(self.dashboard_tab, "Dashboard")
+        # One tab per collection added by a plugin
+        self.collection_tabs = {}
+        for name, collection in registry.COLLECTIONS.items():
+            self.collection_tabs[name] = CollectionTab(collection)
+            self.addTab(self.collection_tabs[name], collection.title)
+        self.currentChanged.connect(self.tab_changed)
+
+        self.history_button = QPushButton("📜 History")
+        self.history_button.setToolTip("Archived tasks and bills")
+        self.history_button.clicked.connect(lambda: self.show_history())
+        self.backup_button = QPushButton("🗄️ Backups")
+        self.backup_button.setToolTip("Restore an automatic backup of your data")
+        self.backup_button.clicked.connect(lambda: self.show_backups())
+        corner = QWidget()
+        corner_layout = QHBoxLayout(corner)
+        corner_layout.setContentsMargins(0, 0, 0, 0)
+        corner_layout.addWidget(self.history_button)
+        corner_layout.addWidget(self.backup_button)
+        self.setCornerWidget(corner, Qt.TopLeftCorner)
+
+        self.palette_shortcut = QShortcut(QKeySequence("Ctrl+K"), self)
+        self.palette_shortcut.activated.connect(lambda: self.show_palette())
+        self.search_timer = None
+        self.api_server = None
+
+        # Views to refresh once a collection has finished loading
+        self.collection_views = {
+            "todos": [self.todo_tab.load_todos],
+            "categories": [
+                self.todo_tab.load_categories,
+                self.todo_tab.load_todos,
+                self.budget_tab.load_budget,
+            ],
+            "credit_cards": [self.finance_tab.load_credit_cards],
+            "properties": [self.finance_tab.load_properties],
+            "accounts": [self.finance_tab.load_accounts],
+            "bills": [self.bills_tab.load_bills],
+            "transactions": [
+                self.finance_tab.load_credit_cards,
+                self.finance_tab.load_accounts,
+            ],
+            "budgets": [self.budget_tab.load_budget],
+        }
+        for name, tab in self.collection_tabs.items():
+            self.collection_views[name] = [tab.load_records]
+
+        if perf.enabled:
+            self.setup_perf_overlay()
+
+    def start_backups(self, minutes=BACKUP_MINUTES):
+        """Back up the data every few minutes; unchanged data adds nothing."""
+        if minutes <= 0:
+            return
+        self.backup_timer = QTimer(self)
+        self.backup_timer.timeout.connect(lambda: back_up("scheduled"))
+        self.backup_timer.start(minutes * 60 * 1000)
+
+    def show_palette(self):
+        if self.search_timer is not None:
+            # The palette finishes the index itself
+            self.search_timer.stop()
+        CommandPalette(self).exec_()
+
+    def open_record(self, collection, record):
+        """Show a record's tab and open its edit dialog."""
+        editors = {
+            "todos": (self.todo_tab, self.todo_tab.edit_todo),
+            "bills": (self.bills_tab, self.bills_tab.edit_bill),
+            "credit_cards": (self.finance_tab, self.finance_tab.edit_credit_card),
+            "accounts": (self.finance_tab, self.finance_tab.edit_account),
+            "properties": (self.finance_tab, self.finance_tab.edit_property),
+        }
+        for name, tab in self.collection_tabs.items():
+            editors[name] = (tab, tab.show_record_dialog)
+        tab, edit = editors[collection]
+        for index, candidate in enumerate(data[collection]):
+            if candidate is record:
+                self.setCurrentWidget(tab)
+                edit(index)
+                return
+
+    @perf.timed()
+    def quick_add(self, collection, record):
+        data[collection].append(record)
+        if collection == "bills":
+            rollup.bill_added(record)
+        save_data()
+        self.refresh_collection(collection)
+
+    def index_in_background(self):
+        """Build the search index in slices, so the palette opens at once."""
+        steps = search_index.sync_steps()
+
+        def next_slice():
+            deadline = time.perf_counter() + LOAD_SLICE_MS / 1000
+            for _ in steps:
+                if time.perf_counter() >= deadline:
+                    return
+            self.search_timer.stop()
+
+        self.search_timer = QTimer(self)
+        self.search_timer.timeout.connect(next_slice)
+        self.search_timer.start(0)
+
+    def show_backups(self):
+        BackupDialog(self, on_restore=self.reload_data).exec_()
+
+    def show_history(self):
+        HistoryDialog(self).exec_()
+
+    def archive_old_records(self):
+        """Move todos and bills done long ago out of the data file."""
+        try:
+            moved = archive.sweep(data, encrypted=storage.is_encrypted())
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Could not archive old records: {e}")
+            return
+        if moved:
+            save_data()
+            self.refresh_collection("todos")
+            self.refresh_collection("bills")
+
+    def reload_data(self):
+        """Load the data file again and redraw every view."""
+        storage.load_data()
+        views = self.collection_views.values()
+        for refresh in dict.fromkeys(refresh for group in views for refresh in group):
+            refresh()
+        self.tab_changed(self.currentIndex())
+
+    def tab_changed(self, index):
+        # Bills and transactions change behind these views' back
+        if self.widget(index) is self.budget_tab:
+            self.budget_tab.load_budget()
+        elif self.widget(index) is self.forecast_tab:
+            self.forecast_tab.load_forecast()
+        elif self.widget(index) is self.dashboard_tab:
+            self.dashboard_tab.load_dashboard()
+
+    def setup_perf_overlay(self):
+        """Show the latest timings next to the tabs."""
+        self.recent_timings = OrderedDict()
+        self.perf_label = QLabel()
+        self.perf_label.setStyleSheet("color: #555; font-family: monospace;")
+        self.setCornerWidget(self.perf_label, Qt.TopRightCorner)
+        perf.listeners.append(self.note_timing)
+
+        # Repaint at a fixed rate rather than on every measurement
+        self.perf_timer = QTimer(self)
+        self.perf_timer.timeout.connect(self.update_perf_overlay)
+        self.perf_timer.start(500)
+
+    def note_timing(self, name, seconds):
+        self.recent_timings.pop(name, None)
+        self.recent_timings[name] = seconds
+        if len(self.recent_timings) > PERF_OVERLAY_ITEMS:
+            self.recent_timings.popitem(last=False)
+
+    def update_perf_overlay(self):
+        self.perf_label.setText(
+            "  |  ".join(
+                f"{name} {seconds * 1000:.1f} ms"
+                for name, seconds in reversed(self.recent_timings.items())
+            )
+        )
+
+    def continue_loading(self, loader, current=None):
+        """Finish a stream_load_data() generator in slices on the event loop."""
+        self.loader = loader
+        self.loading_collection = current
+        self.loading_timer = QTimer(self)
+        self.loading_timer.timeout.connect(self.load_next_slice)
+        self.loading_timer.start(0)
+
+    def load_next_slice(self):
+        deadline = time.perf_counter() + LOAD_SLICE_MS / 1000
+        try:
+            for name in self.loader:
+                if name != self.loading_collection:
+                    self.refresh_collection(self.loading_collection)
+                    self.loading_collection = name
+                if time.perf_counter() >= deadline:
+                    return
+        except ValueError as e:
+            # Quit rather than let a save overwrite the file with part of it
+            self.loading_timer.stop()
+            load_failed(e)
+            QApplication.exit(1)
+            return
+
+        self.loading_timer.stop()
+        self.refresh_collection(self.loading_collection)
+        # A restore point from before this session's edits
+        back_up("startup")
+        self.archive_old_records()
+        self.index_in_background()
+
+    def save_failed(self, error):
+        if isinstance(error, storage.ConflictError):
+            QMessageBox.warning(
+                self,
+                "Error",
+                f"{storage.data_file} was changed by another program, so your "
+                "last change was not saved. Showing the data as it is now.",
+            )
+            self.reload_data()
+            return
+        QMessageBox.warning(
+            self, "Error", f"Could not save {storage.data_file}: {error}"
+        )
+
+    def start_api(self, port=api.PORT):
+        """Serve the data over HTTP; requests are handled on this thread."""
+        self.main_thread = MainThread(self)
+        self.api_server = api.ApiServer(port=port, call=self.main_thread.call)
+        try:
+            self.api_server.start()
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not start the API: {e}")
+            return
+        api.listeners.append(self.api_changed)
+
+    def stop_api(self):
+        if self.api_server is not None:
+            api.listeners.remove(self.api_changed)
+            self.api_server.stop()
+            self.api_server = None
+
+    def api_changed(self, collection, changed, added):
+        views = {"todos": self.todo_tab, "bills": self.bills_tab}
+        views.update(self.collection_tabs)
+        views[collection].records_changed(changed, added)
+
+    def watch_data_file(self, interval_ms=WATCH_MS):
+        """Reload the data when another program, like cli.py, changes it."""
+        self.watch_timer = QTimer(self)
+        self.watch_timer.timeout.connect(lambda: self.reload_if_changed())
+        self.watch_timer.start(interval_ms)
+
+    def reload_if_changed(self):
+        # Our own save in progress looks like a change until it is done
+        if storage.loading or "save" in background.running:
+            return
+        if storage.changed_on_disk():
+            try:
+                self.reload_data()
+            except (OSError, ValueError) as e:
+                # Keep showing, and saving, the data as it was
+                QMessageBox.warning(
+                    self, "Error", f"Could not reload {storage.data_file}: {e}"
+                )
+
+    def refresh_collection(self, name):
+        for refresh in self.collection_views.get(name, []):
+            refresh()
+
+
+def load_failed(error):
+    QMessageBox.critical(None, "Error", f"Could not load {storage.data_file}:\n{error}")
+
+
+def load_first_screenful(loader):
+    """Stream todos until a screenful is in; return the current collection."""
+    current = None
+    seen_todos = False
+    for current in loader:
+        if current == "todos":
+            seen_todos = True
+        elif seen_todos:
+            break
+        if len(data["todos"]) >= FIRST_SCREENFUL:
+            break
+    return current
+
+
+def unlock_data_file():
+    """Ask for the passphrase of an encrypted data file; False to quit."""
+    path = storage.data_file
+    exists = os.path.exists(path)
+    encrypted = exists and storage.detect_format(path) == "encrypted"
+    if not encrypted and storage.data_format != "encrypted":
+        return True
+    if not encryption.available():
+        QMessageBox.critical(
+            None,
+            "Encryption Unavailable",
+            "Encrypted data files need the cryptography package "
+            "(pip install cryptography).",
+        )
+        return False
+    if not encrypted:
+        if encryption.passphrase:
+            return True
+        return choose_passphrase()
+    if encryption.passphrase and encryption.check_passphrase(
+        path, encryption.passphrase
+    ):
+        return True
+
+    while True:
+        secret, ok = QInputDialog.getText(
+            None,
+            "Unlock Data File",
+            f"Passphrase for {os.path.basename(path)}:",
+            QLineEdit.Password,
+        )
+        if not ok:
+            return False
+        if encryption.check_passphrase(path, secret):
+            encryption.passphrase = secret
+            return True
+        QMessageBox.warning(None, "Unlock Data File", "Wrong passphrase.")
+
+
+def choose_passphrase():
+    """Ask for a new passphrase, twice; False if cancelled."""
+    while True:
+        secret, ok = QInputDialog.getText(
+            None, "Encrypt Data File", "New passphrase:", QLineEdit.Password
+        )
+        if not ok:
+            return False
+        if not secret:
+            QMessageBox.warning(
+                None, "Encrypt Data File", "The passphrase cannot be empty."
+            )
+            continue
+        again, ok = QInputDialog.getText(
+            None, "Encrypt Data File", "Repeat the passphrase:", QLineEdit.Password
+        )
+        if not ok:
+            return False
+        if again == secret:
+            encryption.passphrase = secret
+            return True
+        QMessageBox.warning(None, "Encrypt Data File", "The passphrases do not match.")
 
 
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Family To-Do & Financial Snapshot")
+    parser.add_argument(
+        "--perf",
+        action="store_true",
+        help="show recent timings in the window and print a summary on exit",
+    )
+    parser.add_argument(
+        "--profile", metavar="PATH", help="write a cProfile dump of the session"
+    )
+    parser.add_argument(
+        "--encrypt",
+        action="store_true",
+        help="save the data file encrypted with a passphrase",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help=f"serve the data to other devices over HTTP (port {api.PORT})",
+    )
+    args, qt_args = parser.parse_known_args()
+    # Plugins add collections to the schema, so they come before any loading
+    registry.load_plugins()
+    if args.encrypt:
+        storage.data_format = "encrypted"
+    if args.perf:
+        perf.enabled = True
+    if args.profile or perf.profile_path:
+        perf.start_profiling(args.profile or perf.profile_path)
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    if not unlock_data_file():
+        sys.exit(1)
+
+    # Show the window as soon as the first screenful of todos is in
+    loader = stream_load_data()
+    try:
+        current = load_first_screenful(loader)
+    except ValueError as e:
+        load_failed(e)
+        sys.exit(1)
+
     main_window = MainApp()
+
+    def save_in_background(*args, **kwargs):
+        # Saves share a key, so a burst of edits writes the file once more
+        # after the save in progress rather than once per edit
+        background.submit(
+            write_data,
+            *args,
+            key="save",
+            priority=HIGH,
+            on_error=main_window.save_failed,
+            **kwargs,
+        )
+
+    storage.background_writer = save_in_background
+    main_window.stall_guard = StallGuard(parent=main_window)
+    main_window.start_backups()
+    main_window.watch_data_file()
+    if args.serve:
+        main_window.start_api()
+
     main_window.show()
-    sys.exit(app.exec_())
+    main_window.continue_loading(loader, current)
+    status = app.exec_()
+    main_window.stop_api()
+    # Let the last save finish
+    background.wait()
+
+    perf.stop_profiling()
+    if perf.enabled:
+        print(perf.report(), file=sys.stderr)
+    sys.exit(status)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,282 @@
+"""Declarative record collections, which plugins can add to the app.
+
+A plugin module describes each kind of record once:
+
+    from registry import DATE, Collection, Field, Total, computed, register
+
+    register(
+        Collection(
+            "vehicles",
+            "Vehicles",
+            "Vehicle",
+            fields=[
+                Field("name", "Name"),
+                Field("owner", "Owner"),
+                Field("value", "Value", float),
+                Field("renewal", "Insurance Renewal", DATE, required=False),
+            ],
+            totals=[
+                Total("Vehicles"),
+                Total("Total Value", "value"),
+                Total("Value", "value", by="owner"),
+            ],
+        )
+    )
+
+    @computed("vehicles", "Monthly Depreciation")
+    def depreciation(vehicle):
+        return vehicle["value"] / 60
+
+register() adds the collection to the schema, so its records are
+validated like any other, and to new data files, the palette's search
+and the API. The app gives it a tab with a table, add, edit and delete
+dialogs and a summary, all built from the fields (see CollectionTab).
+
+RecordStore is the engine behind those tabs. It turns typed text into
+valid records, and keeps the summary totals and computed columns up to
+date as records are added, replaced and removed, rather than going over
+the whole collection again.
+
+Plugins are the modules named in FINANCE_PLUGINS (comma-separated);
+load_plugins() imports them before the data file is read.
+"""
+import datetime
+import importlib
+import os
+from collections import defaultdict, namedtuple
+
+import schema
+import search
+from storage import data
+
+DATE = "date"
+KINDS = (str, float, int, bool, DATE)
+
+# kind is one of KINDS; optional fields may be missing from a record
+Field = namedtuple(
+    "Field",
+    ["name", "label", "kind", "required", "default"],
+    defaults=(str, True, None),
+)
+# Shown in the summary: the count of records when field is None, else the
+# sum of field; with by, one row per value of that field
+Total = namedtuple("Total", ["label", "field", "by"], defaults=(None, None))
+# noun names one record; label(record) is its name in searches, by
+# default the value of the first text field
+Collection = namedtuple(
+    "Collection",
+    ["name", "title", "noun", "fields", "totals", "label"],
+    defaults=((), None),
+)
+
+COLLECTIONS = {}
+# collection -> [(label, func(record) -> value)]
+COMPUTED = defaultdict(list)
+_stores = {}
+
+
+def register(collection):
+    """Add a collection to the app; returns it."""
+    if collection.name in schema.FIELDS:
+        raise ValueError(f"There already is a collection called {collection.name}")
+    kinds = {float: schema.NUMBER, DATE: str}
+    for field in collection.fields:
+        if field.kind not in KINDS:
+            raise ValueError(f"{field.name}: unknown kind {field.kind!r}")
+    schema.FIELDS[collection.name] = {
+        field.name: kinds.get(field.kind, field.kind)
+        for field in collection.fields
+        if field.required
+    }
+    schema.OPTIONAL_FIELDS[collection.name] = {
+        field.name: kinds.get(field.kind, field.kind)
+        for field in collection.fields
+        if not field.required
+    }
+    label = collection.label
+    if label is None:
+        first = next(field.name for field in collection.fields if field.kind is str)
+
+        def label(record):
+            return str(record.get(first, ""))
+
+    search.SOURCES[collection.name] = (collection.noun, label)
+    COLLECTIONS[collection.name] = collection
+    return collection
+
+
+def unregister(name):
+    """Remove a registered collection, for tests and plugin reloads."""
+    del COLLECTIONS[name]
+    COMPUTED.pop(name, None)
+    _stores.pop(name, None)
+    for registry in (schema.FIELDS, schema.OPTIONAL_FIELDS, search.SOURCES):
+        registry.pop(name, None)
+
+
+def computed(collection, label):
+    """Register func(record) -> value as a column of collection's table."""
+
+    def register_column(func):
+        COMPUTED[collection].append((label, func))
+        store = _stores.get(collection)
+        if store is not None:
+            store.cache.clear()
+        return func
+
+    return register_column
+
+
+def load_plugins(names=None):
+    """Import the plugin modules (default: those in FINANCE_PLUGINS)."""
+    if names is None:
+        names = os.environ.get("FINANCE_PLUGINS", "").split(",")
+    for name in names:
+        if name.strip():
+            importlib.import_module(name.strip())
+
+
+def parse(field, text):
+    """The value of field typed as text; raises ValueError if invalid.
+
+    Optional fields left empty give None.
+    """
+    if field.kind is bool:
+        return bool(text)
+    text = text.strip()
+    if not text:
+        if field.default is not None or not field.required:
+            return field.default
+        raise ValueError(f"{field.label} cannot be empty")
+    if field.kind is DATE:
+        try:
+            return datetime.date.fromisoformat(text).isoformat()
+        except ValueError:
+            raise ValueError(f"{field.label} must be a YYYY-MM-DD date")
+    if field.kind in (float, int):
+        try:
+            return field.kind(text.replace(",", ""))
+        except ValueError:
+            raise ValueError(f"{field.label} must be a number")
+    return text
+
+
+def display(value):
+    """value as shown in tables and summaries."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+class RecordStore:
+    """Records of one registered collection, with their totals.
+
+    Totals are running sums, updated by add(), replace() and remove();
+    computed columns are cached per record until it is replaced. Both
+    are rebuilt when the collection's list is replaced, as by a reload.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.records = None
+        self.sums = []  # per Total: a number, or {group: number}
+        self.counts = []  # per grouped Total: {group: records in it}
+        self.cache = {}  # id(record) -> computed values
+
+    def sync(self):
+        records = data.setdefault(self.collection.name, [])
+        if records is not self.records:
+            self.records = records
+            self.sums = [{} if total.by else 0 for total in self.collection.totals]
+            self.counts = [{} for _ in self.collection.totals]
+            self.cache = {}
+            for record in records:
+                self._count(record, 1)
+        return records
+
+    def _count(self, record, sign):
+        for i, total in enumerate(self.collection.totals):
+            amount = 1 if total.field is None else record.get(total.field) or 0
+            if total.by is None:
+                self.sums[i] += sign * amount
+                continue
+            group = record.get(total.by) or ""
+            sums, counts = self.sums[i], self.counts[i]
+            counts[group] = counts.get(group, 0) + sign
+            if counts[group]:
+                sums[group] = sums.get(group, 0) + sign * amount
+            else:
+                del counts[group], sums[group]
+
+    def record(self, values):
+        """A record of the typed values: {field name: text, or bool}.
+
+        Raises ValueError saying what is wrong with them.
+        """
+        record = {}
+        for field in self.collection.fields:
+            value = parse(field, values.get(field.name, ""))
+            if value is not None:
+                record[field.name] = value
+        found = schema.problems(self.collection.name, record)
+        if found:
+            raise ValueError("; ".join(found))
+        return record
+
+    def computed(self, record):
+        """Values of the computed columns for record."""
+        values = self.cache.get(id(record))
+        if values is None:
+            values = []
+            for _, func in COMPUTED[self.collection.name]:
+                try:
+                    values.append(func(record))
+                except (ArithmeticError, KeyError, TypeError, ValueError):
+                    values.append(None)  # shown empty
+            self.cache[id(record)] = values
+        return values
+
+    def add(self, record):
+        """Append record; returns its index."""
+        records = self.sync()
+        records.append(record)
+        self._count(record, 1)
+        return len(records) - 1
+
+    def replace(self, index, record):
+        records = self.sync()
+        self._count(records[index], -1)
+        self.cache.pop(id(records[index]), None)
+        records[index] = record
+        self._count(record, 1)
+
+    def remove(self, index):
+        records = self.sync()
+        record = records.pop(index)
+        self._count(record, -1)
+        self.cache.pop(id(record), None)
+        return record
+
+    def summary(self):
+        """(key, label, value) rows of the totals, for a SummaryModel."""
+        self.sync()
+        rows = []
+        for i, total in enumerate(self.collection.totals):
+            if total.by is None:
+                rows.append((i, total.label, display(self.sums[i])))
+                continue
+            for group, amount in self.sums[i].items():
+                label = f"{total.label}: {group or 'None'}"
+                rows.append(((i, group), label, display(amount)))
+        return rows
+
+
+def store(name):
+    """The shared RecordStore of a registered collection."""
+    if name not in _stores:
+        _stores[name] = RecordStore(COLLECTIONS[name])
+    return _stores[name]
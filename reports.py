@@ -0,0 +1,314 @@
+"""Year-end financial reports as CSV, HTML or PDF.
+
+The year's transactions and bills are split by month and each month is
+aggregated on its own, in a process pool, before the partial results
+are merged. Balances at the end of the year come from the ledger index
+and are cheap enough to compute in the calling process.
+
+Usage: python reports.py YEAR [-o report.pdf] [--format pdf] [--workers N]
+"""
+import argparse
+import csv
+import datetime
+import html
+import multiprocessing
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import storage
+from archive import archived_bills
+from budget import month_of
+from ledger import OPENING_DATE, ledger
+from mortgage import loan_balance
+from storage import data
+
+FORMATS = ("csv", "html", "pdf")
+MONTH_COLUMNS = [
+    ("bills_due", "Bills Due"),
+    ("bills_paid", "Bills Paid"),
+    ("charges", "Card Charges"),
+    ("card_payments", "Card Payments"),
+    ("deposits", "Deposits"),
+    ("withdrawals", "Withdrawals"),
+]
+
+
+def partitions(year):
+    """One (month, transactions, bills, card ids) partition per month.
+
+    The records are copies, so the partitions can be read on another thread
+    while the app goes on changing the originals.
+    """
+    year = str(year)
+    transactions = defaultdict(list)
+    bills = defaultdict(list)
+    for entry in data.get("transactions", []):
+        # Opening balances are not part of any year's activity
+        if entry["date"].startswith(year) and entry["date"] != OPENING_DATE:
+            transactions[month_of(entry["date"])].append(dict(entry))
+    for bill in data["bills"]:
+        if bill["due_date"].startswith(year):
+            bills[month_of(bill["due_date"])].append(dict(bill))
+
+    months = [f"{year}-{m:02d}" for m in range(1, 13)]
+    for month in months:
+        # Bills moved to the archive, as one total per category
+        bills[month].extend(archived_bills(data, month))
+    card_ids = frozenset(card.get("id") for card in data["credit_cards"])
+    return [(month, transactions[month], bills[month], card_ids) for month in months]
+
+
+def aggregate(partition):
+    """Totals of one month; runs in a worker process."""
+    month, transactions, bills, card_ids = partition
+    totals = dict.fromkeys((key for key, _ in MONTH_COLUMNS), 0.0)
+    categories = defaultdict(float)
+
+    for bill in bills:
+        totals["bills_due"] += bill["amount"]
+        if bill["paid"]:
+            totals["bills_paid"] += bill["amount"]
+        if bill.get("category"):
+            categories[bill["category"]] += bill["amount"]
+
+    for entry in transactions:
+        amount = entry["amount"]
+        if entry["account"] in card_ids:
+            totals["charges" if amount > 0 else "card_payments"] += abs(amount)
+            spent = amount
+        else:
+            totals["deposits" if amount > 0 else "withdrawals"] += abs(amount)
+            spent = -amount
+        if entry.get("category"):
+            categories[entry["category"]] += spent
+
+    return month, totals, dict(categories), len(transactions)
+
+
+def merge(partials):
+    """Combine the per-month aggregates into one report body."""
+    months = {}
+    categories = defaultdict(float)
+    count = 0
+    for month, totals, month_categories, transactions in partials:
+        months[month] = {key: round(value, 2) for key, value in totals.items()}
+        for category, spent in month_categories.items():
+            categories[category] += spent
+        count += transactions
+    year_totals = {
+        key: round(sum(totals[key] for totals in months.values()), 2)
+        for key, _ in MONTH_COLUMNS
+    }
+    return {
+        "months": dict(sorted(months.items())),
+        "totals": year_totals,
+        "categories": {
+            category: round(spent, 2) for category, spent in sorted(categories.items())
+        },
+        "transactions": count,
+    }
+
+
+def balances(year):
+    """Balances of accounts, cards and properties at the end of the year."""
+    end = f"{year}-12-31"
+    last_day = datetime.date(int(year), 12, 31)
+    return {
+        "accounts": [
+            (acc["name"], acc["type"], ledger.balance(acc, end))
+            for acc in data["accounts"]
+        ],
+        "credit_cards": [
+            (card["owner"], card["card_name"], card["limit"], ledger.balance(card, end))
+            for card in data["credit_cards"]
+        ],
+        "properties": [
+            (prop["address"], prop["value"], loan_balance(prop, last_day))
+            for prop in data["properties"]
+        ],
+    }
+
+
+def pool(workers=None):
+    """A process pool for aggregate(); workers=None uses every CPU."""
+    # Forking a process that runs Qt's threads can deadlock, so start fresh
+    # interpreters instead
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def build_report(year, workers=None, progress=None):
+    """Aggregate a year; progress(done, total) is called after each month.
+
+    workers=0 aggregates in this process instead of a process pool.
+    """
+    return aggregate_report(year, partitions(year), balances(year), workers, progress)
+
+
+def aggregate_report(year, parts, year_end, workers=None, progress=None):
+    """The report of prepared partitions and year-end balances.
+
+    Reads only its arguments, copies taken by partitions() and balances()
+    on the calling thread, so it can run on a background thread.
+    """
+    partials = []
+    if workers == 0:
+        for part in parts:
+            partials.append(aggregate(part))
+            if progress:
+                progress(len(partials), len(parts))
+    else:
+        executor = pool(workers)
+        try:
+            for partial in executor.map(aggregate, parts):
+                partials.append(partial)
+                if progress:
+                    progress(len(partials), len(parts))
+        finally:
+            # Drop the months not started yet if progress() gave up
+            executor.shutdown(cancel_futures=True)
+
+    report = merge(partials)
+    report["year"] = int(year)
+    report.update(year_end)
+    return report
+
+
+def report_rows(report):
+    """The report as sections of rows, shared by the CSV and HTML writers."""
+    return [
+        (
+            "Monthly Activity",
+            ["Month"] + [label for _, label in MONTH_COLUMNS],
+            [
+                [month] + [totals[key] for key, _ in MONTH_COLUMNS]
+                for month, totals in report["months"].items()
+            ]
+            + [["Total"] + [report["totals"][key] for key, _ in MONTH_COLUMNS]],
+        ),
+        (
+            "Spending by Category",
+            ["Category", "Spent"],
+            [[category, spent] for category, spent in report["categories"].items()],
+        ),
+        (
+            "Accounts at Year End",
+            ["Account", "Type", "Balance"],
+            [list(row) for row in report["accounts"]],
+        ),
+        (
+            "Credit Cards at Year End",
+            ["Owner", "Card", "Limit", "Balance"],
+            [list(row) for row in report["credit_cards"]],
+        ),
+        (
+            "Properties at Year End",
+            ["Address", "Estimated Value", "Loan Balance", "Equity"],
+            [
+                [address, value, loan, round(value - loan, 2)]
+                for address, value, loan in report["properties"]
+            ],
+        ),
+    ]
+
+
+def write_csv(report, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([f"Financial Report {report['year']}"])
+        for title, header, rows in report_rows(report):
+            writer.writerow([])
+            writer.writerow([title])
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+def to_html(report):
+    def cell(value):
+        if isinstance(value, float):
+            return f'<td align="right">${value:,.2f}</td>'
+        return f"<td>{html.escape(str(value))}</td>"
+
+    parts = [
+        "<html><head><meta charset='utf-8'>",
+        f"<title>Financial Report {report['year']}</title></head><body>",
+        f"<h1>Financial Report {report['year']}</h1>",
+        f"<p>{report['transactions']} transactions</p>",
+    ]
+    for title, header, rows in report_rows(report):
+        parts.append(f"<h2>{html.escape(title)}</h2>")
+        parts.append("<table border='1' cellspacing='0' cellpadding='4'><tr>")
+        parts.extend(f"<th>{html.escape(column)}</th>" for column in header)
+        parts.append("</tr>")
+        for row in rows:
+            parts.append("<tr>" + "".join(cell(value) for value in row) + "</tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def write_html(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(to_html(report))
+
+
+def write_pdf(report, path):
+    """Render the HTML report to PDF with Qt's print support."""
+    from PyQt5.QtGui import QGuiApplication, QTextDocument
+    from PyQt5.QtPrintSupport import QPrinter
+
+    # Fonts need a GUI application; the CLI runs without a display
+    app = QGuiApplication.instance() or QGuiApplication(
+        [sys.argv[0], "-platform", os.environ.get("QT_QPA_PLATFORM", "offscreen")]
+    )
+    printer = QPrinter(QPrinter.HighResolution)
+    printer.setOutputFormat(QPrinter.PdfFormat)
+    printer.setOutputFileName(path)
+    document = QTextDocument()
+    document.setHtml(to_html(report))
+    document.print_(printer)
+    return app
+
+
+WRITERS = {"csv": write_csv, "html": write_html, "pdf": write_pdf}
+
+
+def format_of(path):
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown report format: {fmt or path}")
+    return fmt
+
+
+def write_report(report, path, fmt=None):
+    WRITERS[fmt or format_of(path)](report, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a year-end financial report")
+    parser.add_argument("year", type=int)
+    parser.add_argument("-o", "--output", help="output file (default report-YEAR.pdf)")
+    parser.add_argument("--format", choices=FORMATS, help="default: from -o")
+    parser.add_argument("--data", help="data file (default: the app's data file)")
+    parser.add_argument(
+        "--workers", type=int, help="worker processes (0 aggregates in-process)"
+    )
+    args = parser.parse_args(argv)
+
+    output = args.output or f"report-{args.year}.{args.format or 'pdf'}"
+    storage.load_data(args.data)
+
+    def progress(done, total):
+        print(f"\rAggregating {done}/{total} months", end="", file=sys.stderr)
+
+    report = build_report(args.year, args.workers, progress)
+    print(file=sys.stderr)
+    write_report(report, output, args.format)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Schema versions of the data file, and the migrations between them.
+
+A data file records its "schema_version"; files from before the field
+existed are version 1. Loading sends every record through the migrations
+registered for its collection, from the file's version up to
+SCHEMA_VERSION, so the tabs only ever see records in the current shape
+and can index their fields directly. Each record is then validated, once,
+as it is loaded.
+
+Values derived from other fields, like a card's available credit or a
+property's equity, are not stored; they are computed when needed (see
+mortgage.equity()).
+
+Migrations work one record at a time, so the streaming loader can apply
+them as records arrive, and they are idempotent: a record that already
+has the new shape comes through unchanged.
+"""
+from collections import defaultdict
+
+SCHEMA_VERSION = 3
+VERSION_KEY = "schema_version"
+# Amounts of the bills moved to the archive, per due month and category
+ARCHIVED_TOTALS_KEY = "archived_totals"
+
+NUMBER = (int, float)
+
+# Required fields per collection and their types
+FIELDS = {
+    "todos": {
+        "task": str,
+        "category": str,
+        "status": str,
+        "due_date": str,
+        "completed": bool,
+    },
+    "categories": {"name": str, "color": str},
+    "credit_cards": {
+        "owner": str,
+        "card_name": str,
+        "limit": NUMBER,
+        "balance": NUMBER,
+        "payment": NUMBER,
+        "due_date": str,
+        "apr": NUMBER,
+    },
+    "properties": {"address": str, "value": NUMBER, "loan": NUMBER},
+    "accounts": {"name": str, "type": str, "institution": str, "balance": NUMBER},
+    "bills": {"name": str, "amount": NUMBER, "due_date": str, "paid": bool},
+    "transactions": {"account": str, "date": str, "amount": NUMBER, "memo": str},
+    "budgets": {"category": str, "limit": NUMBER},
+}
+
+# Fields that may be missing, and their types when present
+OPTIONAL_FIELDS = {
+    "todos": {
+        "completed_on": str,
+        "id": str,
+        "parent": str,
+        "blocked_by": list,
+        "repeat": str,
+    },
+    "credit_cards": {"id": str},
+    "accounts": {"id": str},
+    "properties": {"rate": NUMBER, "term": NUMBER, "start_date": str, "extra": NUMBER},
+    "bills": {"category": str, "paid_on": str},
+    "transactions": {"category": str},
+}
+
+# version -> collection -> [func(record) -> record]
+MIGRATIONS = defaultdict(lambda: defaultdict(list))
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def migration(version, *collections):
+    """Register func(record) -> record, upgrading records from version."""
+
+    def register(func):
+        for collection in collections:
+            MIGRATIONS[version][collection].append(func)
+        return func
+
+    return register
+
+
+def _numbers(record, *fields):
+    """Numbers typed into a hand-edited file as text become floats."""
+    for field in fields:
+        value = record.get(field)
+        if isinstance(value, str):
+            try:
+                record[field] = float(value.replace(",", "").lstrip("$"))
+            except ValueError:
+                pass  # left for validation to report
+
+
+@migration(1, "categories")
+def category_records(category):
+    # Categories used to be plain names
+    if isinstance(category, str):
+        return {"name": category, "color": "#000000"}
+    return category
+
+
+@migration(1, "todos")
+def todo_defaults(todo):
+    todo.setdefault("completed", False)
+    todo.setdefault("category", "")
+    todo.setdefault("due_date", "")
+    todo.setdefault("status", "Completed" if todo["completed"] else "Not Started")
+    return todo
+
+
+@migration(1, "credit_cards")
+def card_defaults(card):
+    _numbers(card, "limit", "balance", "payment", "apr")
+    card.setdefault("payment", 0.0)
+    card.setdefault("due_date", "")
+    card.setdefault("apr", 0.0)
+    return card
+
+
+@migration(1, "accounts")
+def account_defaults(account):
+    _numbers(account, "balance")
+    account.setdefault("type", "Checking")
+    account.setdefault("institution", "")
+    return account
+
+
+@migration(1, "properties")
+def property_defaults(prop):
+    _numbers(prop, "value", "loan")
+    prop.setdefault("loan", 0.0)
+    return prop
+
+
+@migration(1, "bills")
+def bill_defaults(bill):
+    _numbers(bill, "amount")
+    bill.setdefault("paid", False)
+    bill.setdefault("due_date", "")
+    return bill
+
+
+@migration(2, "credit_cards")
+def drop_available(card):
+    # Computed from the limit and the balance
+    card.pop("available", None)
+    return card
+
+
+@migration(2, "properties")
+def drop_equity(prop):
+    # Computed by mortgage.equity()
+    prop.pop("equity", None)
+    prop.pop("equity_pct", None)
+    return prop
+
+
+def _is(value, kind):
+    # bool is an int, but never a valid number here
+    return isinstance(value, kind) and (kind is bool or not isinstance(value, bool))
+
+
+def problems(name, record):
+    """What is wrong with a migrated record, as a list of messages."""
+    if not isinstance(record, dict):
+        return [f"expected an object, got {type(record).__name__}"]
+    found = []
+    for field, kind in FIELDS[name].items():
+        value = record.get(field)
+        if value is None:
+            found.append(f"missing {field!r}")
+        elif not _is(value, kind):
+            found.append(f"{field!r} has the wrong type ({value!r})")
+    for field, kind in OPTIONAL_FIELDS.get(name, {}).items():
+        value = record.get(field)
+        if value is not None and not _is(value, kind):
+            found.append(f"{field!r} has the wrong type ({value!r})")
+    return found
+
+
+class Migrator:
+    """Upgrades the records of one data file as they are loaded."""
+
+    def __init__(self, version=1):
+        self.version = version
+        self.counts = defaultdict(int)
+
+    def set_version(self, version):
+        if not isinstance(version, int) or version < 1:
+            raise SchemaError(f"Invalid {VERSION_KEY}: {version!r}")
+        if version > SCHEMA_VERSION:
+            raise SchemaError(
+                f"The data file has schema version {version}; this version of "
+                f"the app reads up to {SCHEMA_VERSION}"
+            )
+        self.version = version
+
+    def record(self, name, record):
+        """The record in the current shape; raises SchemaError if invalid."""
+        position = self.counts[name]
+        self.counts[name] += 1
+        if name not in FIELDS:
+            return record
+        try:
+            for version in range(self.version, SCHEMA_VERSION):
+                for upgrade in MIGRATIONS[version][name]:
+                    record = upgrade(record)
+        except AttributeError:
+            pass  # not an object, which problems() reports
+        found = problems(name, record)
+        if found:
+            raise SchemaError(f"{name}[{position}]: " + "; ".join(found))
+        return record
+
+    def finish(self, obj):
+        """Stamp the current version on a fully loaded data dict."""
+        obj[VERSION_KEY] = SCHEMA_VERSION
+
+
+def upgrade(obj):
+    """Migrate and validate a whole data dict in place; returns it."""
+    migrator = Migrator()
+    migrator.set_version(obj.get(VERSION_KEY, 1))
+    for name, value in obj.items():
+        if name in FIELDS and isinstance(value, list):
+            value[:] = [migrator.record(name, record) for record in value]
+    migrator.finish(obj)
+    return obj
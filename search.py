@@ -0,0 +1,233 @@
+"""Fuzzy search across records, and the quick-add syntax of the palette.
+
+Every searchable record is indexed by the trigrams of its label (the
+three-letter pieces of its lower-cased text). A query looks up its own
+trigrams: records that contain all of them are found by intersecting the
+posting sets; when too few do, records sharing most of them are counted
+in, so typos still match.
+
+The index is kept in step with the data on each sync(): records are
+recognised by identity, and only records that are new or whose label
+changed have their trigrams recomputed. The index holds on to the records
+it has seen, so a deleted record's id cannot be reused by a new one
+before sync() has dropped it.
+
+Quick-add text is a todo, or a bill when it has an amount:
+
+    Pay rent #Home due:2026-11-01
+    Electricity $120.50 #Home due:tomorrow
+"""
+import datetime
+import heapq
+import re
+from collections import namedtuple
+
+from storage import data
+
+# collection -> (kind shown to the user, label of a record)
+SOURCES = {
+    "todos": ("Task", lambda todo: todo["task"]),
+    "bills": ("Bill", lambda bill: bill["name"]),
+    "credit_cards": ("Card", lambda card: f"{card['owner']} {card['card_name']}"),
+    "accounts": ("Account", lambda acc: f"{acc['name']} {acc['institution']}"),
+    "properties": ("Property", lambda prop: prop["address"]),
+}
+# Share of the query's trigrams a fuzzy match must have
+MIN_SIMILARITY = 0.5
+# Posting sizes up to which matches are collected from the postings;
+# beyond, the records are walked shortest first for SHORTLIST matches
+SCAN_THRESHOLD = 5000
+SHORTLIST = 200
+
+Result = namedtuple("Result", ["collection", "record", "label", "score"])
+QuickAdd = namedtuple("QuickAdd", ["collection", "record"])
+
+
+def trigrams(text):
+    text = f"  {' '.join(text.lower().split())} "
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    def __init__(self):
+        self.postings = {}  # trigram -> set of keys
+        self.entries = {}  # key -> (collection, record, label, trigrams)
+        self.lengths = {}  # key -> length of its label
+        self.by_length = None  # keys, shortest label first; None when stale
+        self.keys = {}  # collection -> keys of its records
+
+    def _add(self, key, collection, record, label):
+        grams = trigrams(label)
+        self.entries[key] = (collection, record, label, grams)
+        self.lengths[key] = len(label)
+        self.by_length = None
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(key)
+
+    def _remove(self, key):
+        del self.lengths[key]
+        self.by_length = None
+        for gram in self.entries.pop(key)[3]:
+            postings = self.postings[gram]
+            postings.discard(key)
+            if not postings:
+                del self.postings[gram]
+
+    def sync(self):
+        """Index new and edited records and drop deleted ones."""
+        for _ in self.sync_steps():
+            pass
+
+    def sync_steps(self, step=1000):
+        """sync() as a generator that yields after every step records.
+
+        Lets the first build of a large index run in slices on the event
+        loop; a later sync() catches up with edits made in between.
+        """
+        for collection, (_, label_of) in SOURCES.items():
+            keys = set()
+            for i, record in enumerate(data.get(collection, []), 1):
+                if i % step == 0:
+                    yield
+                key = id(record)
+                keys.add(key)
+                label = label_of(record)
+                entry = self.entries.get(key)
+                if entry is not None:
+                    if entry[2] == label:
+                        continue
+                    self._remove(key)
+                self._add(key, collection, record, label)
+            for key in self.keys.get(collection, set()) - keys:
+                self._remove(key)
+            self.keys[collection] = keys
+
+    def _shortest(self, matches):
+        """Up to SHORTLIST keys accepted by matches(trigrams), shortest first.
+
+        For queries whose trigrams are in most records: those matches are
+        dense, so walking the records from the shortest label on finds
+        enough of them long before the end.
+        """
+        if self.by_length is None:
+            self.by_length = sorted(self.lengths, key=self.lengths.__getitem__)
+        found = []
+        entries = self.entries
+        for key in self.by_length:
+            if matches(entries[key][3]):
+                found.append(key)
+                if len(found) >= SHORTLIST:
+                    break
+        return found
+
+    def search(self, query, limit=20):
+        """The best matches for query, best first."""
+        grams = trigrams(query)
+        if not query.strip() or not grams:
+            return []
+        postings = sorted(
+            (self.postings.get(gram, set()) for gram in grams), key=len
+        )
+
+        if len(postings[0]) <= SCAN_THRESHOLD:
+            candidates = set.intersection(*postings)
+        else:
+            candidates = self._shortest(grams.issubset)
+        shared = dict.fromkeys(candidates, len(grams))
+
+        if len(candidates) < limit:
+            # Fuzzy: a record with `needed` of the query's trigrams has one of
+            # the rarest len(grams) - needed + 1, so only those are read
+            needed = max(1, int(len(grams) * MIN_SIMILARITY))
+            rare = postings[: len(grams) - needed + 1]
+            if sum(map(len, rare)) <= SCAN_THRESHOLD:
+                fuzzy = set().union(*rare)
+            else:
+                fuzzy = self._shortest(lambda g: len(grams & g) >= needed)
+            for key in fuzzy:
+                shared.setdefault(key, len(grams & self.entries[key][3]))
+            candidates = [key for key in shared if shared[key] >= needed]
+
+        needle = " ".join(query.lower().split())
+
+        def rank(key):
+            label = self.entries[key][2].lower()
+            found = label.find(needle)
+            # More shared trigrams first, then substring and prefix
+            # matches, then shorter labels
+            return (-shared[key], found < 0, found != 0, len(label))
+
+        return [
+            Result(*self.entries[key][:3], shared[key] / len(grams))
+            for key in heapq.nsmallest(limit, candidates, key=rank)
+        ]
+
+
+_due = re.compile(r"(?:^|\s)due:(\S+)")
+_category = re.compile(r"(?:^|\s)#(\S+)")
+_amount = re.compile(r"(?:^|\s)\$([\d,]+(?:\.\d+)?)(?=\s|$)")
+
+
+def parse_date(text, today=None):
+    today = today or datetime.date.today()
+    keywords = {"today": 0, "tomorrow": 1}
+    if text.lower() in keywords:
+        return (today + datetime.timedelta(days=keywords[text.lower()])).isoformat()
+    try:
+        return datetime.date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise ValueError(f"Due date must be YYYY-MM-DD, today or tomorrow: {text}")
+
+
+def has_markers(text):
+    """True if text uses any of the quick-add markers."""
+    return any(pattern.search(text) for pattern in (_due, _category, _amount))
+
+
+def parse_quick_add(text, categories, today=None):
+    """The todo or bill described by quick-add text.
+
+    categories are the known category names; #name matches one of them
+    ignoring case. Raises ValueError when the text cannot be added.
+    """
+    due_date = ""
+    match = _due.search(text)
+    if match:
+        due_date = parse_date(match.group(1), today)
+        text = text[: match.start()] + text[match.end() :]
+
+    category = ""
+    match = _category.search(text)
+    if match:
+        by_name = {name.lower(): name for name in categories}
+        category = by_name.get(match.group(1).lower())
+        if category is None:
+            raise ValueError(f"Unknown category: {match.group(1)}")
+        text = text[: match.start()] + text[match.end() :]
+
+    amount = None
+    match = _amount.search(text)
+    if match:
+        amount = float(match.group(1).replace(",", ""))
+        text = text[: match.start()] + text[match.end() :]
+
+    name = " ".join(text.split())
+    if not name:
+        raise ValueError("Type a name for the new task or bill")
+    if amount is None:
+        todo = {
+            "task": name,
+            "category": category,
+            "status": "Not Started",
+            "due_date": due_date,
+            "completed": False,
+        }
+        return QuickAdd("todos", todo)
+    bill = {"name": name, "amount": amount, "due_date": due_date, "paid": False}
+    if category:
+        bill["category"] = category
+    return QuickAdd("bills", bill)
+
+
+# Shared by the palette; synced each time it opens
+search_index = SearchIndex()
@@ -0,0 +1,280 @@
+"""Import bank statements (OFX, QIF and CSV) into the ledger.
+
+Statements go in a drop folder with one subfolder per account or card,
+named like the account ("name") or card ("card_name"):
+
+    statements/
+        Checking/march.ofx
+        Visa/2025-q1.csv
+
+Files are parsed as streams, and every transaction is hashed on
+(account, date, amount, memo). The hashes of everything imported so far
+are kept in data["import_hashes"], so re-importing overlapping
+statements costs one hash and one set lookup per row and never touches
+the existing ledger history.
+"""
+import csv
+import datetime
+import hashlib
+import os
+import re
+
+import storage
+from ledger import ensure_id, ledger
+from storage import data
+
+# Transactions applied to the ledger per batch
+BATCH_SIZE = 500
+CHUNK_SIZE = 64 * 1024
+
+PARSERS = {}
+
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d.%m.%Y", "%Y%m%d"]
+CSV_DATE_COLUMNS = ["date", "posted date", "posting date", "transaction date"]
+CSV_MEMO_COLUMNS = ["description", "memo", "payee", "name", "details"]
+
+_ofx_tag = re.compile(r"<(/?)([A-Za-z.]+)>([^<]*)")
+
+
+def parser(*extensions):
+    def register(func):
+        for extension in extensions:
+            PARSERS[extension] = func
+        return func
+
+    return register
+
+
+def parse_date(text):
+    """Return an ISO date for the date formats banks commonly export."""
+    text = text.strip()
+    if "'" in text:
+        # QIF writes years after 2000 as 1/31'25
+        text = text.replace("'", "/").replace(" ", "0")
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {text!r}")
+
+
+def parse_amount(text):
+    text = text.strip().replace(",", "").replace("$", "")
+    if text.startswith("(") and text.endswith(")"):
+        text = "-" + text[1:-1]
+    return float(text)
+
+
+@parser(".ofx", ".qfx")
+def parse_ofx(f):
+    """Yield transactions from an OFX/QFX file (SGML or XML flavour)."""
+    transaction = None
+    buf = ""
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        buf += chunk
+        # Only tokenize up to the last tag that is certainly complete
+        end = len(buf) if not chunk else max(buf.rfind("<"), 0)
+        for match in _ofx_tag.finditer(buf, 0, end):
+            closing, tag, value = match.groups()
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and transaction:
+                    if "DTPOSTED" in transaction and "TRNAMT" in transaction:
+                        yield {
+                            "date": parse_date(transaction["DTPOSTED"][:8]),
+                            "amount": parse_amount(transaction["TRNAMT"]),
+                            "memo": " ".join(
+                                transaction[key]
+                                for key in ("NAME", "MEMO")
+                                if transaction.get(key)
+                            ),
+                        }
+                    transaction = None
+                elif not closing:
+                    transaction = {}
+            elif transaction is not None and not closing:
+                transaction[tag] = value.strip()
+        if not chunk:
+            return
+        buf = buf[end:]
+
+
+@parser(".qif")
+def parse_qif(f):
+    """Yield transactions from a QIF file."""
+    record = {}
+    for line in f:
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:]
+        if code == "^":
+            if "D" in record and "T" in record:
+                yield {
+                    "date": parse_date(record["D"]),
+                    "amount": parse_amount(record["T"]),
+                    "memo": " ".join(
+                        record[key] for key in ("P", "M") if record.get(key)
+                    ),
+                }
+            record = {}
+        else:
+            record[code] = value.strip()
+
+
+@parser(".csv")
+def parse_csv(f):
+    """Yield transactions from a bank CSV export.
+
+    Needs a date column and either an amount column or debit/credit columns.
+    """
+    reader = csv.DictReader(f)
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+
+    def column(candidates):
+        return next((columns[c] for c in candidates if c in columns), None)
+
+    date_column = column(CSV_DATE_COLUMNS)
+    memo_column = column(CSV_MEMO_COLUMNS)
+    amount_column = column(["amount"])
+    debit_column = column(["debit", "withdrawal", "withdrawals"])
+    credit_column = column(["credit", "deposit", "deposits"])
+    if date_column is None or not (amount_column or debit_column or credit_column):
+        raise ValueError("needs a date column and amount or debit/credit columns")
+
+    for row in reader:
+        if not (row.get(date_column) or "").strip():
+            continue
+        if amount_column:
+            amount = parse_amount(row[amount_column])
+        else:
+            amount = 0.0
+            if credit_column and (row.get(credit_column) or "").strip():
+                amount += abs(parse_amount(row[credit_column]))
+            if debit_column and (row.get(debit_column) or "").strip():
+                amount -= abs(parse_amount(row[debit_column]))
+        yield {
+            "date": parse_date(row[date_column]),
+            "amount": amount,
+            "memo": (row.get(memo_column) or "").strip() if memo_column else "",
+        }
+
+
+def transaction_hash(account, date, amount, memo, occurrence=0):
+    """Dedupe key of a statement row.
+
+    occurrence counts identical rows earlier in the same statement, so
+    two genuine same-day purchases of the same amount are both kept.
+    """
+    key = f"{account}|{date}|{amount:.2f}|{memo}|{occurrence}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+class ImportIndex:
+    """Set view of data["import_hashes"], rebuilt only when the list changes."""
+
+    def __init__(self):
+        self.hashes = None
+        self.seen = set()
+
+    def get(self):
+        hashes = data.setdefault("import_hashes", [])
+        if hashes is not self.hashes or len(hashes) != len(self.seen):
+            self.hashes = hashes
+            self.seen = set(hashes)
+        return self.seen
+
+    def add(self, digest):
+        self.get()
+        self.hashes.append(digest)
+        self.seen.add(digest)
+
+
+import_index = ImportIndex()
+
+
+def default_folder():
+    """The "statements" folder next to the data file."""
+    return os.path.join(
+        os.path.dirname(os.path.abspath(storage.data_file)), "statements"
+    )
+
+
+def find_record(name):
+    """Return (collection, record) for an account or card folder name."""
+    for acc in data["accounts"]:
+        if acc["name"] == name:
+            return "accounts", acc
+    for card in data["credit_cards"]:
+        if card["card_name"] == name:
+            return "credit_cards", card
+    return None, None
+
+
+def import_file(path, collection, record):
+    """Import one statement file; returns (imported, duplicates)."""
+    parse = PARSERS[os.path.splitext(path)[1].lower()]
+    account = ensure_id(record)
+    # Card statements show purchases as debits; the ledger counts them as
+    # increases of the card balance
+    sign = -1 if collection == "credit_cards" else 1
+    seen = import_index.get()
+    occurrences = {}
+    imported = duplicates = 0
+    batch = []
+
+    try:
+        with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+            for row in parse(f):
+                amount = round(sign * row["amount"], 2)
+                key = (row["date"], amount, row["memo"])
+                occurrence = occurrences.get(key, 0)
+                occurrences[key] = occurrence + 1
+                digest = transaction_hash(account, *key, occurrence)
+                if digest in seen:
+                    duplicates += 1
+                    continue
+                import_index.add(digest)
+                batch.append(key)
+                if len(batch) >= BATCH_SIZE:
+                    ledger.add_many(record, batch)
+                    imported += len(batch)
+                    batch = []
+    finally:
+        # Rows already hashed must reach the ledger even if a later row is bad
+        ledger.add_many(record, batch)
+        imported += len(batch)
+
+    return imported, duplicates
+
+
+def import_statements(folder):
+    """Import every statement under folder; returns a summary dict."""
+    summary = {"files": 0, "imported": 0, "duplicates": 0, "skipped": []}
+    if not os.path.isdir(folder):
+        return summary
+
+    for name in sorted(os.listdir(folder)):
+        subfolder = os.path.join(folder, name)
+        if not os.path.isdir(subfolder):
+            summary["skipped"].append(f"{name}: not in an account folder")
+            continue
+        collection, record = find_record(name)
+        if record is None:
+            summary["skipped"].append(f"{name}: no account or card with this name")
+            continue
+        for filename in sorted(os.listdir(subfolder)):
+            path = os.path.join(subfolder, filename)
+            if os.path.splitext(filename)[1].lower() not in PARSERS:
+                continue
+            try:
+                imported, duplicates = import_file(path, collection, record)
+            except (ValueError, KeyError) as e:
+                summary["skipped"].append(f"{name}/{filename}: {e}")
+                continue
+            summary["files"] += 1
+            summary["imported"] += imported
+            summary["duplicates"] += duplicates
+    return summary
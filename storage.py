@@ -0,0 +1,517 @@
+"""Reading and writing the application's data file.
+
+The data file can be stored in one of three formats:
+
+- ``json``: the original pretty-printed JSON document.
+- ``snapshot``: a small binary header followed by compact JSON, which is
+  zlib-compressed unless the compression level is 0.
+- ``encrypted``: a snapshot encrypted with a passphrase (see encryption.py),
+  written and read as a stream.
+
+The format is detected from the file header on load, so existing
+``data.json`` files keep working whichever format is used for saving.
+
+Writes replace the file in one step, so readers never see half of one.
+Writers take turns through a lock file next to the data file (see
+locked()), which the GUI and the command line (cli.py) both hold while
+they write. A save refuses to overwrite a file that another process has
+changed since it was read (ConflictError); changed_on_disk() tells when
+to load it again.
+"""
+import codecs
+import itertools
+import json
+import marshal
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import encryption
+import perf
+import schema
+
+# File to store data
+data_file = "data.json"
+
+# Format used by save_data(); empty means "keep the format the file was loaded in"
+data_format = os.environ.get("FINANCE_DATA_FORMAT", "")
+compression_level = int(os.environ.get("FINANCE_DATA_COMPRESSION", "6"))
+
+SNAPSHOT_MAGIC = b"FFSNAP"
+SNAPSHOT_VERSION = 1
+FLAG_COMPRESSED = 0x01
+HEADER_SIZE = len(SNAPSHOT_MAGIC) + 2
+
+FORMATS = ("json", "snapshot", "encrypted")
+CHUNK_SIZE = 64 * 1024
+
+# In-memory data shared by every tab
+data = {}
+loaded_format = "json"
+
+# Bumped whenever `data` is loaded or saved, so readers can tell it changed
+revision = 0
+
+# Set while stream_load_data() is filling `data`; saves are deferred until it ends
+loading = False
+save_pending = False
+
+# Called like write_data() to write saves in the background; None writes
+# them before save_data() returns
+background_writer = None
+
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+# path -> [open lock file, depth] of the locks this process holds
+_locks = {}
+_locks_guard = threading.RLock()
+# path -> stat of the file as this process last read or wrote it
+_known = {}
+
+
+class ConflictError(OSError):
+    """The data file was changed by another process since it was read."""
+
+
+def default_data():
+    """Return the contents of a brand new data file."""
+    obj = {
+        schema.VERSION_KEY: schema.SCHEMA_VERSION,
+        "todos": [],
+        "credit_cards": [],
+        "categories": [
+            {"name": "Personal", "color": "#FF5733"},
+            {"name": "Home", "color": "#33FF57"},
+            {"name": "Education", "color": "#3357FF"},
+            {"name": "Business", "color": "#F033FF"},
+        ],
+        "properties": [],
+        "accounts": [],
+        "bills": [],
+        "transactions": [],
+        "budgets": [],
+    }
+    # Collections added by plugins (see registry.py) start empty
+    for name in schema.FIELDS:
+        obj.setdefault(name, [])
+    return obj
+
+
+def empty_data():
+    """default_data() with every collection empty."""
+    return {
+        name: [] if isinstance(value, list) else value
+        for name, value in default_data().items()
+    }
+
+
+@perf.timed("encode")
+def encode_snapshot(obj, level=6):
+    """Serialize obj as snapshot bytes; level 0 disables compression."""
+    payload = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    flags = 0
+    if level:
+        payload = zlib.compress(payload, level)
+        flags |= FLAG_COMPRESSED
+    return SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION, flags]) + payload
+
+
+def decode_snapshot(raw):
+    """Parse snapshot bytes produced by encode_snapshot()."""
+    if raw[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError("Not a snapshot file")
+    version, flags = raw[len(SNAPSHOT_MAGIC)], raw[len(SNAPSHOT_MAGIC) + 1]
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}")
+    payload = raw[HEADER_SIZE:]
+    if flags & FLAG_COMPRESSED:
+        payload = zlib.decompress(payload)
+    return json.loads(payload)
+
+
+def iter_json(obj, batch=1000):
+    """Yield the compact JSON of a data dict in pieces.
+
+    Long lists are encoded a batch of records at a time, which keeps the
+    speed of json.dumps without building the whole document.
+    """
+    yield "{"
+    for i, (name, value) in enumerate(obj.items()):
+        yield ("," if i else "") + json.dumps(name) + ":"
+        if isinstance(value, list) and len(value) > batch:
+            yield "["
+            for start in range(0, len(value), batch):
+                chunk = value[start : start + batch]
+                encoded = json.dumps(chunk, separators=(",", ":"))
+                yield ("," if start else "") + encoded[1:-1]
+            yield "]"
+        else:
+            yield json.dumps(value, separators=(",", ":"))
+    yield "}"
+
+
+def iter_snapshot(obj, level=6):
+    """Yield the bytes of encode_snapshot(obj, level) in pieces."""
+    flags = FLAG_COMPRESSED if level else 0
+    yield SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION, flags])
+    deflate = zlib.compressobj(level) if level else None
+    for piece in iter_json(obj):
+        piece = piece.encode("utf-8")
+        yield deflate.compress(piece) if deflate else piece
+    if deflate:
+        yield deflate.flush()
+
+
+def detect_format(path):
+    """Return "json", "snapshot" or "encrypted" depending on the file header."""
+    with open(path, "rb") as f:
+        head = f.read(len(encryption.MAGIC))
+    if head == encryption.MAGIC:
+        return "encrypted"
+    return "snapshot" if head.startswith(SNAPSHOT_MAGIC) else "json"
+
+
+def is_encrypted(path=None):
+    """True if the data file at path is saved encrypted."""
+    path = path or data_file
+    if data_format:
+        return data_format == "encrypted"
+    return os.path.exists(path) and detect_format(path) == "encrypted"
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def changed_on_disk(path=None):
+    """True if another process wrote the file since this one read it."""
+    key = os.path.abspath(path or data_file)
+    return key in _known and _signature(key) != _known[key]
+
+
+@contextmanager
+def locked(path=None):
+    """Hold the lock of a data file, for other processes and threads.
+
+    Re-entrant, so a transaction can read, then write under one lock.
+    """
+    key = os.path.abspath(path or data_file)
+    with _locks_guard:
+        if key not in _locks:
+            lock_file = open(key + ".lock", "a+b")
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            _locks[key] = [lock_file, 0]
+        _locks[key][1] += 1
+        try:
+            yield
+        finally:
+            _locks[key][1] -= 1
+            if not _locks[key][1]:
+                lock_file = _locks.pop(key)[0]
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                lock_file.close()
+
+
+@perf.timed()
+def read_data(path):
+    """Read a data file in any supported format."""
+    _known[os.path.abspath(path)] = _signature(path)
+    fmt = detect_format(path)
+    if fmt == "encrypted":
+        return json.loads("".join(iter_text(path)))
+    if fmt == "snapshot":
+        with open(path, "rb") as f:
+            return decode_snapshot(f.read())
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_encrypted(obj, path, level=6):
+    """Encrypt obj into path as a stream; returns the bytes written."""
+    pieces = encryption.encrypt(iter_snapshot(obj, level))
+    # The header comes first, once the key is ready: a missing passphrase
+    # fails here, before the file is touched
+    header = next(pieces)
+    written = 0
+    temp_path = str(path) + ".tmp"
+    with open(temp_path, "wb") as f:
+        for piece in itertools.chain([header], pieces):
+            f.write(piece)
+            written += len(piece)
+    os.replace(temp_path, path)
+    return written
+
+
+def write_data(obj, path, fmt="json", level=6, check=False):
+    """Write obj to path in the given format.
+
+    With check, raises ConflictError rather than overwrite changes that
+    another process made since this one read or wrote the file.
+    """
+    key = os.path.abspath(path)
+    with locked(path):
+        if check and changed_on_disk(path):
+            raise ConflictError(f"{path} was changed by another program")
+        _write_data(obj, path, fmt, level)
+        _known[key] = _signature(path)
+
+
+def _write_data(obj, path, fmt, level):
+    if fmt == "encrypted":
+        # Encoding, encryption and writing interleave chunk by chunk
+        with perf.timer("write_file"):
+            written = write_encrypted(obj, path, level)
+        perf.count("bytes_written", written)
+        return
+    if fmt == "snapshot":
+        raw = encode_snapshot(obj, level)
+        mode = "wb"
+    elif fmt == "json":
+        with perf.timer("encode"):
+            raw = json.dumps(obj, indent=4)
+        mode = "w"
+    else:
+        raise ValueError(f"Unknown data format: {fmt}")
+    temp_path = str(path) + ".tmp"
+    with perf.timer("write_file"):
+        with open(temp_path, mode) as f:
+            f.write(raw)
+        os.replace(temp_path, path)
+    perf.count("bytes_written", len(raw))
+
+
+def iter_text(path, chunk_size=CHUNK_SIZE):
+    """Yield the JSON text of a data file in chunks, whatever its format."""
+    with open(path, "rb") as f:
+        if f.read(len(encryption.MAGIC)) == encryption.MAGIC:
+            f.seek(0)
+            yield from _decode_text(encryption.decrypt(f), chunk_size)
+        else:
+            f.seek(0)
+            yield from _decode_text(iter(lambda: f.read(chunk_size), b""), chunk_size)
+
+
+def _decode_text(chunks, chunk_size):
+    """JSON text of plain JSON or snapshot bytes given as chunks."""
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= HEADER_SIZE:
+            break
+
+    if head[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        # Plain JSON: the header bytes are part of the document
+        yield utf8.decode(head)
+        for chunk in chunks:
+            yield utf8.decode(chunk)
+    else:
+        version, flags = head[len(SNAPSHOT_MAGIC)], head[len(SNAPSHOT_MAGIC) + 1]
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {version}")
+        inflate = zlib.decompressobj() if flags & FLAG_COMPRESSED else None
+        for chunk in itertools.chain([head[HEADER_SIZE:]], chunks):
+            if inflate is None:
+                yield utf8.decode(chunk)
+                continue
+            # Bound each decompressed piece so highly compressible files
+            # don't inflate into one huge string
+            while chunk:
+                yield utf8.decode(inflate.decompress(chunk, chunk_size))
+                chunk = inflate.unconsumed_tail
+        if inflate is not None:
+            yield utf8.decode(inflate.flush())
+    yield utf8.decode(b"", final=True)
+
+
+def iter_records(path, chunk_size=CHUNK_SIZE):
+    """Parse a data file one record at a time.
+
+    Yields (name, value, is_record) tuples. Items of top-level lists are
+    yielded one by one with is_record=True, after a (name, [], False)
+    marker for the list itself; any other top-level value is yielded
+    whole with is_record=False. Only a small window of the file text is
+    held in memory at once.
+    """
+    chunks = iter_text(path, chunk_size)
+    # json.load shares equal dict keys between records; do the same here,
+    # otherwise every record carries its own copy of each key string
+    keys = {}
+    decoder = json.JSONDecoder(
+        object_pairs_hook=lambda pairs: {keys.setdefault(k, k): v for k, v in pairs}
+    )
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill(min_extra=0):
+        # Append more text; returns False at end of file
+        nonlocal buf, pos, eof
+        if pos > len(buf) // 2:
+            buf, pos = buf[pos:], 0
+        wanted = len(buf) + max(min_extra, 1)
+        while len(buf) < wanted:
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+                return False
+            buf += chunk
+        return True
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            pos = _whitespace.match(buf, pos).end()
+            if pos < len(buf) or not fill():
+                return
+
+    def expect(*chars):
+        nonlocal pos
+        skip_ws()
+        if pos >= len(buf) or buf[pos] not in chars:
+            found = buf[pos : pos + 1] or "end of file"
+            raise ValueError(f"Expected {' or '.join(chars)}, found {found!r}")
+        pos += 1
+        return buf[pos - 1]
+
+    def value():
+        # Decode one complete JSON value, reading more text as needed.
+        # A value ending exactly at the buffer end may be a truncated
+        # number, so it only counts once more text (or EOF) follows.
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or eof:
+                    pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill(len(buf) - pos)
+
+    expect("{")
+    skip_ws()
+    if buf[pos : pos + 1] == "}":
+        return
+    while True:
+        name = value()
+        expect(":")
+        skip_ws()
+        if buf[pos : pos + 1] == "[":
+            pos += 1
+            yield name, [], False
+            skip_ws()
+            if buf[pos : pos + 1] == "]":
+                pos += 1
+            else:
+                while True:
+                    yield name, value(), True
+                    if expect(",", "]") == "]":
+                        break
+        else:
+            yield name, value(), False
+        if expect(",", "}") == "}":
+            return
+
+
+def _prepare(path):
+    global data_file, loaded_format
+    if path is not None:
+        data_file = path
+    if not os.path.exists(data_file):
+        write_data(default_data(), data_file, data_format or "json")
+    loaded_format = detect_format(data_file)
+
+
+@perf.timed()
+def load_data(path=None):
+    """Load path (default: data_file) into the shared data dict.
+
+    Records are migrated to the current schema and validated on the way in;
+    an invalid file raises schema.SchemaError and leaves data as it was.
+    """
+    global revision
+    _prepare(path)
+    loaded = schema.upgrade(read_data(data_file))
+    revision += 1
+    data.clear()
+    data.update(empty_data())
+    data.update(loaded)
+    return data
+
+
+def stream_load_data(path=None):
+    """Load path into the shared data dict incrementally.
+
+    This is a generator: every step adds one record to `data` and yields
+    the name of the collection it went into, so callers can show early
+    rows and interleave the rest of the work with other events. Records
+    are parsed straight into `data`, so memory use stays close to the
+    final in-memory size. Saves requested while loading are deferred
+    until the whole file has been read. Records are migrated and
+    validated as they arrive, like in load_data().
+    """
+    global loading, save_pending, revision
+    _prepare(path)
+    _known[os.path.abspath(data_file)] = _signature(data_file)
+    revision += 1
+    data.clear()
+    data.update(empty_data())
+    migrator = schema.Migrator()
+    loading, save_pending = True, False
+    try:
+        for name, value, is_record in iter_records(data_file):
+            if is_record:
+                data[name].append(migrator.record(name, value))
+            elif name == schema.VERSION_KEY:
+                migrator.set_version(value)
+            else:
+                data[name] = value
+            yield name
+        migrator.finish(data)
+    finally:
+        loading = False
+    if save_pending:
+        save_data()
+
+
+def copy_data():
+    """A deep copy of data that another thread can encode at leisure."""
+    # data holds nothing but JSON types, which marshal copies several
+    # times faster than encoding them
+    return marshal.loads(marshal.dumps(data))
+
+
+@perf.timed()
+def save_data():
+    global save_pending, revision
+    revision += 1
+    if loading:
+        save_pending = True
+        return
+    fmt = data_format or loaded_format
+    if background_writer is not None:
+        background_writer(copy_data(), data_file, fmt, compression_level, check=True)
+    else:
+        write_data(data, data_file, fmt, compression_level, check=True)
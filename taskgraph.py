@@ -0,0 +1,221 @@
+"""Recurring todos, subtasks and dependencies between todos.
+
+Todos link to each other by id (see ledger.ensure_id):
+
+- "parent": the todo it is a subtask of,
+- "blocked_by": ids of the todos that have to be completed first,
+- "repeat": one of REPEATS, for a todo that comes back.
+
+A todo waits for its blockers and for its subtasks, and is blocked while
+any of them is open. TaskGraph keeps, per todo, the number of open todos
+it waits for: completing or reopening one only updates the counts of the
+todos that wait for it, never the whole list. Links must not form a
+cycle, which link() checks before adding them. Links to todos that are
+gone, for instance archived, count as completed.
+
+A recurring todo stands for all its occurrences, which occurrences()
+computes on demand rather than storing them ahead. Completing one
+records it as a completed copy and moves the todo on to its next
+occurrence.
+"""
+import calendar
+import datetime
+from collections import defaultdict
+
+from ledger import ensure_id
+from storage import data
+
+REPEATS = ("daily", "weekly", "monthly", "yearly")
+
+
+class CycleError(ValueError):
+    pass
+
+
+def _add_months(date, months):
+    year, month = divmod(date.month - 1 + months, 12)
+    year += date.year
+    # The 31st falls on the last day of shorter months
+    day = min(date.day, calendar.monthrange(year, month + 1)[1])
+    return date.replace(year=year, month=month + 1, day=day)
+
+
+def occurrences(todo, today=None):
+    """Yield the due dates of a recurring todo, from its current one on."""
+    today = today or datetime.date.today()
+    try:
+        first = datetime.date.fromisoformat(todo["due_date"])
+    except ValueError:
+        first = today
+    repeat = todo["repeat"]
+    n = 0
+    while True:
+        if repeat == "daily":
+            date = first + datetime.timedelta(days=n)
+        elif repeat == "weekly":
+            date = first + datetime.timedelta(weeks=n)
+        else:
+            date = _add_months(first, n * (1 if repeat == "monthly" else 12))
+        yield date.isoformat()
+        n += 1
+
+
+def complete_occurrence(todo, today=None):
+    """Move a recurring todo on to its next occurrence.
+
+    That is the first one after its due date and after today, so a todo
+    completed early moves on too and missed occurrences are skipped.
+    Returns the completed occurrence as a todo of its own.
+    """
+    today = today or datetime.date.today()
+    try:
+        due = datetime.date.fromisoformat(todo["due_date"])
+    except ValueError:
+        due = today
+    after = max(due, today).isoformat()
+    done = {
+        key: value
+        for key, value in todo.items()
+        if key not in ("id", "repeat", "blocked_by")
+    }
+    done.update(status="Completed", completed=True, completed_on=today.isoformat())
+    todo["due_date"] = next(date for date in occurrences(todo, today) if date > after)
+    return done
+
+
+class TaskGraph:
+    def __init__(self):
+        self.todos = None
+        self.positions = {}  # id(todo) -> index in todos
+        self.by_id = {}
+        self.children = defaultdict(list)  # id -> subtasks
+        self.dependents = defaultdict(list)  # id(todo) -> todos waiting for it
+        self.waiting = {}  # id(todo) -> open todos it waits for, when any
+
+    def rebuild(self, todos=None):
+        """Index the links of todos (default: data["todos"])."""
+        self.todos = todos = data["todos"] if todos is None else todos
+        self.positions = {id(todo): i for i, todo in enumerate(todos)}
+        self.by_id = {todo["id"]: todo for todo in todos if "id" in todo}
+        self.children = defaultdict(list)
+        for todo in todos:
+            if todo.get("parent") in self.by_id:
+                self.children[todo["parent"]].append(todo)
+        self.dependents = defaultdict(list)
+        self.waiting = {}
+        for todo in todos:
+            count = 0
+            for target in self.waits_for(todo):
+                self.dependents[id(target)].append(todo)
+                count += not target["completed"]
+            if count:
+                self.waiting[id(todo)] = count
+
+    def sync(self):
+        """Rebuild unless the index is of the current data["todos"] list.
+
+        Todos appended since keep the index valid: none waits for them yet.
+        """
+        if self.todos is not data["todos"]:
+            self.rebuild()
+
+    def waits_for(self, todo):
+        """The todos todo waits for: its blockers, then its subtasks."""
+        blocked_by = todo.get("blocked_by", [])
+        blockers = [self.by_id[key] for key in blocked_by if key in self.by_id]
+        return blockers + self.children.get(todo.get("id"), [])
+
+    def blocked(self, todo):
+        return id(todo) in self.waiting
+
+    def blockers(self, todo):
+        """The open todos todo is waiting for."""
+        return [target for target in self.waits_for(todo) if not target["completed"]]
+
+    def toggled(self, todo):
+        """Update the todos waiting for todo after it was completed or reopened.
+
+        Returns the ones whose blocked state changed.
+        """
+        step = -1 if todo["completed"] else 1
+        changed = []
+        for dependent in self.dependents.get(id(todo), []):
+            count = self.waiting.get(id(dependent), 0) + step
+            if count:
+                self.waiting[id(dependent)] = count
+            else:
+                del self.waiting[id(dependent)]
+            if (count == 0) != (count - step == 0):
+                changed.append(dependent)
+        return changed
+
+    def find(self, name):
+        """The open todo called name; raises ValueError unless there is one."""
+        found = [
+            todo
+            for todo in self.todos
+            if todo["task"].lower() == name.lower() and not todo["completed"]
+        ]
+        if not found:
+            raise ValueError(f"No open task is called {name!r}")
+        if len(found) > 1:
+            raise ValueError(f"Several open tasks are called {name!r}")
+        return found[0]
+
+    def check(self, todo, parent=None, blocked_by=()):
+        """Raise CycleError if todo cannot have these links.
+
+        A cycle needs one of the new links: todo waiting for a blocker
+        that (indirectly) waits for todo or its parent, or a parent that
+        todo already waits for.
+        """
+        if parent is todo or any(target is todo for target in blocked_by):
+            raise CycleError(f"{todo['task']!r} cannot wait for itself")
+        stack = list(blocked_by) + self.children.get(todo.get("id"), [])
+        seen = set()
+        while stack:
+            current = stack.pop()
+            if current is todo or current is parent:
+                raise CycleError(f"{todo['task']!r} would end up waiting for itself")
+            if id(current) not in seen:
+                seen.add(id(current))
+                stack.extend(self.waits_for(current))
+
+    def link(self, todo, parent=None, blocked_by=()):
+        """Set the parent and blockers of todo, after checking for cycles."""
+        self.check(todo, parent, blocked_by)
+        if parent is not None:
+            todo["parent"] = ensure_id(parent)
+        else:
+            todo.pop("parent", None)
+        if blocked_by:
+            todo["blocked_by"] = [ensure_id(target) for target in blocked_by]
+        else:
+            todo.pop("blocked_by", None)
+
+    def rows(self):
+        """(data index, depth) of each todo, subtasks under their parent.
+
+        None when no todo has a parent, so the list shows in data order.
+        """
+        if not self.children:
+            return None
+        order = []
+        seen = set()
+        roots = [todo for todo in self.todos if todo.get("parent") not in self.by_id]
+        # Todos in a cycle of parents have no root; they go last
+        for todo in roots + self.todos:
+            stack = [(todo, 0)]
+            while stack:
+                current, depth = stack.pop()
+                if id(current) in seen:
+                    continue
+                seen.add(id(current))
+                order.append((self.positions[id(current)], depth))
+                children = self.children.get(current.get("id"), [])
+                stack.extend((child, depth + 1) for child in reversed(children))
+        return order
+
+
+# Shared by the To-Do tab and its model
+task_graph = TaskGraph()
@@ -0,0 +1,166 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+import api
+import storage
+from storage import data, read_data, write_data
+
+
+def todo(task, **fields):
+    return {
+        "task": task,
+        "category": "Home",
+        "status": "Not Started",
+        "due_date": "",
+        "completed": False,
+        **fields,
+    }
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    obj = storage.default_data()
+    obj["todos"] = [todo(f"Task {i}", due_date=f"2026-10-{10 + i}") for i in range(12)]
+    obj["todos"][3]["completed"] = True
+    obj["bills"] = [{"name": "Rent", "amount": 900.0, "due_date": "", "paid": False}]
+    write_data(obj, path)
+    monkeypatch.setattr(storage, "data_file", path)
+    monkeypatch.setattr(storage, "background_writer", None)
+    storage.load_data()
+    server = api.ApiServer("127.0.0.1", 0, token="")
+    server.start()
+    yield server
+    server.stop()
+
+
+def request(server, method, path, body=None, headers=None):
+    """(status, headers, JSON payload) of a request to the server."""
+    payload = None if body is None else json.dumps(body).encode("utf-8")
+    req = urllib.request.Request(
+        server.url + path, payload, headers or {}, method=method
+    )
+    if payload is not None:
+        req.add_header("Content-Type", "application/json")
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            status, headers, raw = response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        status, headers, raw = e.code, e.headers, e.read()
+    return status, headers, json.loads(raw) if raw else None
+
+
+def test_pages_and_filters(server):
+    status, _, overview = request(server, "GET", "")
+    assert status == 200 and overview["collections"]["todos"] == 12
+
+    _, _, page = request(server, "GET", "/todos?limit=5&offset=5")
+    assert [item["index"] for item in page["items"]] == [5, 6, 7, 8, 9]
+    assert (page["total"], page["next_offset"]) == (12, 10)
+    _, _, last = request(server, "GET", "/todos?limit=5&offset=10")
+    assert len(last["items"]) == 2 and "next_offset" not in last
+
+    _, _, page = request(server, "GET", "/todos?completed=false&due_before=2026-10-15")
+    assert [item["record"]["task"] for item in page["items"]] == [
+        "Task 0",
+        "Task 1",
+        "Task 2",
+        "Task 4",
+    ]
+    _, _, page = request(server, "GET", "/todos?q=task+11")
+    assert [item["index"] for item in page["items"]] == [11]
+    assert request(server, "GET", "/todos/3")[2]["record"]["completed"] is True
+
+    assert request(server, "GET", "/todos?limit=0")[0] == 400
+    assert request(server, "GET", "/todos?colour=red")[0] == 400
+    assert request(server, "GET", "/todos/12")[0] == 404
+    assert request(server, "GET", "/nothing")[0] == 404
+    assert request(server, "DELETE", "/todos/1")[0] == 405
+
+
+def test_etags_make_polls_cheap(server):
+    status, headers, _ = request(server, "GET", "/todos")
+    tag = headers["ETag"]
+    status, headers, payload = request(
+        server, "GET", "/todos", headers={"If-None-Match": tag}
+    )
+    assert (status, headers["ETag"], payload) == (304, tag, None)
+
+    storage.save_data()  # what every edit in the app does
+    status, headers, _ = request(
+        server, "GET", "/todos", headers={"If-None-Match": tag}
+    )
+    assert status == 200 and headers["ETag"] != tag
+
+
+def test_writes(server):
+    changes = []
+    api.listeners.append(lambda *change: changes.append(change))
+    try:
+        status, headers, item = request(
+            server, "POST", "/todos", {"task": "Call mum", "due_date": "2026-11-01"}
+        )
+        assert (status, item["index"]) == (201, 12)
+        assert headers["Location"] == "/api/todos/12"
+        assert read_data(storage.data_file)["todos"][12]["task"] == "Call mum"
+
+        _, _, item = request(server, "PATCH", "/bills/0", {"paid": True})
+        assert item["record"]["paid"] is True and "paid_on" in item["record"]
+        assert changes == [("todos", [], 1), ("bills", [0], 0)]
+
+        for body in ({"task": 5}, {"task": "x", "id": "a"}, {"category": "No"}):
+            assert request(server, "POST", "/todos", body)[0] == 400
+        assert request(server, "POST", "/accounts", {"name": "x"})[0] == 405
+    finally:
+        api.listeners.clear()
+
+
+def test_conditional_and_blocked_writes(server):
+    tag = request(server, "GET", "/todos")[1]["ETag"]
+    data["todos"][1].update(id="b")
+    data["todos"][0].update(id="a", blocked_by=["b"])
+    storage.save_data()
+
+    status, _, error = request(
+        server, "PATCH", "/todos/2", {"status": "In Progress"}, {"If-Match": tag}
+    )
+    assert status == 412
+    status, _, error = request(server, "PATCH", "/todos/0", {"completed": True})
+    assert status == 409 and "Task 1" in error["error"]
+
+    request(server, "PATCH", "/todos/1", {"completed": True})
+    assert request(server, "PATCH", "/todos/0", {"completed": True})[0] == 200
+
+
+def test_patches_do_not_reindex_todos(server, monkeypatch):
+    rebuilds = []
+    rebuild = api.task_graph.rebuild
+    monkeypatch.setattr(
+        api.task_graph, "rebuild", lambda: rebuilds.append(1) or rebuild()
+    )
+    data["todos"][1]["id"] = "b"
+    data["todos"][0].update(id="a", blocked_by=["b"])
+    done = {"completed": True}
+    for index in (5, 6, 1):
+        assert request(server, "PATCH", f"/todos/{index}", done)[0] == 200
+    assert len(rebuilds) == 1
+    # Completing "b" unblocked "a" without another rebuild
+    assert request(server, "PATCH", "/todos/0", done)[0] == 200
+    assert len(rebuilds) == 1
+
+
+def test_oversized_lines(server):
+    long = "x" * (api.MAX_LINE + 1)
+    assert request(server, "GET", f"/todos?q={long}")[0] == 400
+    status, _, error = request(server, "GET", "/todos", headers={"X-Long": long})
+    assert status == 431 and "too long" in error["error"]
+
+
+def test_token(server):
+    server.token = "secret"
+    assert request(server, "GET", "/todos")[0] == 401
+    headers = {"Authorization": "Bearer secret"}
+    assert request(server, "GET", "/todos", headers=headers)[0] == 200
@@ -0,0 +1,147 @@
+import datetime
+import os
+
+import pytest
+
+import archive
+import reports
+import storage
+from archive import archive_paths, index, records, search, stamp, sweep
+from budget import BudgetRollup
+
+TODAY = datetime.date(2026, 10, 19)
+
+
+def todo(task, completed=False, **fields):
+    return {
+        "task": task,
+        "category": "Home",
+        "status": "Completed" if completed else "Not Started",
+        "due_date": "",
+        "completed": completed,
+        **fields,
+    }
+
+
+def bill(name, amount, due_date, paid=True, **fields):
+    return {
+        "name": name,
+        "amount": amount,
+        "due_date": due_date,
+        "paid": paid,
+        **fields,
+    }
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "data.json")
+
+
+@pytest.fixture
+def sample():
+    obj = storage.default_data()
+    obj["todos"] = [
+        todo("Old", True, completed_on="2026-01-02"),
+        todo("Recent", True, completed_on="2026-10-01"),
+        todo("Open"),
+        # Completed before completed_on was recorded
+        todo("Legacy", True, due_date="2025-05-01"),
+        todo("Undated", True),
+    ]
+    obj["bills"] = [
+        bill("Rent", 900.0, "2026-01-01", paid_on="2026-01-01", category="Home"),
+        bill("Power", 80.0, "2026-01-05"),
+        bill("Water", 40.0, "2026-10-01"),
+        bill("Late", 60.0, "2025-12-01", paid=False),
+    ]
+    return obj
+
+
+def names(items, field):
+    return [item[field] for item in items]
+
+
+def test_sweep_moves_old_records(sample, path):
+    assert sweep(sample, 90, path, today=TODAY) == 4
+    assert names(sample["todos"], "task") == ["Recent", "Open", "Undated"]
+    assert names(sample["bills"], "name") == ["Water", "Late"]
+    # Records done before the day was recorded are stamped on the way
+    assert sample["todos"][2]["completed_on"] == TODAY.isoformat()
+    assert sample["archived_totals"] == {"2026-01": {"Home": 900.0, "": 80.0}}
+
+    archived = list(records(path))
+    assert [record["task"] for _, record in archived[:2]] == ["Old", "Legacy"]
+    assert archived[1][1]["completed_on"] == "2025-05-01"
+    assert [entry.label for entry in index(path)] == ["Power", "Old", "Rent", "Legacy"]
+    assert index(path)[0].amount == 80.0
+
+    # Nothing left to move: nothing is written
+    size = os.path.getsize(archive_paths(path)[0])
+    assert sweep(sample, 90, path, today=TODAY) == 0
+    assert os.path.getsize(archive_paths(path)[0]) == size
+
+
+def test_sweeps_append(sample, path):
+    sweep(sample, 90, path, today=TODAY)
+    later = TODAY + datetime.timedelta(days=100)
+    assert sweep(sample, 90, path, today=later) == 3
+    assert names(sample["todos"], "task") == ["Open"]
+    assert names(sample["bills"], "name") == ["Late"]
+    assert len(list(records(path))) == 7
+    assert len(index(path)) == 7
+    assert [entry.label for entry in search(index(path), "wat")] == ["Water"]
+    assert [entry.label for entry in search(index(path), "home ol")] == ["Old"]
+
+
+def test_unfinished_frame_is_skipped_and_replaced(sample, path):
+    sweep(sample, 90, path, today=TODAY)
+    archive_path, index_path = archive_paths(path)
+    for name in (archive_path, index_path):
+        with open(name, "ab") as f:
+            f.write(b"\x00\x00\x10\x00partial")
+    assert len(list(records(path))) == 4
+    assert len(index(path)) == 4
+
+    later = TODAY + datetime.timedelta(days=100)
+    sweep(sample, 90, path, today=later)
+    assert len(list(records(path))) == 7
+    assert len(index(path)) == 7
+
+
+def test_archive_can_be_turned_off(sample, path):
+    assert sweep(sample, 0, path, today=TODAY) == 0
+    assert not os.path.exists(archive_paths(path)[0])
+
+
+def test_stamp():
+    record = todo("Task", True)
+    stamp("todos", record, TODAY)
+    assert record["completed_on"] == "2026-10-19"
+    record["completed"] = False
+    stamp("todos", record)
+    assert "completed_on" not in record
+
+
+def test_archived_bills_still_count(sample, path, fresh_data, monkeypatch):
+    sweep(sample, 90, path, today=TODAY)
+    for key, value in sample.items():
+        monkeypatch.setitem(storage.data, key, value)
+    storage.data["budgets"] = [{"category": "Home", "limit": 1000.0}]
+    assert BudgetRollup().actual("Home", "2026-01") == 900.0
+
+    report = reports.merge(map(reports.aggregate, reports.partitions(2026)))
+    assert report["months"]["2026-01"]["bills_paid"] == 980.0
+    assert report["categories"]["Home"] == 900.0
+
+
+def test_encrypted_archive(sample, path, monkeypatch):
+    pytest.importorskip("cryptography")
+    monkeypatch.setattr(archive.encryption, "passphrase", "secret")
+    monkeypatch.setattr(archive.encryption, "SCRYPT_LOG2_N", 10)
+    sweep(sample, 90, path, encrypted=True, today=TODAY)
+    for name in archive_paths(path):
+        with open(name, "rb") as f:
+            assert b"Rent" not in f.read()
+    assert [entry.label for entry in index(path)][0] == "Power"
+    assert len(list(records(path))) == 4
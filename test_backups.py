@@ -0,0 +1,150 @@
+import datetime
+import json
+import os
+
+import pytest
+
+import backups
+import schema
+import storage
+from backups import create, list_backups, load, restore
+
+
+def sample(todos=3):
+    obj = storage.default_data()
+    obj["todos"] = [
+        {
+            "task": f"Task {i}",
+            "category": "Home",
+            "status": "Not Started",
+            "due_date": "",
+            "completed": False,
+        }
+        for i in range(todos)
+    ]
+    return obj
+
+
+def objects(directory):
+    return sorted(
+        name
+        for _, _, names in os.walk(os.path.join(directory, "objects"))
+        for name in names
+    )
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "data-backups")
+
+
+def test_round_trip(directory):
+    obj = sample(2500)
+    backup_id = create(obj, "test", directory)
+    assert load(backup_id, directory) == obj
+    assert list_backups(directory)[0]["counts"]["todos"] == 2500
+
+
+def test_unchanged_data_is_deduplicated(directory):
+    obj = sample(2500)
+    first = create(obj, directory=directory)
+    assert create(obj, directory=directory) == first
+    stored = objects(directory)
+
+    # Only the block holding the edited record is new
+    obj["todos"][2400]["completed"] = True
+    second = create(obj, directory=directory)
+    assert second != first
+    assert len(objects(directory)) == len(stored) + 1
+    assert load(first, directory)["todos"][2400]["completed"] is False
+    assert load(second, directory)["todos"][2400]["completed"] is True
+
+
+def test_retention(directory, monkeypatch):
+    monkeypatch.setattr(backups, "KEEP_LATEST", 1)
+    start = datetime.datetime(2026, 1, 1)
+    ids = {}
+    # One backup every 6 hours for 120 days, each with different data
+    for step in range(4 * 120):
+        now = start + datetime.timedelta(hours=6 * step)
+        ids[now] = create(sample(step % 7 + 1), directory=directory, now=now)
+
+    kept = {
+        datetime.datetime.fromisoformat(m["created"]) for m in list_backups(directory)
+    }
+    last = max(ids)
+    assert last in kept
+    # Every backup of the last day, one per day for two weeks, then weekly
+    assert all(t in kept for t in ids if last - t < datetime.timedelta(hours=24))
+    assert len({t.date() for t in kept}) >= 14
+    assert min(kept) > last - datetime.timedelta(weeks=9)
+    assert len(kept) < 30
+    # Blocks of pruned backups are gone
+    used = {
+        address
+        for m in list_backups(directory)
+        for addresses in m["blocks"].values()
+        for address in addresses
+    }
+    assert set(objects(directory)) == used
+
+
+def test_restore_backs_up_the_current_file(tmp_path, directory):
+    path = str(tmp_path / "data.json")
+    old = sample(1)
+    backup_id = create(old, directory=directory)
+    storage.write_data(sample(5), path)
+
+    assert restore(backup_id, path, directory) == old
+    assert storage.read_data(path) == old
+    assert list_backups(directory)[0]["reason"] == "before restore"
+    assert load(list_backups(directory)[0]["id"], directory) == sample(5)
+
+
+def test_restore_over_a_damaged_file(tmp_path, directory):
+    path = tmp_path / "data.json"
+    backup_id = create(sample(), directory=str(directory))
+    path.write_text(json.dumps(sample())[:40])
+    restore(backup_id, str(path), directory)
+    assert storage.read_data(path) == sample()
+
+
+def test_encrypted_backups(directory, monkeypatch):
+    pytest.importorskip("cryptography")
+    import encryption
+
+    monkeypatch.setattr(encryption, "SCRYPT_LOG2_N", 10)
+    monkeypatch.setattr(encryption, "passphrase", "correct horse")
+    monkeypatch.setattr(encryption, "_salts", {})
+    backup_id = create(sample(), directory=directory, encrypted=True)
+    for name in objects(directory):
+        folder = os.path.join(directory, "objects", name[:2])
+        with open(os.path.join(folder, name), "rb") as f:
+            assert f.read().startswith(encryption.MAGIC)
+    assert load(backup_id, directory) == sample()
+
+    # Nor do the values outside the lists show in the manifest
+    obj = sample()
+    obj[schema.ARCHIVED_TOTALS_KEY] = {"2026-01": {"Home": 1234.56}}
+    backup_id = create(obj, directory=directory, encrypted=True)
+    manifest = os.path.join(directory, "manifests", backup_id + ".json")
+    with open(manifest, encoding="utf-8") as f:
+        text = f.read()
+    assert "1234.56" not in text and '"counts"' not in text
+    assert load(backup_id, directory) == obj
+    records = sum(len(value) for value in obj.values() if isinstance(value, list))
+    assert backups.record_count(list_backups(directory)[0]) == records
+    assert create(obj, directory=directory, encrypted=True) == backup_id
+
+
+def test_cli(tmp_path, capsys):
+    path = str(tmp_path / "data.json")
+    storage.write_data(sample(1), path)
+    backups.main(["--data", path, "create"])
+    backup_id = capsys.readouterr().out.strip()
+    storage.write_data(sample(4), path)
+
+    backups.main(["--data", path, "list"])
+    assert backup_id in capsys.readouterr().out
+    backups.main(["--data", path, "restore", backup_id])
+    assert storage.read_data(path) == sample(1)
@@ -0,0 +1,65 @@
+import pytest
+
+import storage
+from budget import BudgetRollup, set_budget
+from ledger import ledger
+
+
+@pytest.fixture
+def rollup(fresh_data):
+    return BudgetRollup()
+
+
+def bill(amount, due_date, category="Home"):
+    return {
+        "name": "Bill",
+        "amount": amount,
+        "due_date": due_date,
+        "paid": False,
+        "category": category,
+    }
+
+
+def test_bills_roll_up_by_category_and_month(rollup):
+    storage.data["bills"] += [
+        bill(100, "2025-03-01"),
+        bill(50, "2025-03-20"),
+        bill(75, "2025-04-01"),
+        bill(20, ""),
+    ]
+    assert rollup.actual("Home", "2025-03") == 150
+    assert rollup.actual("Home", "2025-04") == 75
+
+
+def test_bill_changes_update_accumulators(rollup):
+    water = bill(40, "2025-05-02")
+    storage.data["bills"].append(water)
+    assert rollup.actual("Home", "2025-05") == 40
+
+    power = bill(60, "2025-05-10", "Personal")
+    storage.data["bills"].append(power)
+    rollup.bill_added(power)
+    storage.data["bills"].remove(water)
+    rollup.bill_removed(water)
+    assert rollup.actual("Home", "2025-05") == 0
+    assert rollup.actual("Personal", "2025-05") == 60
+
+
+def test_transactions_count_as_spending(rollup):
+    checking = {"name": "Checking", "balance": 0.0}
+    card = {"card_name": "Visa", "balance": 0.0, "id": "visa"}
+    storage.data["accounts"].append(checking)
+    storage.data["credit_cards"].append(card)
+    ledger.add(checking, -30, "2025-06-01", "Groceries", "Home")
+    ledger.add(card, 45, "2025-06-03", "Hardware", "Home")
+    ledger.add(card, -10, "2025-06-04", "Refund", "Home")
+    ledger.add(checking, 500, "2025-06-05", "Salary")
+    assert rollup.actual("Home", "2025-06") == 65
+
+
+def test_month_report_and_set_budget(rollup):
+    storage.data["bills"].append(bill(80, "2025-07-01"))
+    set_budget("Home", 200)
+    set_budget("Personal", 50)
+    set_budget("Personal", 0)
+    assert rollup.month_report("2025-07") == [("Home", 200, 80)]
@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cli
+import storage
+from storage import read_data, write_data
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    obj = storage.default_data()
+    obj["credit_cards"] = [
+        {
+            "owner": "Sam",
+            "card_name": "Visa",
+            "limit": 1000.0,
+            "balance": 250.0,
+            "payment": 25.0,
+            "due_date": "2026-11-05",
+            "apr": 19.9,
+        }
+    ]
+    obj["accounts"] = [
+        {"name": "Checking", "type": "Bank", "institution": "CU", "balance": 100.0}
+    ]
+    write_data(obj, path)
+    # load_data() switches the app's data file
+    monkeypatch.setattr(storage, "data_file", storage.data_file)
+    return path
+
+
+def todo(task, **fields):
+    return {
+        "task": task,
+        "category": "",
+        "status": "Not Started",
+        "due_date": "",
+        "completed": False,
+        **fields,
+    }
+
+
+def run(path, *argv):
+    out = io.StringIO()
+    cli.main(["--data", path, *argv], out)
+    return json.loads(out.getvalue())
+
+
+def test_add_and_list_todos(path):
+    run(path, "todo", "add", "Pay rent", "--category", "home", "--due", "2020-01-01")
+    run(path, "todo", "add", "Plan trip", "--due", "2999-01-01")
+    assert [t["category"] for t in read_data(path)["todos"]] == ["Home", ""]
+
+    assert [t["task"] for t in run(path, "todo", "list", "--overdue")] == ["Pay rent"]
+    assert run(path, "todo", "list", "--category", "Home")[0]["task"] == "Pay rent"
+    with pytest.raises(ValueError, match="Unknown category"):
+        run(path, "todo", "add", "Gym", "--category", "Sports")
+
+
+def test_done_blocked_and_recurring_todos(path):
+    obj = read_data(path)
+    obj["todos"] = [
+        todo("Ship", id="a", blocked_by=["b"]),
+        todo("Test", id="b"),
+        todo("Water plants", due_date="2026-10-01", repeat="weekly"),
+    ]
+    write_data(obj, path)
+
+    with pytest.raises(ValueError, match="waiting for: Test"):
+        run(path, "todo", "done", "ship")
+    run(path, "todo", "done", "Test")
+    assert run(path, "todo", "done", "Ship")[0]["completed"] is True
+
+    done, next_one = run(path, "todo", "done", "Water plants")
+    assert done["completed"] and done["due_date"] == "2026-10-01"
+    assert not next_one["completed"]
+    assert next_one["due_date"] > done["completed_on"]
+    assert len(read_data(path)["todos"]) == 4
+
+
+def test_bills_and_balances(path):
+    run(path, "bills", "add", "Power", "80", "--due", "2020-01-01")
+    run(path, "bills", "add", "Power", "90", "--due", "2020-02-01")
+    assert len(run(path, "bills", "list", "--overdue")) == 2
+    paid = run(path, "bills", "pay", "power")[0]
+    assert (paid["amount"], paid["paid"]) == (80.0, True) and "paid_on" in paid
+
+    card = run(path, "cards", "summary")[0]
+    assert (card["available"], card["usage_pct"]) == (750.0, 25.0)
+    run(path, "accounts", "set-balance", "checking", "175.5")
+    assert run(path, "accounts", "list")[0]["balance"] == 175.5
+    assert read_data(path)["transactions"][-1]["amount"] == 75.5
+
+
+def test_csv_output(path):
+    run(path, "todo", "add", "Pay rent", "--repeat", "monthly")
+    out = io.StringIO()
+    cli.main(["--data", path, "data", "export", "todos", "--format", "csv"], out)
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert rows == [
+        {
+            "task": "Pay rent",
+            "category": "",
+            "status": "Not Started",
+            "due_date": "",
+            "completed": "False",
+            "repeat": "monthly",
+        }
+    ]
+
+
+def test_batch_is_one_transaction(path, tmp_path, monkeypatch):
+    commands = tmp_path / "commands.txt"
+    commands.write_text(
+        "# nightly\n"
+        'todo add "Pay rent"\n'
+        "\n"
+        "bills add Power 80 --due 2026-11-01\n"
+        "bills pay Power\n"
+    )
+    writes = []
+    write_data = storage.write_data
+
+    def count_writes(*args, **kwargs):
+        writes.append(args[1])
+        write_data(*args, **kwargs)
+
+    monkeypatch.setattr(storage, "write_data", count_writes)
+    assert len(run(path, "batch", str(commands))) == 3
+    assert len(writes) == 1
+    assert read_data(path)["bills"][0]["paid"] is True
+
+    # Nothing is written when a command fails, even after others succeeded
+    before = read_data(path)
+    commands.write_text("todo add Other\nbills pay Water\n")
+    with pytest.raises(ValueError, match="No unpaid bill"):
+        run(path, "batch", str(commands))
+    commands.write_text("todo add Other\ntodo add Late --due soon\n")
+    with pytest.raises(ValueError, match="Line 2: argument --due"):
+        run(path, "batch", str(commands))
+    assert read_data(path) == before
+    assert len(writes) == 1
+
+
+def test_refuses_to_overwrite_changes_made_while_running(path, monkeypatch):
+    load_data = storage.load_data
+
+    def load_then_edit(*args):
+        loaded = load_data(*args)
+        obj = read_data(path)
+        obj["bills"] = [
+            {"name": "Rent", "amount": 900.0, "due_date": "", "paid": False}
+        ]
+        with open(path, "w") as f:
+            json.dump(obj, f)
+        return loaded
+
+    monkeypatch.setattr(storage, "load_data", load_then_edit)
+    with pytest.raises(storage.ConflictError):
+        run(path, "todo", "add", "Pay rent")
+    assert read_data(path)["bills"][0]["name"] == "Rent"
+
+
+def test_does_not_import_qt(path):
+    script = (
+        "import sys, cli\n"
+        f"cli.main(['--data', {path!r}, 'todo', 'add', 'Pay rent'])\n"
+        f"cli.main(['--data', {path!r}, 'todo', 'done', 'Pay rent'])\n"
+        f"cli.main(['--data', {path!r}, 'cards', 'summary'])\n"
+        "assert not [m for m in sys.modules if m.startswith('PyQt5')]\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(cli.__file__)),
+        check=True,
+        capture_output=True,
+    )
@@ -0,0 +1,67 @@
+import pytest
+
+import dashboard
+from dashboard import SeriesCache, downsample
+from storage import data
+
+
+@pytest.fixture
+def cache(fresh_data):
+    data["bills"] = [
+        {"name": "Rent", "amount": 1000.0, "due_date": "2030-01-01", "paid": False},
+        {"name": "Water", "amount": 50.0, "due_date": "2030-03-15", "paid": False},
+        {"name": "Old", "amount": 75.0, "due_date": "2029-12-01", "paid": True},
+    ]
+    data["todos"] = [
+        {"task": "a", "category": "Home", "completed": True},
+        {"task": "b", "category": "Home", "completed": False},
+        {"task": "c", "category": "Work", "completed": True},
+    ]
+    return SeriesCache()
+
+
+def test_series(cache):
+    assert cache.get("unpaid_bills_by_month") == [
+        ("2030-01", 1000.0),
+        ("2030-02", 0.0),
+        ("2030-03", 50.0),
+    ]
+    # Known categories in their order, then the others by name
+    assert cache.get("todo_completion_by_category") == [
+        ("Home", 50.0),
+        ("Work", 100.0),
+    ]
+
+
+def test_only_invalidated_series_are_recomputed(cache, monkeypatch):
+    bills = cache.get("unpaid_bills_by_month")
+    todos = cache.get("todo_completion_by_category")
+    data["bills"][1]["paid"] = True
+    data["todos"][1]["completed"] = True
+
+    cache.invalidate("bills")
+    assert cache.get("unpaid_bills_by_month") is not bills
+    assert cache.get("unpaid_bills_by_month")[-1] == ("2030-01", 1000.0)
+    assert cache.get("todo_completion_by_category") is todos
+
+    # Reloading replaces the lists, which needs no explicit invalidation
+    data["todos"] = list(data["todos"])
+    assert cache.get("todo_completion_by_category") is not todos
+
+
+def test_downsample_keeps_extremes():
+    points = [(i, float(i % 100)) for i in range(10_000)]
+    points[5_000] = (5_000, 1e6)
+    sampled = downsample(points, 200)
+    assert len(sampled) <= 200
+    assert (5_000, 1e6) in sampled
+    assert sampled == sorted(sampled)
+    assert downsample(points[:10], 200) == points[:10]
+
+
+def test_downsampled_series_is_cached_per_width(cache):
+    first = cache.sampled("unpaid_bills_by_month", 2)
+    assert len(first) == 2
+    assert cache.sampled("unpaid_bills_by_month", 2) is first
+    assert len(cache.sampled("unpaid_bills_by_month", 100)) == 3
+    assert "unpaid_bills_by_month" in dashboard.SERIES
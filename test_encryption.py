@@ -0,0 +1,93 @@
+import pytest
+
+pytest.importorskip("cryptography")
+
+import encryption
+import storage
+from storage import detect_format, iter_records, read_data, write_data
+
+
+@pytest.fixture(autouse=True)
+def session(monkeypatch):
+    # A cheap key derivation keeps the tests fast
+    monkeypatch.setattr(encryption, "SCRYPT_LOG2_N", 10)
+    monkeypatch.setattr(encryption, "passphrase", "correct horse")
+    monkeypatch.setattr(encryption, "_salts", {})
+    encryption.derive_key.cache_clear()
+
+
+def sample(todos=3):
+    obj = storage.default_data()
+    obj["todos"] = [
+        {"task": f"Task {i} ✓", "completed": i % 2 == 0} for i in range(todos)
+    ]
+    return obj
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "data.json"
+    obj = sample()
+    write_data(obj, path, "encrypted")
+    assert detect_format(path) == "encrypted"
+    assert b"Task" not in path.read_bytes()
+    assert read_data(path) == obj
+
+    todos = [value for name, value, _ in iter_records(path) if name == "todos"]
+    assert todos[1:] == obj["todos"]
+
+
+def test_many_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(encryption, "CHUNK_SIZE", 1024)
+    path = tmp_path / "data.json"
+    obj = sample(5000)
+    # Uncompressed so the payload spans many chunks
+    write_data(obj, path, "encrypted", level=0)
+    assert path.stat().st_size > 50 * 1024
+    assert read_data(path) == obj
+
+
+def test_wrong_passphrase(tmp_path):
+    path = tmp_path / "data.json"
+    write_data(sample(), path, "encrypted")
+    assert not encryption.check_passphrase(path, "wrong")
+    encryption.passphrase = "wrong"
+    with pytest.raises(ValueError):
+        read_data(path)
+
+
+def test_missing_passphrase_leaves_file_alone(tmp_path):
+    path = tmp_path / "data.json"
+    write_data(sample(), path, "json")
+    before = path.read_bytes()
+    encryption.passphrase = None
+    with pytest.raises(ValueError):
+        write_data(sample(), path, "encrypted")
+    assert path.read_bytes() == before
+
+
+@pytest.mark.parametrize("damage", ["flip", "truncate", "extend"])
+def test_damage_is_detected(tmp_path, damage, monkeypatch):
+    monkeypatch.setattr(encryption, "CHUNK_SIZE", 1024)
+    path = tmp_path / "data.json"
+    write_data(sample(500), path, "encrypted", level=0)
+    raw = bytearray(path.read_bytes())
+    if damage == "flip":
+        raw[-100] ^= 1
+    elif damage == "truncate":
+        # Cut exactly after a full sealed chunk
+        raw = raw[: encryption.HEADER_SIZE + 2 * (1024 + encryption.TAG_SIZE)]
+    else:
+        raw += raw[encryption.HEADER_SIZE : encryption.HEADER_SIZE + 100]
+    path.write_bytes(bytes(raw))
+    with pytest.raises(ValueError):
+        read_data(path)
+
+
+def test_key_is_derived_once(tmp_path):
+    path = tmp_path / "data.json"
+    write_data(sample(), path, "encrypted")
+    read_data(path)
+    write_data(sample(), path, "encrypted")
+    info = encryption.derive_key.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
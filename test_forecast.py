@@ -0,0 +1,91 @@
+import datetime
+import time
+
+import pytest
+
+import forecast
+from storage import data
+
+START = datetime.date(2030, 1, 1)
+
+
+@pytest.fixture
+def finances(fresh_data):
+    data["accounts"] = [
+        {"name": "Checking", "type": "Checking", "institution": "", "balance": 2000.0},
+        {"name": "401k", "type": "Retirement", "institution": "", "balance": 9e5},
+    ]
+    data["bills"] = [
+        {"name": "Rent", "amount": 1500.0, "due_date": "2030-01-05", "paid": False},
+        {"name": "Late", "amount": 100.0, "due_date": "2029-12-20", "paid": False},
+        {"name": "Paid", "amount": 999.0, "due_date": "2030-01-07", "paid": True},
+    ]
+    data["credit_cards"] = [
+        {
+            "owner": "Alex",
+            "card_name": "Visa",
+            "limit": 1000.0,
+            "balance": 250.0,
+            "payment": 100.0,
+            "due_date": "2029-12-10",
+        }
+    ]
+    return data
+
+
+def test_daily_series_applies_events_in_date_order(finances):
+    result = forecast.forecast(START, days=90, threshold=500)
+    assert result.opening == 2000.0
+    assert [(e.date.isoformat(), e.amount) for e, _ in result.events] == [
+        ("2030-01-01", -100.0),
+        ("2030-01-05", -1500.0),
+        ("2030-01-10", -100.0),
+        ("2030-02-10", -100.0),
+        ("2030-03-10", -50.0),
+    ]
+    assert len(result.days) == 90
+    assert result.days[3] == (datetime.date(2030, 1, 4), 1900.0)
+    assert result.days[-1][1] == 150.0
+    assert result.low_days[0] == (datetime.date(2030, 1, 5), 400.0)
+    assert result.lowest == (datetime.date(2030, 3, 10), 150.0)
+
+
+def test_monthly_dates_clamp_to_month_end():
+    dates = forecast.monthly(31, datetime.date(2030, 1, 15), datetime.date(2030, 3, 31))
+    assert [d.isoformat() for d in dates] == ["2030-01-31", "2030-02-28", "2030-03-31"]
+    assert forecast.due_day("15") == 15
+    assert forecast.due_day("soon") is None
+
+
+def test_mortgage_payments_are_included(finances):
+    data["properties"] = [
+        {
+            "address": "1 Main St",
+            "value": 400000.0,
+            "loan": 300000.0,
+            "rate": 6.0,
+            "term": 30,
+            "start_date": "2020-01-15",
+            "extra": 0.0,
+        }
+    ]
+    events = [e for e, _ in forecast.forecast(START, days=31).events]
+    mortgage = [e for e in events if e.label == "1 Main St mortgage"]
+    assert len(mortgage) == 1
+    assert mortgage[0].amount == pytest.approx(-1798.65, abs=0.01)
+
+
+def test_two_year_horizon_is_fast(finances):
+    data["bills"] = [
+        {
+            "name": f"Bill {i}",
+            "amount": 10.0,
+            "due_date": (START + datetime.timedelta(days=i % 730)).isoformat(),
+            "paid": False,
+        }
+        for i in range(5000)
+    ]
+    start = time.perf_counter()
+    result = forecast.forecast(START, days=730)
+    assert time.perf_counter() - start < 0.5
+    assert len(result.events) == 5000 + 3
@@ -0,0 +1,552 @@
+import datetime
+import json
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import threading
+import time
+import urllib.request
+
+import pytest
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+    QApplication,
+    QDialog,
+    QDialogButtonBox,
+    QLineEdit,
+    QMessageBox,
+)
+
+import archive
+import backups
+import project
+import registry
+import storage
+from jobs import background
+from storage import data, default_data, read_data, save_data, write_data
+
+# Latency budgets, in seconds
+TOGGLE_BUDGET = 1.0
+LOAD_TODOS_BUDGET = 0.5
+LARGE_TODO_COUNT = 50_000
+
+
+@pytest.fixture(scope="session")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def data_file(app, tmp_path, monkeypatch):
+    """Point the app at a temporary data file; returns a loader for it."""
+    path = str(tmp_path / "data.json")
+    monkeypatch.setattr(storage, "data_file", path)
+    monkeypatch.setattr(storage, "data_format", "")
+
+    def load(**collections):
+        write_data({**default_data(), **collections}, path)
+        storage.load_data()
+        return path
+
+    load()
+    return load
+
+
+@pytest.fixture
+def answer_dialog(monkeypatch):
+    """Make dialogs fill their line edits with the given texts and press OK."""
+
+    def answer(*texts):
+        def exec_(dialog):
+            for edit, text in zip(dialog.findChildren(QLineEdit), texts):
+                if text is not None:
+                    edit.setText(text)
+            dialog.findChild(QDialogButtonBox).button(QDialogButtonBox.Ok).click()
+            return dialog.result()
+
+        monkeypatch.setattr(QDialog, "exec_", exec_)
+
+    monkeypatch.setattr(
+        QMessageBox, "question", staticmethod(lambda *args: QMessageBox.Yes)
+    )
+    return answer
+
+
+def make_todos(count):
+    return [
+        {
+            "task": f"Task {i}",
+            "category": "Home",
+            "status": "Not Started",
+            "due_date": "2030-01-01",
+            "completed": False,
+        }
+        for i in range(count)
+    ]
+
+
+def test_todo_add_edit_delete(data_file, answer_dialog):
+    tab = project.ToDoTab()
+    tab.form_group.setChecked(True)
+    tab.task_input.setText("Buy milk")
+    tab.category_combo.setCurrentText("Home")
+    tab.add_button.click()
+    assert tab.model.rowCount() == 1
+    assert read_data(storage.data_file)["todos"][0]["task"] == "Buy milk"
+
+    answer_dialog("Buy oat milk", "2030-02-01")
+    tab.edit_todo(0)
+    assert data["todos"][0]["task"] == "Buy oat milk"
+    assert tab.model.index(0, 4).data() == "2030-02-01"
+
+    tab.delete_todo(0)
+    assert data["todos"] == []
+    assert tab.model.rowCount() == 0
+
+
+def test_todo_checkbox_toggles_completed(data_file):
+    data_file(todos=make_todos(3))
+    tab = project.ToDoTab()
+    tab.model.setData(tab.model.index(1, 1), Qt.Checked, Qt.CheckStateRole)
+    assert data["todos"][1]["completed"] is True
+    assert tab.model.index(1, 1).data(Qt.CheckStateRole) == Qt.Checked
+    assert read_data(storage.data_file)["todos"][1]["completed"] is True
+
+
+def test_credit_card_dialogs_update_summary(data_file, answer_dialog):
+    tab = project.FinancialTab()
+    answer_dialog("Alex", "Visa", "1000", "250", "25", "2030-01-01")
+    tab.show_add_credit_card_dialog()
+    assert "Total Usage: 25.00%" in tab.cc_summary.text()
+
+    answer_dialog(None, None, None, "500")
+    tab.edit_credit_card(0)
+    assert data["credit_cards"][0]["balance"] == 500
+    assert "Alex's Debt: $500.00" in tab.cc_summary.text()
+
+
+def test_account_transactions_update_balance(data_file, answer_dialog):
+    data_file(
+        accounts=[
+            {
+                "name": "Checking",
+                "type": "Checking",
+                "institution": "Bank",
+                "balance": 1000.0,
+            }
+        ]
+    )
+    tab = project.FinancialTab()
+    answer_dialog("2030-01-01", "-250", "Rent")
+    tab.show_add_transaction_dialog("accounts")
+    assert tab.acc_table.item(0, 3).text() == "$750.00"
+    assert "Total Balance: $750.00" in tab.acc_summary.text()
+
+    answer_dialog(None, None, "800")
+    tab.edit_account(0)
+    assert [entry["amount"] for entry in data["transactions"]] == [1000.0, -250, 50]
+
+
+def test_bills_toggle_updates_total(data_file):
+    data_file(
+        bills=[
+            {"name": "Water", "amount": 50.0, "due_date": "", "paid": False},
+            {"name": "Power", "amount": 120.0, "due_date": "", "paid": False},
+        ]
+    )
+    tab = project.BillsTab()
+    assert "$170.00" in tab.total_label.text()
+    tab.toggle_paid(1, Qt.Checked)
+    assert "$50.00" in tab.total_label.text()
+
+
+def test_budget_tab_shows_bill_spending(data_file):
+    data_file(budgets=[{"category": "Home", "limit": 500.0}])
+    budget_tab = project.BudgetTab()
+    budget_tab.month = project.QDate(2030, 1, 1)
+    bills_tab = project.BillsTab()
+    bills_tab.add_bill_from_dialog("Rent", "600", "2030-01-01", QDialog(), "Home")
+
+    budget_tab.load_budget()
+    assert budget_tab.budget_table.item(0, 2).text() == "$600.00"
+    assert budget_tab.budget_table.item(0, 3).text() == "$-100.00"
+
+    budget_tab.set_budget_from_dialog("Home", "750", QDialog())
+    assert data["budgets"] == [{"category": "Home", "limit": 750.0}]
+    assert budget_tab.budget_table.item(0, 3).text() == "$150.00"
+
+
+def test_main_app_streams_data_file(app, data_file):
+    data_file(todos=make_todos(500))
+    loader = storage.stream_load_data()
+    current = project.load_first_screenful(loader)
+    window = project.MainApp()
+    assert window.todo_tab.model.rowCount() == project.FIRST_SCREENFUL
+
+    window.continue_loading(loader, current)
+    while window.loading_timer.isActive():
+        app.processEvents()
+    assert window.todo_tab.model.rowCount() == 500
+    assert window.todo_tab.category_combo.count() == len(data["categories"])
+    # Loading ends with a startup backup
+    background.wait()
+    assert backups.list_backups()[0]["reason"] == "startup"
+
+
+def test_large_todo_list_latency(data_file):
+    data_file(todos=make_todos(LARGE_TODO_COUNT))
+    tab = project.ToDoTab()
+    tab.resize(1000, 800)
+    tab.show()
+
+    start = time.perf_counter()
+    tab.load_todos()
+    assert time.perf_counter() - start < LOAD_TODOS_BUDGET
+
+    start = time.perf_counter()
+    tab.toggle_completed(LARGE_TODO_COUNT // 2, Qt.Checked)
+    assert time.perf_counter() - start < TOGGLE_BUDGET
+    assert data["todos"][LARGE_TODO_COUNT // 2]["completed"] is True
+
+
+def test_payoff_dialog_follows_budget(data_file):
+    data_file(
+        credit_cards=[
+            {
+                "owner": "Alex",
+                "card_name": "Visa",
+                "limit": 1000.0,
+                "balance": 300.0,
+                "payment": 100.0,
+                "due_date": "",
+                "apr": 0.0,
+            }
+        ]
+    )
+    dialog = project.PayoffDialog()
+    background.wait()
+    assert "Debt-free in 3 months" in dialog.plan_summary.text()
+    dialog.budget_edit.setText("30")
+    dialog.budget_edit.setText("300")
+    background.wait()
+    assert "Debt-free in 1 months" in dialog.plan_summary.text()
+    assert dialog.plan_table.item(0, 3).text() == "1 months"
+
+
+def test_property_with_loan_terms(data_file, answer_dialog):
+    tab = project.FinancialTab()
+    answer_dialog("1 Main St", "400000", "300000", "6", "30", "2020-01-15", "")
+    tab.show_add_property_dialog()
+    prop = data["properties"][0]
+    assert prop["term"] == 30 and prop["start_date"] == "2020-01-15"
+    assert "equity" not in prop
+    assert project.equity(prop)[0] > 100000
+    assert tab.prop_table.item(0, 5).text() != tab.prop_table.item(0, 3).text()
+    assert tab.prop_table.cellWidget(0, 6) is not None
+
+    answer_dialog(None, None, None, None, "")
+    tab.edit_property(0)
+    assert "term" not in data["properties"][0]
+    assert tab.prop_table.item(0, 2).text() == "$300,000.00"
+
+
+def test_property_with_loan_terms_loads_back(data_file, answer_dialog):
+    tab = project.FinancialTab()
+    answer_dialog("1 Main St", "400000", "300000", "6", "30", "2020-01-15", "")
+    tab.show_add_property_dialog()
+    storage.load_data()
+    assert data["properties"][0]["term"] == 30
+    assert project.equity(data["properties"][0])[0] > 100000
+
+
+def test_forecast_tab_flags_low_balance(data_file):
+    data_file(
+        accounts=[
+            {
+                "name": "Checking",
+                "type": "Checking",
+                "institution": "",
+                "balance": 100.0,
+            }
+        ],
+        bills=[
+            {"name": "Rent", "amount": 500.0, "due_date": "2000-01-01", "paid": False}
+        ],
+    )
+    tab = project.ForecastTab()
+    assert tab.forecast_table.item(0, 3).text() == "$-400.00"
+    assert "Below $0.00 on 90 days" in tab.forecast_summary.text()
+
+
+def test_dashboard_paints_charts(data_file):
+    data_file(
+        bills=[
+            {"name": "Rent", "amount": 900.0, "due_date": "2030-01-01", "paid": False}
+        ],
+        todos=make_todos(4),
+    )
+    tab = project.DashboardTab()
+    tab.resize(800, 600)
+    assert not tab.grab().isNull()
+    assert tab.charts[2].points() == [("2030-01", 900.0)]
+
+    bills_tab = project.BillsTab()
+    bills_tab.toggle_paid(0, Qt.Checked)
+    assert tab.charts[2].points() == []
+
+
+def test_year_end_report_runs_in_background(app, data_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(QMessageBox, "information", staticmethod(lambda *args: None))
+    data_file(
+        bills=[
+            {"name": "Rent", "amount": 900.0, "due_date": "2025-01-01", "paid": True}
+        ]
+    )
+    tab = project.FinancialTab()
+    path = str(tmp_path / "report.html")
+    tab.start_report(2025, path, workers=1)
+    assert background.wait(timeout=30)
+    assert "$900.00" in open(path).read()
+
+
+def test_restore_backup_reloads_every_tab(data_file, monkeypatch):
+    monkeypatch.setattr(
+        QMessageBox, "question", staticmethod(lambda *args: QMessageBox.Yes)
+    )
+    data_file(todos=make_todos(3))
+    window = project.MainApp()
+    backups.create(storage.copy_data(), "test")
+    data["todos"].clear()
+    save_data()
+    window.todo_tab.load_todos()
+
+    dialog = project.BackupDialog(window, on_restore=window.reload_data)
+    assert dialog.backup_table.rowCount() == 1
+    dialog.backup_table.selectRow(0)
+    dialog.restore_selected()
+    assert len(data["todos"]) == 3
+    assert window.todo_tab.model.rowCount() == 3
+    assert [m["reason"] for m in backups.list_backups()] == ["before restore", "test"]
+
+
+def test_palette_quick_adds_and_opens_records(data_file, monkeypatch):
+    data_file(
+        todos=make_todos(3),
+        categories=[{"name": "Home", "color": "#000000"}],
+    )
+    window = project.MainApp()
+
+    palette = project.CommandPalette(window)
+    palette.query_edit.setText("Pay rent #home due:2030-02-01")
+    assert "Add task: Pay rent" in palette.result_list.item(0).text()
+    palette.activate()
+    assert data["todos"][-1]["task"] == "Pay rent"
+    assert data["todos"][-1]["category"] == "Home"
+    assert window.todo_tab.model.rowCount() == 4
+    assert read_data(storage.data_file)["todos"][-1]["due_date"] == "2030-02-01"
+
+    opened = []
+    monkeypatch.setattr(window.todo_tab, "edit_todo", opened.append)
+    palette = project.CommandPalette(window)
+    palette.query_edit.setText("task 2")
+    palette.activate()
+    assert opened == [2]
+    assert window.currentWidget() is window.todo_tab
+
+
+def test_old_records_move_to_history(app, data_file):
+    todos = make_todos(3)
+    todos[0].update(completed=True, completed_on="2020-01-01")
+    data_file(
+        todos=todos,
+        bills=[
+            {"name": "Rent", "amount": 900.0, "due_date": "2020-01-01", "paid": True}
+        ],
+    )
+    loader = storage.stream_load_data()
+    window = project.MainApp()
+    window.continue_loading(loader, project.load_first_screenful(loader))
+    while window.loading_timer.isActive():
+        app.processEvents()
+    assert window.todo_tab.model.rowCount() == 2
+    assert window.bills_tab.bills_table.rowCount() == 0
+    assert read_data(storage.data_file)["archived_totals"] == {
+        "2020-01": {"": 900.0}
+    }
+    background.wait()
+    # The startup backup still has them
+    assert backups.load(backups.list_backups()[0]["id"])["bills"]
+
+    dialog = project.HistoryDialog(window)
+    assert dialog.model.rowCount() == 2
+    dialog.search_edit.setText("rent")
+    assert dialog.model.rowCount() == 1
+    assert dialog.model.index(0, 3).data() == "$900.00"
+    assert {entry.label for entry in archive.index()} == {"Rent", "Task 0"}
+
+    window.todo_tab.toggle_completed(0, Qt.Checked)
+    assert data["todos"][0]["completed_on"] == datetime.date.today().isoformat()
+
+
+def test_subtasks_block_their_parent(data_file, answer_dialog, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(
+        QMessageBox, "warning", staticmethod(lambda *args: warnings.append(args[2]))
+    )
+    data_file(todos=make_todos(3))
+    tab = project.ToDoTab()
+
+    monkeypatch.setattr(
+        project.QInputDialog, "getText", staticmethod(lambda *args: ("Sand", True))
+    )
+    tab.add_subtask(0)
+    assert [tab.model.index(row, 2).data() for row in range(4)] == [
+        "Task 0",
+        "    ↳ Sand",
+        "Task 1",
+        "Task 2",
+    ]
+    assert tab.model.index(0, 0).data() == "🔒 Not Started"
+
+    # The parent waits for its subtask
+    tab.model.setData(tab.model.index(0, 1), Qt.Checked, Qt.CheckStateRole)
+    assert not data["todos"][0]["completed"]
+    assert warnings == ["Finish these first: Sand"]
+    tab.model.setData(tab.model.index(1, 1), Qt.Checked, Qt.CheckStateRole)
+    assert data["todos"][3]["completed"]
+    assert tab.model.index(0, 0).data() == "Not Started"
+
+    # Task 2 waits for Task 1; Task 1 waiting for Task 2 would be a cycle
+    answer_dialog(None, None, "Task 1")
+    tab.edit_todo(2)
+    assert tab.model.index(3, 0).data() == "🔒 Not Started"
+    answer_dialog(None, None, "Task 2")
+    tab.edit_todo(1)
+    assert "blocked_by" not in data["todos"][1]
+    assert "waiting for itself" in warnings[-1]
+
+
+def test_recurring_todo_moves_to_next_occurrence(data_file):
+    todos = make_todos(1)
+    todos[0].update(repeat="monthly", due_date="2020-01-15")
+    data_file(todos=todos)
+    tab = project.ToDoTab()
+    assert tab.model.index(0, 2).data() == "🔁 Task 0"
+    tab.model.setData(tab.model.index(0, 1), Qt.Checked, Qt.CheckStateRole)
+    assert len(data["todos"]) == 2
+    assert not data["todos"][0]["completed"]
+    assert data["todos"][0]["due_date"] > datetime.date.today().isoformat()
+    done = data["todos"][1]
+    assert done["completed"] and done["due_date"] == "2020-01-15"
+    assert "repeat" not in done
+
+
+def test_api_writes_update_rows(app, data_file):
+    data_file(
+        todos=make_todos(3),
+        bills=[{"name": "Rent", "amount": 900.0, "due_date": "", "paid": False}],
+    )
+    window = project.MainApp()
+    window.start_api(port=0)
+    base = window.api_server.url
+    results = []
+
+    def send(method, path, body):
+        request = urllib.request.Request(
+            base + path,
+            json.dumps(body).encode("utf-8"),
+            {"Content-Type": "application/json"},
+            method=method,
+        )
+        # The request is answered on the GUI thread, so it waits for events
+        thread = threading.Thread(
+            target=lambda: results.append(urllib.request.urlopen(request).status)
+        )
+        thread.start()
+        while thread.is_alive():
+            app.processEvents()
+        thread.join()
+
+    try:
+        send("POST", "/todos", {"task": "From the phone"})
+        send("PATCH", "/todos/1", {"completed": True})
+        send("PATCH", "/bills/0", {"paid": True})
+    finally:
+        window.stop_api()
+    assert results == [201, 200, 200]
+    model = window.todo_tab.model
+    assert model.rowCount() == 4
+    assert model.index(3, 2).data() == "From the phone"
+    assert model.index(1, 1).data(Qt.CheckStateRole) == Qt.Checked
+    assert window.bills_tab.total_label.text() == "<b>Monthly Total: $0.00</b>"
+    assert read_data(storage.data_file)["bills"][0]["paid"] is True
+
+
+def test_summary_updates_only_changed_cells(data_file):
+    cards = [
+        {
+            "owner": f"Owner {i}",
+            "card_name": "Visa",
+            "limit": 1000.0,
+            "balance": 100.0,
+            "payment": 25.0,
+            "due_date": "2030-01-01",
+            "apr": 20.0,
+        }
+        for i in range(300)
+    ]
+    data_file(credit_cards=cards)
+    tab = project.FinancialTab()
+    model = tab.cc_summary.model()
+    assert model.rowCount() == 4 + 300
+    assert "Owner 299's Debt: $100.00 (10% used)" in tab.cc_summary.text()
+
+    changed, inserted, reset = [], [], []
+    model.dataChanged.connect(lambda top, end: changed.append((top.row(), end.row())))
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append(first))
+    model.modelReset.connect(lambda: reset.append(True))
+    data["credit_cards"][150]["balance"] = 300.0
+    tab.load_credit_cards()
+    # The totals and that owner's row; every other row is left alone
+    assert sorted(changed) == [(1, 1), (2, 2), (3, 3), (4 + 150, 4 + 150)]
+
+    data["credit_cards"].append({**cards[0], "owner": "Newcomer"})
+    tab.load_credit_cards()
+    assert inserted == [4 + 300] and not reset
+    assert tab.cc_summary.text().endswith("Newcomer's Debt: $100.00 (10% used)")
+
+
+def test_plugin_collection_tab(data_file, answer_dialog):
+    from test_registry import VEHICLES
+
+    registry.register(VEHICLES)
+    registry.computed("vehicles", "Monthly")(lambda vehicle: vehicle["value"] / 60)
+    try:
+        data_file(vehicles=[])
+        window = project.MainApp()
+        tab = window.collection_tabs["vehicles"]
+        assert window.tabText(window.indexOf(tab)) == "Vehicles"
+
+        answer_dialog("Van", "Sam", "6,000", "")
+        tab.add_button.click()
+        assert read_data(storage.data_file)["vehicles"][0]["value"] == 6000.0
+        assert [tab.model.index(0, c).data() for c in (0, 2, 4, 5)] == [
+            "Van",
+            "6,000.00",
+            "No",
+            "100.00",
+        ]
+        assert "Value: Sam" in tab.summary.text()
+
+        answer_dialog(None, "Alex", "1200", "2027-01-01")
+        tab.show_record_dialog(0)
+        assert data["vehicles"][0]["renewal"] == "2027-01-01"
+        assert tab.model.index(0, 5).data() == "20.00"
+        assert "Value: Alex" in tab.summary.text()
+        assert "Value: Sam" not in tab.summary.text()
+
+        tab.delete_record(0)
+        assert data["vehicles"] == [] and tab.model.rowCount() == 0
+    finally:
+        registry.unregister("vehicles")
@@ -0,0 +1,106 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import threading
+import time
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+import jobs
+from jobs import HIGH, LOW, JobQueue, StallGuard
+
+
+@pytest.fixture(scope="session")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def queue(app):
+    return JobQueue(max_threads=1)
+
+
+def blocker():
+    """A job that runs until released, to keep the single thread busy."""
+    event = threading.Event()
+    return event, lambda: event.wait(5)
+
+
+def test_results_and_errors_are_delivered(queue):
+    results, errors = [], []
+    queue.submit(sum, [1, 2, 3], on_result=results.append)
+    queue.submit(int, "x", on_error=errors.append)
+    assert queue.wait(5)
+    assert results == [6]
+    assert isinstance(errors[0], ValueError)
+
+
+def test_same_key_jobs_are_coalesced(queue):
+    release, block = blocker()
+    calls, results = [], []
+    queue.submit(block, key="save")
+    for i in range(5):
+        queue.submit(calls.append, i, key="save", on_result=results.append)
+    release.set()
+    assert queue.wait(5)
+    # The running job finished; of the five after it only the last ran
+    assert calls == [4]
+    assert results == [None]
+
+
+def test_running_job_errors_are_reported_when_superseded(queue):
+    release, block = blocker()
+    errors = []
+
+    def fail():
+        block()
+        raise OSError("disk full")
+
+    queue.submit(fail, key="save", on_error=errors.append)
+    queue.submit(int, "1", key="save")
+    release.set()
+    assert queue.wait(5)
+    assert [str(error) for error in errors] == ["disk full"]
+
+
+def test_priorities(queue):
+    release, block = blocker()
+    order = []
+    queue.submit(block)
+    queue.submit(order.append, "low", priority=LOW)
+    queue.submit(order.append, "high", priority=HIGH)
+    release.set()
+    assert queue.wait(5)
+    assert order == ["high", "low"]
+
+
+def test_cancelled_jobs_stop_and_deliver_nothing(queue):
+    started = threading.Event()
+    results = []
+
+    def work():
+        started.set()
+        for i in range(1000):
+            jobs.report_progress(i, 1000)
+            time.sleep(0.001)
+        return "done"
+
+    job = queue.submit(work, on_result=results.append)
+    assert started.wait(5)
+    queue.cancel(job)
+    assert queue.wait(5)
+    assert results == []
+
+
+def test_stall_guard_logs_blocked_event_loop(app, caplog):
+    guard = StallGuard(threshold_ms=100, interval_ms=10)
+    time.sleep(0.3)
+    with caplog.at_level("WARNING", logger="jobs"):
+        deadline = time.perf_counter() + 1
+        while not guard.stalls and time.perf_counter() < deadline:
+            app.processEvents()
+    guard.timer.stop()
+    assert guard.stalls and guard.stalls[0] >= 0.2
+    assert "GUI thread stalled" in caplog.text
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+import ledger as ledger_module
+import storage
+from ledger import OPENING_DATE, Ledger
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    monkeypatch.setitem(storage.data, "transactions", [])
+    return Ledger()
+
+
+def test_balance_by_date(ledger):
+    account = {"name": "Checking", "balance": 0}
+    ledger.add(account, 100, "2025-01-01")
+    ledger.add(account, -30, "2025-02-01")
+    ledger.add(account, 50, "2025-03-01")
+    assert account["balance"] == 120
+    assert ledger.balance(account) == 120
+    assert ledger.balance(account, "2024-12-31") == 0
+    assert ledger.balance(account, "2025-02-01") == 70
+    assert ledger.balance(account, "2025-02-15") == 70
+
+
+def test_backdated_entry_updates_later_balances(ledger):
+    account = {"name": "Checking", "balance": 0}
+    ledger.add(account, 100, "2025-01-01")
+    ledger.add(account, 100, "2025-03-01")
+    ledger.add(account, -40, "2025-02-01")
+    assert ledger.balance(account, "2025-02-01") == 60
+    assert ledger.balance(account) == 160
+    assert [e["amount"] for e in ledger.entries(account)] == [100, -40, 100]
+
+
+def test_checkpoints_follow_backdated_entries(ledger, monkeypatch):
+    monkeypatch.setattr(ledger_module, "CHECKPOINT", 4)
+    account = {"name": "Checking", "balance": 0}
+    rng = random.Random(3)
+    added = []
+    for _ in range(60):
+        date = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        amount = rng.randint(-50, 100)
+        ledger.add(account, amount, date)
+        added.append((date, amount))
+    for month in range(1, 13):
+        date = f"2025-{month:02d}-15"
+        expected = sum(amount for day, amount in added if day <= date)
+        assert ledger.balance(account, date) == expected
+    assert account["balance"] == ledger.balance(account) == sum(a for _, a in added)
+
+
+def test_first_transaction_carries_stored_balance(ledger):
+    card = {"card_name": "Visa", "balance": 500.0}
+    assert ledger.balance(card) == 500.0
+    ledger.add(card, 25.5, "2025-05-01", "Groceries")
+    assert card["balance"] == 525.5
+    assert ledger.entries(card)[0]["date"] == OPENING_DATE
+
+
+def test_set_balance_records_adjustment(ledger):
+    account = {"name": "Savings", "balance": 1000.0}
+    ledger.set_balance(account, 1250.0, "2025-06-01")
+    assert ledger.balance(account) == 1250.0
+    assert ledger.entries(account)[-1]["amount"] == 250.0
+    assert len(storage.data["transactions"]) == 2
+
+
+def test_picks_up_appended_transactions(ledger):
+    account = {"id": "abc", "balance": 0}
+    assert ledger.balance(account) == 0
+    storage.data["transactions"].append(
+        {"account": "abc", "date": "2025-01-01", "amount": 10.0, "memo": ""}
+    )
+    assert ledger.balance(account) == 10.0
+
+
+def test_dated_set_balance_keeps_later_entries(ledger):
+    account = {"name": "Savings", "balance": 0}
+    ledger.add(account, 100, "2025-01-01")
+    ledger.add(account, 50, "2025-03-01")
+    ledger.set_balance(account, 80, "2025-02-01")
+    assert ledger.balance(account, "2025-02-01") == 80
+    assert account["balance"] == ledger.balance(account) == 130
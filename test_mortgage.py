@@ -0,0 +1,87 @@
+import datetime
+
+import pytest
+
+from mortgage import (
+    amortize,
+    equity,
+    loan_balance,
+    monthly_payment,
+    projected_equity,
+    schedule,
+)
+
+HOUSE = {
+    "address": "1 Main St",
+    "value": 400000.0,
+    "loan": 300000.0,
+    "rate": 6.0,
+    "term": 30,
+    "start_date": "2020-01-15",
+    "extra": 0.0,
+}
+
+
+def test_monthly_payment():
+    assert monthly_payment(300000, 6.0, 30) == pytest.approx(1798.65, abs=0.01)
+    assert monthly_payment(1200, 0.0, 1) == 100
+
+
+def test_schedule_matches_month_by_month_amortization():
+    plan = amortize(300000.0, 6.0, 30.0)
+    assert plan.payoff_month == 360
+    assert plan.balances[-1] == 0.0
+
+    balance, interest = 300000.0, 0.0
+    for month in range(12):
+        charged = balance * 0.005
+        interest += charged
+        balance += charged - 1798.6515754582708
+    assert plan.balances[11] == pytest.approx(balance, abs=0.01)
+    assert plan.interest[11] == pytest.approx(interest, abs=0.01)
+    assert plan.interest[-1] == pytest.approx(1798.65 * 360 - 300000, abs=5)
+
+
+def test_extra_payments_pay_off_sooner_and_cost_less():
+    plan = amortize(300000.0, 6.0, 30.0)
+    faster = amortize(300000.0, 6.0, 30.0, 500.0)
+    assert faster.payoff_month < plan.payoff_month
+    assert faster.interest[-1] < plan.interest[-1]
+
+
+def test_balance_and_equity_over_time():
+    assert loan_balance(HOUSE, datetime.date(2020, 1, 31)) == 300000.0
+    after_year = loan_balance(HOUSE, datetime.date(2021, 1, 15))
+    assert after_year == schedule(HOUSE).balances[11]
+    assert loan_balance(HOUSE, datetime.date(2060, 1, 1)) == 0.0
+    amount, pct = equity(HOUSE, datetime.date(2021, 1, 15))
+    assert amount == pytest.approx(400000.0 - after_year)
+    assert pct == pytest.approx(amount / 4000)
+    later = projected_equity(HOUSE, 5, today=datetime.date(2021, 1, 15))
+    assert later == equity(HOUSE, datetime.date(2026, 1, 15))[0]
+
+
+def test_properties_without_terms_keep_their_balance():
+    prop = {"address": "Lot", "value": 50000.0, "loan": 20000.0}
+    assert schedule(prop) is None
+    assert loan_balance(prop) == 20000.0
+    assert equity(prop) == (30000.0, 60.0)
+
+
+def test_schedules_are_cached_per_terms():
+    amortize.cache_clear()
+    schedule(HOUSE)
+    schedule(dict(HOUSE, address="renamed"))
+    assert amortize.cache_info().hits == 1
+    schedule(dict(HOUSE, extra=100.0))
+    assert amortize.cache_info().misses == 2
+
+
+def test_equity_follows_edits():
+    prop = {"address": "Lot", "value": 50000.0, "loan": 20000.0}
+    day = datetime.date(2025, 6, 1)
+    assert equity(prop, day) == (30000.0, 60.0)
+    prop["value"] = 40000.0
+    assert equity(prop, day) == (20000.0, 50.0)
+    prop.update(loan=30000.0, rate=0.0, term=10, start_date="2025-01-01")
+    assert equity(prop, day)[0] == 40000.0 - 30000.0 * (1 - 5 / 120)
@@ -0,0 +1,46 @@
+import pytest
+
+from payoff import MAX_MONTHS, _simulate, simulate
+
+BALANCES = [5000.0, 1000.0]
+APRS = [24.0, 12.0]
+MINIMUMS = [100.0, 50.0]
+
+
+def test_avalanche_pays_less_interest_than_snowball():
+    avalanche = simulate(BALANCES, APRS, MINIMUMS, 400, "avalanche")
+    snowball = simulate(BALANCES, APRS, MINIMUMS, 400, "snowball")
+    assert avalanche.paid_off and snowball.paid_off
+    assert avalanche.total_interest < snowball.total_interest
+    # Snowball clears the small card first
+    assert snowball.payoff_months[1] < avalanche.payoff_months[1]
+    assert avalanche.total_paid == pytest.approx(
+        sum(BALANCES) + avalanche.total_interest, abs=0.05
+    )
+
+
+def test_zero_interest_plan_is_exact():
+    result = simulate([300.0], [0.0], [100.0], 100)
+    assert result.months == 3
+    assert result.total_interest == 0
+    assert result.schedule == ((200.0,), (100.0,), (0.0,))
+
+
+def test_budget_too_small_never_pays_off():
+    result = simulate([10000.0], [30.0], [50.0], 50)
+    assert not result.paid_off
+    assert result.months == MAX_MONTHS
+    assert result.payoff_months == (None,)
+
+
+def test_repeated_scenarios_are_cached():
+    _simulate.cache_clear()
+    first = simulate(BALANCES, APRS, MINIMUMS, 500)
+    second = simulate(tuple(BALANCES), APRS, MINIMUMS, 500.0)
+    assert first is second
+    assert _simulate.cache_info().hits == 1
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        simulate(BALANCES, APRS, MINIMUMS, 500, "random")
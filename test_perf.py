@@ -0,0 +1,31 @@
+import perf
+
+
+def test_timed_is_passthrough_when_disabled(monkeypatch):
+    monkeypatch.setattr(perf, "enabled", False)
+    monkeypatch.setattr(perf, "timings", {})
+
+    @perf.timed("double")
+    def double(x):
+        return x * 2
+
+    assert double(4) == 8
+    assert perf.timings == {}
+
+
+def test_timed_records_calls(monkeypatch):
+    monkeypatch.setattr(perf, "enabled", True)
+    monkeypatch.setattr(perf, "timings", {})
+    seen = []
+    monkeypatch.setattr(perf, "listeners", [lambda name, s: seen.append(name)])
+
+    @perf.timed()
+    def work():
+        return "done"
+
+    assert work() == "done"
+    with perf.timer("block"):
+        pass
+    assert perf.timings[work.__qualname__][0] == 1
+    assert seen == [work.__qualname__, "block"]
+    assert "block" in perf.report()
@@ -0,0 +1,122 @@
+import pytest
+
+import api
+import registry
+import schema
+import search
+import storage
+from registry import DATE, Collection, Field, Total
+from storage import data
+
+VEHICLES = Collection(
+    "vehicles",
+    "Vehicles",
+    "Vehicle",
+    fields=[
+        Field("name", "Name"),
+        Field("owner", "Owner"),
+        Field("value", "Value", float),
+        Field("renewal", "Insurance Renewal", DATE, required=False),
+        Field("insured", "Insured", bool),
+    ],
+    totals=[
+        Total("Vehicles"),
+        Total("Total Value", "value"),
+        Total("Value", "value", by="owner"),
+    ],
+)
+
+
+@pytest.fixture
+def vehicles(monkeypatch):
+    registry.register(VEHICLES)
+    monkeypatch.setitem(data, "vehicles", [])
+    yield registry.store("vehicles")
+    registry.unregister("vehicles")
+
+
+def vehicle(name, owner, value):
+    return {"name": name, "owner": owner, "value": value, "insured": False}
+
+
+def test_register_adds_to_schema_and_search(vehicles):
+    assert schema.FIELDS["vehicles"] == {
+        "name": str,
+        "owner": str,
+        "value": schema.NUMBER,
+        "insured": bool,
+    }
+    assert schema.OPTIONAL_FIELDS["vehicles"] == {"renewal": str}
+    assert search.SOURCES["vehicles"][1]({"name": "Van"}) == "Van"
+    assert storage.default_data()["vehicles"] == []
+    with pytest.raises(ValueError, match="already"):
+        registry.register(VEHICLES._replace(name="todos"))
+
+
+def test_typed_values_become_records(vehicles):
+    record = vehicles.record(
+        {"name": " Van ", "owner": "Sam", "value": "12,500", "insured": True}
+    )
+    assert record == {"name": "Van", "owner": "Sam", "value": 12500.0, "insured": True}
+    for values, message in (
+        ({"owner": "Sam", "value": "1"}, "Name cannot be empty"),
+        ({"name": "Van", "owner": "Sam", "value": "lots"}, "must be a number"),
+        (
+            {"name": "Van", "owner": "Sam", "value": "1", "renewal": "soon"},
+            "YYYY-MM-DD",
+        ),
+    ):
+        with pytest.raises(ValueError, match=message):
+            vehicles.record(values)
+
+
+def test_totals_follow_changes(vehicles):
+    vehicles.add(vehicle("Van", "Sam", 10000.0))
+    vehicles.add(vehicle("Bike", "Alex", 500.0))
+    vehicles.replace(1, vehicle("Bike", "Sam", 700.0))
+    assert vehicles.summary() == [
+        (0, "Vehicles", "2"),
+        (1, "Total Value", "10,700.00"),
+        ((2, "Sam"), "Value: Sam", "10,700.00"),
+    ]
+    vehicles.remove(0)
+    assert vehicles.summary()[1:] == [
+        (1, "Total Value", "700.00"),
+        ((2, "Sam"), "Value: Sam", "700.00"),
+    ]
+
+    # A reload replaces the list, and the totals are counted again
+    data["vehicles"] = [vehicle("Car", "Jo", 3000.0)]
+    assert vehicles.summary()[2] == ((2, "Jo"), "Value: Jo", "3,000.00")
+
+
+def test_computed_columns_are_cached_per_record(vehicles):
+    calls = []
+
+    @registry.computed("vehicles", "Monthly Depreciation")
+    def depreciation(record):
+        calls.append(record["name"])
+        return record["value"] / 60
+
+    vehicles.add(vehicle("Van", "Sam", 6000.0))
+    vehicles.add({"name": "Odd", "owner": "Jo", "value": None})
+    assert vehicles.computed(data["vehicles"][0]) == [100.0]
+    assert vehicles.computed(data["vehicles"][0]) == [100.0]
+    assert vehicles.computed(data["vehicles"][1]) == [None]
+    assert calls == ["Van", "Odd"]
+
+    vehicles.replace(0, vehicle("Van", "Sam", 1200.0))
+    assert vehicles.computed(data["vehicles"][0]) == [20.0]
+
+
+def test_api_writes_plugin_collections(vehicles, monkeypatch):
+    monkeypatch.setattr(storage, "background_writer", None)
+    monkeypatch.setattr(api, "save_data", lambda: None)
+    body = {"name": "Van", "owner": "Sam", "value": 9000.0}
+    status, item = api.handle("s", "POST", ["vehicles"], {}, {}, body)
+    assert (status, item["record"]["insured"]) == (201, False)
+
+    api.handle("s", "PATCH", ["vehicles", "0"], {}, {}, {"value": 6000.0})
+    assert vehicles.summary()[1] == (1, "Total Value", "6,000.00")
+    with pytest.raises(api.ApiError, match="YYYY-MM-DD"):
+        api.handle("s", "PATCH", ["vehicles", "0"], {}, {}, {"renewal": "May"})
@@ -0,0 +1,81 @@
+import csv
+
+import pytest
+
+import reports
+from ledger import ledger
+from storage import data
+
+
+@pytest.fixture
+def year_data(fresh_data):
+    data["accounts"] = [
+        {"name": "Checking", "type": "Checking", "institution": "", "balance": 0.0}
+    ]
+    data["credit_cards"] = [
+        {
+            "owner": "Alex",
+            "card_name": "Visa",
+            "limit": 1000.0,
+            "balance": 0.0,
+            "payment": 25.0,
+            "due_date": "",
+        }
+    ]
+    data["bills"] = [
+        {"name": "Rent", "amount": 900.0, "due_date": "2025-01-01", "paid": True},
+        {"name": "Power", "amount": 80.0, "due_date": "2025-03-05", "paid": False},
+        {"name": "Next", "amount": 50.0, "due_date": "2026-01-05", "paid": False},
+    ]
+    checking, visa = data["accounts"][0], data["credit_cards"][0]
+    ledger.add(checking, 3000.0, "2025-01-02", "Salary")
+    ledger.add(checking, -900.0, "2025-01-03", "Rent", "Home")
+    ledger.add(visa, 120.0, "2025-03-10", "Groceries", "Home")
+    ledger.add(visa, -120.0, "2025-04-01", "Payment")
+    ledger.add(checking, 100.0, "2026-01-02", "Next year")
+    return data
+
+
+def test_in_process_and_pool_reports_match(year_data):
+    progress = []
+    report = reports.build_report(
+        2025, workers=0, progress=lambda *done: progress.append(done)
+    )
+    assert progress[-1] == (12, 12)
+    assert report["totals"] == {
+        "bills_due": 980.0,
+        "bills_paid": 900.0,
+        "charges": 120.0,
+        "card_payments": 120.0,
+        "deposits": 3000.0,
+        "withdrawals": 900.0,
+    }
+    assert report["months"]["2025-03"]["bills_due"] == 80.0
+    assert report["categories"] == {"Home": 1020.0}
+    assert report["accounts"] == [("Checking", "Checking", 2100.0)]
+    assert report["transactions"] == 4
+
+    assert reports.build_report(2025, workers=2) == report
+
+
+def test_partitions_are_snapshots(year_data):
+    parts = reports.partitions(2025)
+    data["bills"][0]["amount"] = 1.0
+    data["bills"][0]["paid_on"] = "2025-01-01"
+    data["bills"].append(dict(data["bills"][1]))
+    report = reports.aggregate_report(2025, parts, {}, workers=0)
+    assert report["totals"]["bills_due"] == 980.0
+
+
+def test_writers(year_data, tmp_path):
+    report = reports.build_report(2025, workers=0)
+    reports.write_report(report, str(tmp_path / "report.csv"))
+    with open(tmp_path / "report.csv", newline="") as f:
+        rows = list(csv.reader(f))
+    assert ["Total", "980.0", "900.0", "120.0", "120.0", "3000.0", "900.0"] in rows
+
+    reports.write_report(report, str(tmp_path / "report.html"))
+    assert "<h2>Spending by Category</h2>" in (tmp_path / "report.html").read_text()
+
+    with pytest.raises(ValueError):
+        reports.write_report(report, str(tmp_path / "report.txt"))
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+import schema
+import storage
+from schema import SCHEMA_VERSION, SchemaError, upgrade
+
+
+def legacy_file():
+    """A data file from before schema versions, as older releases wrote it."""
+    return {
+        "todos": [{"task": "Pay rent", "completed": True}],
+        "credit_cards": [
+            {
+                "owner": "Alex",
+                "card_name": "Visa",
+                "limit": "1,000",
+                "available": 900.0,
+                "balance": 300.0,
+            }
+        ],
+        "categories": ["Home", {"name": "Work", "color": "#FF0000"}],
+        "properties": [
+            {
+                "address": "1 Main St",
+                "value": 400000.0,
+                "loan": 300000.0,
+                "equity": 100000.0,
+                "equity_pct": 25.0,
+            }
+        ],
+        "accounts": [{"name": "Checking", "balance": 100.0}],
+        "bills": [{"name": "Power", "amount": 80.0}],
+    }
+
+
+def test_upgrades_legacy_records():
+    obj = upgrade(legacy_file())
+    assert obj["schema_version"] == SCHEMA_VERSION
+    assert obj["todos"][0]["status"] == "Completed"
+    assert obj["todos"][0]["due_date"] == ""
+    assert obj["categories"][0] == {"name": "Home", "color": "#000000"}
+    card = obj["credit_cards"][0]
+    assert card["limit"] == 1000.0 and card["apr"] == 0.0
+    # Derived values are computed, not stored
+    assert "available" not in card
+    assert obj["properties"][0] == {
+        "address": "1 Main St",
+        "value": 400000.0,
+        "loan": 300000.0,
+    }
+    assert obj["accounts"][0]["institution"] == ""
+    assert obj["bills"][0]["paid"] is False
+
+
+def test_upgrade_is_idempotent():
+    once = upgrade(legacy_file())
+    assert upgrade(json.loads(json.dumps(once))) == once
+
+
+def test_current_records_are_not_migrated():
+    obj = storage.default_data()
+    obj["todos"].append({"task": "Pay rent"})
+    with pytest.raises(SchemaError, match=r"todos\[0\].*'status'"):
+        upgrade(obj)
+
+
+@pytest.mark.parametrize(
+    "collection, record",
+    [
+        ("bills", {"name": "Power", "amount": "lots"}),
+        ("bills", {"name": "Power", "amount": True, "due_date": "", "paid": False}),
+        ("todos", "Pay rent"),
+        ("properties", {"address": "1 Main St", "value": 1.0, "term": "30"}),
+    ],
+)
+def test_invalid_records(collection, record):
+    obj = legacy_file()
+    obj[collection] = [record]
+    with pytest.raises(SchemaError, match=collection):
+        upgrade(obj)
+
+
+def test_newer_files_are_refused():
+    obj = storage.default_data()
+    obj["schema_version"] = SCHEMA_VERSION + 1
+    with pytest.raises(SchemaError, match="schema version"):
+        upgrade(obj)
+
+
+@pytest.mark.parametrize("loader", ["load_data", "stream_load_data"])
+def test_loaders_migrate(tmp_path, monkeypatch, loader):
+    path = str(tmp_path / "data.json")
+    storage.write_data(legacy_file(), path)
+    monkeypatch.setattr(storage, "data_file", path)
+    result = getattr(storage, loader)()
+    if loader == "stream_load_data":
+        for _ in result:
+            pass
+    assert storage.data == {**storage.empty_data(), **upgrade(legacy_file())}
+    assert list(storage.data)[0] == schema.VERSION_KEY
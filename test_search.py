@@ -0,0 +1,113 @@
+import datetime
+import time
+
+import pytest
+
+from search import SearchIndex, has_markers, parse_quick_add, trigrams
+from storage import data
+
+# Latency budget of one query on a large index, in seconds
+SEARCH_BUDGET = 0.016
+
+
+@pytest.fixture
+def records(fresh_data):
+    data["todos"] = [
+        {"task": "Pay rent", "category": "Home"},
+        {"task": "Renew passport", "category": "Personal"},
+    ]
+    data["bills"] = [{"name": "Electricity"}, {"name": "Rent"}]
+    data["credit_cards"] = [{"owner": "Alex", "card_name": "Visa"}]
+    data["accounts"] = [{"name": "Checking", "institution": "First Bank"}]
+    data["properties"] = [{"address": "1 Main St"}]
+    return data
+
+
+def labels(results):
+    return [result.label for result in results]
+
+
+def test_trigrams():
+    assert trigrams("Ab") == {"  a", " ab", "ab "}
+    assert trigrams("  A   b ") == trigrams("a b")
+
+
+def test_finds_across_collections(records):
+    index = SearchIndex()
+    index.sync()
+    assert labels(index.search("rent"))[:2] == ["Rent", "Pay rent"]
+    assert index.search("visa")[0].collection == "credit_cards"
+    assert labels(index.search("first bank")) == ["Checking First Bank"]
+    assert index.search("main")[0].record is records["properties"][0]
+    # Typos still match
+    assert labels(index.search("pasport"))[0] == "Renew passport"
+    assert index.search("qqq") == []
+    assert index.search("  ") == []
+
+
+def test_sync_follows_edits(records):
+    index = SearchIndex()
+    index.sync()
+    records["todos"][0]["task"] = "Pay mortgage"
+    records["todos"].append({"task": "Book dentist"})
+    del records["bills"][1]
+    index.sync()
+    assert labels(index.search("rent")) == ["Renew passport"]
+    assert labels(index.search("mortgage")) == ["Pay mortgage"]
+    assert labels(index.search("dentist")) == ["Book dentist"]
+    assert len(index.entries) == len(index.lengths) == 7
+
+
+def test_large_index_latency(records):
+    records["todos"] = [{"task": f"Task {i}"} for i in range(100_000)]
+    index = SearchIndex()
+    index.sync()
+    for query in ["t", "task", "task 5", "task 50123", "tsak 5012"]:
+        start = time.perf_counter()
+        results = index.search(query)
+        assert time.perf_counter() - start < SEARCH_BUDGET, query
+        assert results
+    assert index.search("task 50123")[0].label == "Task 50123"
+    assert index.search("tsak 50123")[0].label == "Task 50123"
+
+
+def test_quick_add_task():
+    today = datetime.date(2026, 10, 19)
+    added = parse_quick_add("Pay rent #home due:2026-11-01", ["Home"], today)
+    assert added.collection == "todos"
+    assert added.record == {
+        "task": "Pay rent",
+        "category": "Home",
+        "status": "Not Started",
+        "due_date": "2026-11-01",
+        "completed": False,
+    }
+    added = parse_quick_add("Call mom due:tomorrow", [], today)
+    assert added.record["due_date"] == "2026-10-20"
+    assert added.record["category"] == ""
+
+
+def test_quick_add_bill():
+    added = parse_quick_add("Electricity $1,120.50 #Home", ["Home"])
+    assert added.collection == "bills"
+    assert added.record == {
+        "name": "Electricity",
+        "amount": 1120.5,
+        "due_date": "",
+        "paid": False,
+        "category": "Home",
+    }
+
+
+@pytest.mark.parametrize(
+    "text", ["#Home due:2026-11-01", "Pay rent #Nowhere", "Pay rent due:soon"]
+)
+def test_quick_add_errors(text):
+    with pytest.raises(ValueError):
+        parse_quick_add(text, ["Home"])
+
+
+def test_markers():
+    assert has_markers("Pay rent #Home")
+    assert has_markers("Rent $100")
+    assert not has_markers("Pay rent")
@@ -0,0 +1,91 @@
+import io
+
+import pytest
+
+import storage
+from ledger import ledger
+from statements import (
+    import_statements,
+    parse_csv,
+    parse_date,
+    parse_ofx,
+    parse_qif,
+)
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250301120000<TRNAMT>-42.10<NAME>Grocer
+<MEMO>Weekly</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250302<TRNAMT>1,000.00<NAME>Payroll
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+QIF = """!Type:Bank
+D03/01/2025
+T-42.10
+PGrocer
+MWeekly
+^
+D3/ 2'25
+T1,000.00
+PPayroll
+^
+"""
+
+
+def test_parse_date_formats():
+    assert parse_date("2025-03-01") == "2025-03-01"
+    assert parse_date("03/01/2025") == "2025-03-01"
+    assert parse_date("3/ 1'25") == "2025-03-01"
+    with pytest.raises(ValueError):
+        parse_date("March first")
+
+
+def test_parse_ofx_across_chunks(monkeypatch):
+    import statements
+
+    monkeypatch.setattr(statements, "CHUNK_SIZE", 5)
+    rows = list(parse_ofx(io.StringIO(OFX)))
+    assert rows == [
+        {"date": "2025-03-01", "amount": -42.10, "memo": "Grocer Weekly"},
+        {"date": "2025-03-02", "amount": 1000.0, "memo": "Payroll"},
+    ]
+
+
+def test_parse_qif_and_csv():
+    assert [row["amount"] for row in parse_qif(io.StringIO(QIF))] == [-42.10, 1000.0]
+    csv_text = "Date,Description,Debit,Credit\n03/01/2025,Grocer,42.10,\n"
+    assert list(parse_csv(io.StringIO(csv_text))) == [
+        {"date": "2025-03-01", "amount": -42.10, "memo": "Grocer"}
+    ]
+
+
+def test_import_dedupes_overlapping_statements(tmp_path, fresh_data):
+    checking = {"name": "Checking", "balance": 0.0}
+    card = {"card_name": "Visa", "limit": 1000.0, "balance": 0.0}
+    storage.data["accounts"].append(checking)
+    storage.data["credit_cards"].append(card)
+
+    (tmp_path / "Checking").mkdir()
+    (tmp_path / "Checking" / "march.ofx").write_text(OFX)
+    (tmp_path / "Visa").mkdir()
+    (tmp_path / "Visa" / "march.csv").write_text(
+        "Date,Description,Amount\n"
+        "2025-03-01,Coffee,-4.00\n"
+        "2025-03-01,Coffee,-4.00\n"
+    )
+
+    summary = import_statements(tmp_path)
+    assert (summary["files"], summary["imported"], summary["duplicates"]) == (2, 4, 0)
+    assert ledger.balance(checking) == 957.90
+    assert ledger.balance(card) == 8.0
+    assert card["balance"] == 8.0
+
+    # The next statement overlaps the first one
+    (tmp_path / "Checking" / "april.qif").write_text(
+        QIF + "D04/01/2025\nT-15.00\nPGym\n^\n"
+    )
+    summary = import_statements(tmp_path)
+    assert summary["imported"] == 1
+    assert ledger.balance(checking) == 942.90
@@ -0,0 +1,142 @@
+import json
+import os
+
+import pytest
+
+import storage
+from storage import (
+    decode_snapshot,
+    detect_format,
+    encode_snapshot,
+    iter_records,
+    read_data,
+    write_data,
+)
+
+
+def test_snapshot_round_trip():
+    obj = storage.default_data()
+    obj["todos"].append({"task": "Pay rent", "completed": False})
+    assert decode_snapshot(encode_snapshot(obj)) == obj
+    assert decode_snapshot(encode_snapshot(obj, level=0)) == obj
+
+
+def test_snapshot_bad_version():
+    raw = bytearray(encode_snapshot({}))
+    raw[len(storage.SNAPSHOT_MAGIC)] = 99
+    with pytest.raises(ValueError):
+        decode_snapshot(bytes(raw))
+
+
+def test_detects_legacy_json(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"todos": [], "bills": []}, indent=4))
+    assert detect_format(path) == "json"
+    assert read_data(path) == {"todos": [], "bills": []}
+
+
+def test_save_keeps_loaded_format(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    write_data(storage.default_data(), path, "snapshot")
+    monkeypatch.setattr(storage, "data_file", path)
+    monkeypatch.setattr(storage, "data_format", "")
+    storage.load_data()
+    storage.data["todos"].append({"task": "x"})
+    storage.save_data()
+    assert detect_format(path) == "snapshot"
+    assert read_data(path)["todos"] == [{"task": "x"}]
+
+
+def test_background_writer_gets_a_copy(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    write_data(storage.default_data(), path)
+    monkeypatch.setattr(storage, "data_file", path)
+    storage.load_data()
+    saves = []
+    monkeypatch.setattr(
+        storage, "background_writer", lambda *args, **kwargs: saves.append(args)
+    )
+    storage.save_data()
+    storage.data["todos"].append({"task": "later"})
+
+    obj, target, fmt, _ = saves[0]
+    assert (target, fmt) == (path, "json")
+    assert obj == storage.default_data()
+    assert read_data(path) == storage.default_data()
+
+
+@pytest.mark.parametrize("fmt,level", [("json", 0), ("snapshot", 0), ("snapshot", 6)])
+def test_iter_records_matches_read_data(tmp_path, fmt, level):
+    obj = storage.default_data()
+    obj["todos"] = [{"task": f"Task {i}", "amount": i * 1.5} for i in range(200)]
+    obj["bills"] = []
+    obj["version"] = 12345
+    path = tmp_path / "data.json"
+    write_data(obj, path, fmt, level)
+
+    # A tiny chunk size splits values, numbers and strings across reads
+    parsed = {}
+    for name, value, is_record in iter_records(path, chunk_size=7):
+        if is_record:
+            parsed[name].append(value)
+        else:
+            parsed[name] = value
+    assert parsed == obj
+
+
+def test_stream_load_defers_saves(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    obj = storage.default_data()
+    del obj["schema_version"]
+    obj["todos"] = [{"task": "a"}, {"task": "b"}]
+    write_data(obj, path)
+    monkeypatch.setattr(storage, "data_file", path)
+
+    loader = storage.stream_load_data()
+    while next(loader) != "todos" or not storage.data["todos"]:
+        pass
+    storage.data["todos"][0]["task"] = "changed"
+    storage.save_data()
+    assert read_data(path)["todos"][0]["task"] == "a"
+
+    for _ in loader:
+        pass
+    assert [todo["task"] for todo in read_data(path)["todos"]] == ["changed", "b"]
+
+
+def test_streamed_snapshot_matches(tmp_path):
+    obj = storage.default_data()
+    obj["todos"] = [{"task": f"Task {i}", "completed": False} for i in range(2500)]
+    for level in (0, 6):
+        raw = b"".join(storage.iter_snapshot(obj, level))
+        assert decode_snapshot(raw) == obj
+
+
+def test_save_refuses_to_overwrite_outside_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    write_data(storage.default_data(), path)
+    monkeypatch.setattr(storage, "data_file", path)
+    storage.load_data()
+    storage.save_data()
+    assert not storage.changed_on_disk()
+
+    # Another program saves in between
+    outside = storage.default_data()
+    outside["todos"] = [
+        {
+            "task": "From a script",
+            "category": "",
+            "status": "Not Started",
+            "due_date": "",
+            "completed": False,
+        }
+    ]
+    with open(path, "w") as f:
+        json.dump(outside, f)
+    assert storage.changed_on_disk()
+    with pytest.raises(storage.ConflictError):
+        storage.save_data()
+    assert read_data(path) == outside
+    storage.load_data()
+    storage.save_data()
+    assert not os.path.exists(path + ".tmp")
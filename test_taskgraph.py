@@ -0,0 +1,149 @@
+import datetime
+import itertools
+import time
+
+import pytest
+
+from taskgraph import CycleError, TaskGraph, complete_occurrence, occurrences
+
+TODAY = datetime.date(2026, 10, 19)
+# Time budget of one toggle in a large graph, in seconds
+TOGGLE_BUDGET = 0.005
+
+
+def todo(task, completed=False, **fields):
+    return {
+        "task": task,
+        "category": "",
+        "status": "Not Started",
+        "due_date": "",
+        "completed": completed,
+        **fields,
+    }
+
+
+def graph(todos):
+    tasks = TaskGraph()
+    tasks.rebuild(todos)
+    return tasks
+
+
+def upcoming(record, count=4):
+    return list(itertools.islice(occurrences(record, TODAY), count))
+
+
+def test_occurrences():
+    assert upcoming(todo("a", due_date="2026-10-30", repeat="daily"), 3) == [
+        "2026-10-30",
+        "2026-10-31",
+        "2026-11-01",
+    ]
+    assert upcoming(todo("a", repeat="weekly"), 2) == ["2026-10-19", "2026-10-26"]
+    # Short months do not move later occurrences off the 31st
+    assert upcoming(todo("a", due_date="2026-01-31", repeat="monthly")) == [
+        "2026-01-31",
+        "2026-02-28",
+        "2026-03-31",
+        "2026-04-30",
+    ]
+    assert upcoming(todo("a", due_date="2024-02-29", repeat="yearly"), 2) == [
+        "2024-02-29",
+        "2025-02-28",
+    ]
+
+
+def test_complete_occurrence():
+    record = todo("Trash", due_date="2026-10-01", repeat="weekly", id="t1")
+    done = complete_occurrence(record, TODAY)
+    assert done == todo(
+        "Trash",
+        True,
+        status="Completed",
+        due_date="2026-10-01",
+        completed_on="2026-10-19",
+    )
+    # Skips the occurrences missed in the meantime
+    assert record["due_date"] == "2026-10-22"
+    assert not record["completed"]
+
+
+def test_complete_occurrence_before_it_is_due():
+    record = todo("Trash", due_date="2026-11-01", repeat="weekly")
+    done = complete_occurrence(record, TODAY)
+    assert done["due_date"] == "2026-11-01"
+    assert record["due_date"] == "2026-11-08"
+    # Completing it early again moves on again rather than repeating it
+    complete_occurrence(record, TODAY)
+    assert record["due_date"] == "2026-11-15"
+
+
+def test_readiness_follows_toggles():
+    paint = todo("Paint", id="p")
+    buy = todo("Buy paint", id="b", parent="p")
+    tape = todo("Tape", id="t")
+    walls = todo("Walls", blocked_by=["t", "gone"], parent="p")
+    tasks = graph([paint, buy, tape, walls])
+    assert tasks.blocked(paint) and tasks.blocked(walls)
+    assert not tasks.blocked(buy)
+    assert tasks.blockers(paint) == [buy, walls]
+
+    tape["completed"] = True
+    assert tasks.toggled(tape) == [walls]
+    assert not tasks.blocked(walls)
+    buy["completed"] = True
+    assert tasks.toggled(buy) == []
+    assert tasks.blocked(paint)
+    walls["completed"] = True
+    assert tasks.toggled(walls) == [paint]
+    assert not tasks.blocked(paint)
+    walls["completed"] = False
+    assert tasks.toggled(walls) == [paint]
+    assert tasks.blocked(paint)
+    tape["completed"] = False
+    assert tasks.toggled(tape) == [walls]
+
+
+def test_link_refuses_cycles():
+    a, b, c = todo("a"), todo("b"), todo("c")
+    tasks = graph([a, b, c])
+    tasks.link(b, blocked_by=[a])
+    tasks.link(c, blocked_by=[b])
+    tasks.rebuild([a, b, c])
+    assert b["blocked_by"] == [a["id"]]
+
+    with pytest.raises(CycleError):
+        tasks.link(a, blocked_by=[c])
+    with pytest.raises(CycleError):
+        tasks.link(a, blocked_by=[a])
+    # c waits for a, so a cannot wait for c as its parent
+    with pytest.raises(CycleError):
+        tasks.link(c, parent=a, blocked_by=[b])
+    assert "blocked_by" not in a and "parent" not in c
+    tasks.link(a, parent=c)
+    assert a["parent"] == c["id"]
+
+
+def test_rows_nest_subtasks():
+    chain = [todo("root", id="0")]
+    chain += [todo(str(i), id=str(i), parent=str(i - 1)) for i in range(1, 5000)]
+    chain.reverse()
+    flat = todo("flat")
+    tasks = graph(chain + [flat])
+    rows = tasks.rows()
+    assert rows[0] == (4999, 0)
+    assert rows[1] == (4998, 1)
+    assert rows[4999] == (0, 4999)
+    assert rows[5000] == (5000, 0)
+    assert graph([flat]).rows() is None
+
+
+def test_toggle_only_touches_dependents():
+    todos = [todo(f"Task {i}", id=str(i)) for i in range(100_000)]
+    todos[1]["blocked_by"] = ["0"]
+    tasks = graph(todos)
+    start = time.perf_counter()
+    todos[0]["completed"] = True
+    assert tasks.toggled(todos[0]) == [todos[1]]
+    todos[5]["completed"] = True
+    assert tasks.toggled(todos[5]) == []
+    assert time.perf_counter() - start < TOGGLE_BUDGET